@@ -1,85 +1,166 @@
-import oracledb
-import pandas as pd
 from datetime import datetime
+import os
+import resource
 import sys
+import time
 import signal
 from common.loghandler import LogHandler
 from common.dbhandler import DBHandler
+from common.statuswriter import StatusWriter
+from common.outputformat import write_output, DEFAULT_OUTPUT_FORMAT
+from common import queries
 
 log_handler = LogHandler()
 logger = log_handler.getloghandler("app")
 
 db_handler = DBHandler()
-dbconn = db_handler.get_db_connection(logger)
+# 태스크 하나만 처리하는 프로세스라 풀은 작게 잡아둬.
+dbpool = db_handler.get_db_pool(logger, name="app", min=1, max=2, increment=1)
+dbconn = None
+# 상태 변경은 모아뒀다가 종료 전에 한 번에 반영
+status_writer = StatusWriter(dbpool, logger, name="app") if dbpool else None
+
+# csv 결과 파일 압축 방식: None, 'gzip', 'zstd'(zstandard 패키지 필요)
+EXPORT_COMPRESSION = None
 
 # 전역 변수로 taskid와 connection 정의
 taskid = None
+# 시그널로 종료됐는지 여부. 'K' 는 main() 의 finally 에서 'E' 대신 넣어.
+terminated = False
 
 def update_task_status(taskid, status):
-    global dbconn
     logger.info("update_task_status start")
-    with dbconn.cursor() as cursor:
-        cursor.execute("""
-            UPDATE TESTCHO.TASK 
-            SET task_status = :status, 
-                changed_at = CURRENT_TIMESTAMP 
-            WHERE taskid = :taskid
-        """, status=status, taskid=taskid)
-        dbconn.commit()
-
-
-def fetch_data(taskid):
-    global dbconn
-    logger.info("fetch_data start")
-    query = "SELECT * FROM TESTCHO.TASK WHERE taskid = :taskid"
-    return pd.read_sql(query, dbconn, params={'taskid': taskid})
-
-def save_to_csv(dataframe):
-    logger.info("save_to_csv start")
-    timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-    csv_file_name = os.path.join("output",datetime.now().strftime("%Y%m%d%H%M%S") + ".csv")
-    dataframe.to_csv(csv_file_name, index=False)
-    logger.info(f"Data saved to {csv_file_name}")
+    status_writer.put(taskid, status)
+
+
+def fetch_output_format(conn, taskid):
+    """TASK.OUTPUT_FORMAT 에 지정된 결과 형식 (csv, parquet, arrow). 비어 있으면 csv."""
+    with conn.cursor() as cursor:
+        queries.execute(cursor, "task.output_format", taskid=taskid)
+        row = cursor.fetchone()
+    return (row[0] if row else None) or DEFAULT_OUTPUT_FORMAT
+
+def save_output(conn, taskid, output_format):
+    """쿼리 결과를 배치 단위로 꺼내서 output_format 파일에 바로 써. 결과 크기와 상관없이 메모리는 일정해."""
+    logger.info(f"save_output start (format={output_format})")
+    # 같은 초에 시작한 태스크끼리 (runner pool, 병렬 기동) 같은 파일을 덮어쓰지 않게 taskid 를 앞에 붙여
+    file_name = os.path.join("output", f"{taskid}_{datetime.now().strftime('%Y%m%d%H%M%S')}")
+    os.makedirs("output", exist_ok=True)
+    stats = write_output(output_format, conn, queries.sql("task.export_rows"), {'taskid': taskid}, file_name,
+                         compression=EXPORT_COMPRESSION)
+    logger.info(f"Data saved to {stats['path']}: {stats['rows']} rows, {stats['bytes']} bytes, "
+                f"{stats['rows_per_sec']} rows/sec")
+    return stats
+
+def update_export_stats(conn, taskid, stats):
+    """내보낸 행 수, 파일 크기, 초당 행 수를 TASK 행에 기록"""
+    with conn.cursor() as cursor:
+        queries.execute(cursor, "task.update_export_stats", output_rows=stats['rows'], output_bytes=stats['bytes'],
+                        output_rows_per_sec=stats['rows_per_sec'], taskid=taskid)
+    conn.commit()
 
 def signal_handler(sig, frame):
-    """신호 처리기: 프로세스가 종료될 때 상태 업데이트."""
-    global dbconn
-    logger.info("signal_handler start")
-    if dbconn:
-        update_task_status(dbconn, taskid, 'K')
-    logger.info("Process terminated. Status updated to 'K'.")
+    """신호 처리기: 플래그만 세우고 SystemExit 로 main() 을 빠져나가게 해.
+
+    메인 스레드가 status_writer 의 lock 을 잡고 있을 때 신호가 올 수 있어서 여기서는 put()/flush() 를 안 불러
+    (threading.Lock 은 재진입이 안 돼서 그대로 멈춰). 'K' 반영은 main() 의 finally 가 해.
+    """
+    global terminated
+    if terminated:
+        # 종료 처리 중에 또 온 신호는 무시해서 마지막 flush 가 끊기지 않게 해
+        return
+    terminated = True
     sys.exit(0)
 
+def run_task(taskid, conn):
+    """태스크 하나를 처리함. app.py 단독 실행(main)과 runner pool 워커(worker_loop)가 같이 씀."""
+    # 태스크별 결과 형식 확인
+    output_format = fetch_output_format(conn, taskid)
+
+    # 결과 파일로 저장 (배치 단위 스트리밍)
+    stats = save_output(conn, taskid, output_format)
+    update_export_stats(conn, taskid, stats)
+
+    # 상태 업데이트
+    update_task_status(taskid, 'S')
+
+
+def run_pooled_task(taskid):
+    """runner pool 워커용: 풀에서 커넥션을 받아 태스크를 처리하고 성공 여부를 돌려줘."""
+    try:
+        with dbpool.acquire() as conn:
+            run_task(taskid, conn)
+        return True
+    except Exception as e:
+        logger.error(f"taskid={taskid} failed in runner worker: {e}", exc_info=True)
+        return False
+    finally:
+        update_task_status(taskid, 'E')
+
+
+def worker_loop():
+    """runner pool 워커 모드 (python app.py --worker)
+
+    oracledb(common.dbhandler) 를 이미 import 하고 커넥션 풀을 열어둔 상태로 stdin 에서 taskid 를 한 줄씩 받아 처리하고,
+    처리 결과를 stdout 에 '@@RUNNER ...' 줄로 알려줘. stdin 이 닫히면 남은 상태를 반영하고 종료해.
+    """
+    if dbpool is None:
+        logger.error("runner worker: DB 커넥션 풀을 만들지 못해서 종료해")
+        sys.exit(1)
+    logger.info(f"runner worker started (pid={os.getpid()})")
+    print("@@RUNNER READY", flush=True)
+    for line in sys.stdin:
+        worker_taskid = line.strip()
+        if not worker_taskid:
+            continue
+        started = time.monotonic()
+        before = resource.getrusage(resource.RUSAGE_SELF)
+        ok = run_pooled_task(worker_taskid)
+        after = resource.getrusage(resource.RUSAGE_SELF)
+        # 이 태스크의 경과/CPU 시간과 지금까지 워커의 최대 RSS(KB)
+        cpu_sec = (after.ru_utime + after.ru_stime) - (before.ru_utime + before.ru_stime)
+        print(f"@@RUNNER DONE {worker_taskid} {'ok' if ok else 'error'} "
+              f"{time.monotonic() - started:.3f} {cpu_sec:.3f} {after.ru_maxrss}", flush=True)
+    status_writer.close()
+    dbpool.close()
+    logger.info(f"runner worker stopped (pid={os.getpid()})")
+
+
 def main(taskid_input):
     global taskid, dbconn
     taskid = taskid_input
-
+    if dbpool is None:
+        logger.error(f"taskid={taskid}: DB 커넥션 풀을 만들지 못해서 종료해")
+        sys.exit(1)
 
     # 종료 신호 처리 등록
     signal.signal(signal.SIGINT, signal_handler)  # Ctrl+C
     signal.signal(signal.SIGTERM, signal_handler)  # kill 명령
     logger.info("main start 2")
     try:
-        # 데이터 가져오기
-        data = fetch_data(taskid)
-        logger.info("data:{}".format(data))
-
-        # CSV 파일로 저장
-        save_to_csv(data)
-
-        # 상태 업데이트
-        update_task_status(taskid, 'S')
+        # 커넥션을 못 받아도 finally 에서 풀을 닫고, 상태 없이 0 이 아닌 코드로 끝나서 sch 가 'F' 로 바꿔
+        dbconn = dbpool.get_connection()
+        run_task(taskid, dbconn)
     finally:
-        # 종료 시 상태 업데이트
+        # 종료 시 상태 업데이트 (신호로 끝났으면 'K')
+        if dbconn:
+            if terminated:
+                logger.info("Process terminated by signal. Status updated to 'K'.")
+            update_task_status(taskid, 'K' if terminated else 'E')
+        status_writer.close()
         if dbconn:
-            update_task_status(taskid, 'E')
-            dbconn.close()
+            dbpool.release(dbconn)
+        dbpool.close()
 
 if __name__ == "__main__":
     # 커맨드라인 인자로 taskid를 가져옴
     logger.info("app.py start argv:{}, len(sys.argv):{}".format(sys.argv, len(sys.argv)))
     if len(sys.argv) != 2:
-        logger.info("Usage: python app.py <taskid>")
+        logger.info("Usage: python app.py <taskid> | python app.py --worker")
         sys.exit(1)
 
+    if sys.argv[1] == '--worker':
+        worker_loop()
+        sys.exit(0)
+
     main(sys.argv[1])
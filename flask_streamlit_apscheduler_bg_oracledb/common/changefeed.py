@@ -0,0 +1,233 @@
+import json
+import os
+import threading
+import time
+import urllib.request
+from collections import deque
+from common import queries
+
+# 변경 로그(TASK_CHANGELOG)를 몇 초마다 tail 할지. 구독자 수와 상관없이 프로세스마다 이 주기로 한 번씩만 읽어.
+CHANGE_FEED_POLL_SEC = 1
+# 한 번에 읽을 최대 변경 수
+CHANGE_FEED_BATCH_SIZE = 1000
+# 재연결한 구독자에게 다시 보내줄 수 있게 메모리에 들고 있는 최근 변경 수
+CHANGE_FEED_BUFFER_SIZE = 10000
+# seq 가 비어 있으면 아직 커밋 안 된 트랜잭션일 수 있어서 이만큼 기다렸다가, 그래도 없으면 롤백된 걸로 보고 건너뛰어
+CHANGE_FEED_GAP_WAIT_SEC = 3
+# 오래된 변경 로그 정리
+CHANGELOG_RETENTION_HOURS = 24
+CHANGELOG_PURGE_INTERVAL_SEC = 600
+
+
+class ChangeFeed:
+    """TASK_CHANGELOG 를 tail 해서 TASK 변경(등록/상태 변경/삭제)을 구독자에게 밀어주는 change feed
+
+    TASK 트리거(trg_task_changelog)가 상태나 시작 시간이 바뀐 행마다 seq 를 붙여 변경 로그를 남기고,
+    이 클래스의 스레드 하나가 poll_sec 마다 마지막으로 본 seq 이후만 읽어서 메모리 버퍼에 쌓아.
+    구독자(/events/tasks SSE 연결)는 DB 를 직접 읽지 않고 wait(after_seq) 로 버퍼를 기다려.
+    seq 는 INSERT 순서라 커밋 순서와 다를 수 있어서, 중간이 빈 seq 는 gap_wait_sec 동안 기다렸다가
+    순서대로만 내보내. 그래서 구독자는 마지막으로 받은 seq 하나만 기억하면 돼.
+    """
+
+    def __init__(self, dbpool, logger, poll_sec=CHANGE_FEED_POLL_SEC, batch_size=CHANGE_FEED_BATCH_SIZE,
+                 buffer_size=CHANGE_FEED_BUFFER_SIZE, gap_wait_sec=CHANGE_FEED_GAP_WAIT_SEC, name="changefeed"):
+        self.dbpool = dbpool
+        self.logger = logger
+        self.poll_sec = poll_sec
+        self.batch_size = batch_size
+        self.gap_wait_sec = gap_wait_sec
+        self.name = name
+        self._buffer = deque(maxlen=buffer_size)
+        self._low = 0              # 이 seq 까지는 다 내보냈거나 건너뜀
+        self._base = 0             # 버퍼에서 밀려났거나 시작 전이라 다시 보내줄 수 없는 마지막 seq
+        self._gaps = {}            # 빈 seq 시작 -> 처음 본 monotonic
+        self._cond = threading.Condition()
+        self._start_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._last_purge = 0.0
+        self._stats = {'polls': 0, 'published': 0, 'skipped_gaps': 0, 'poll_errors': 0}
+
+    def start(self):
+        """처음 부를 때만 tail 스레드를 띄워 (여러 번 불러도 돼). 시작 시점 이후의 변경부터 내보내."""
+        with self._start_lock:
+            if self._thread is not None:
+                return self
+            with self.dbpool.acquire() as conn, conn.cursor() as cursor:
+                queries.execute(cursor, "changelog.max_seq")
+                self._low, = cursor.fetchone()
+            self._base = self._low
+            self._thread = threading.Thread(target=self._run, name=f"{self.name}-tail", daemon=True)
+            self._thread.start()
+            self.logger.info(f"[{self.name}] change feed started at seq {self._low}")
+        return self
+
+    def _run(self):
+        while not self._stopped.wait(self.poll_sec):
+            try:
+                self.poll()
+                if time.monotonic() - self._last_purge >= CHANGELOG_PURGE_INTERVAL_SEC:
+                    self.purge()
+            except Exception as e:
+                self._stats['poll_errors'] += 1
+                self.logger.error(f"[{self.name}] change feed poll failed: {e}", exc_info=True)
+
+    def poll(self):
+        """마지막 seq 이후 변경을 읽어 순서대로 버퍼에 넣고 구독자를 깨워. 내보낸 건수를 돌려줘."""
+        with self.dbpool.acquire() as conn, conn.cursor() as cursor:
+            cursor.arraysize = self.batch_size
+            queries.execute(cursor, "changelog.tail", after_seq=self._low, limit=self.batch_size)
+            rows = cursor.fetchall()
+        self._stats['polls'] += 1
+
+        now = time.monotonic()
+        expected = self._low + 1
+        blocked = False
+        events = []
+        for seq, taskid, op, old_status, new_status, starttime, changed_at in rows:
+            if seq > expected:
+                first_seen = self._gaps.setdefault(expected, now)
+                if blocked or now - first_seen < self.gap_wait_sec:
+                    blocked = True
+                else:
+                    self.logger.info(f"[{self.name}] skipped changelog seq {expected}..{seq - 1} "
+                                     f"(not committed within {self.gap_wait_sec}s)")
+                    self._stats['skipped_gaps'] += 1
+            if not blocked:
+                events.append({
+                    'seq': seq, 'taskid': taskid, 'op': op, 'old_status': old_status, 'new_status': new_status,
+                    'starttime': starttime.strftime('%Y-%m-%d %H:%M:%S') if starttime else None,
+                    'changed_at': changed_at.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3] if changed_at else None,
+                })
+                self._low = seq
+            expected = seq + 1
+        self._gaps = {start: seen for start, seen in self._gaps.items() if start > self._low}
+
+        if events:
+            with self._cond:
+                for event in events:
+                    if len(self._buffer) == self._buffer.maxlen:
+                        self._base = self._buffer[0]['seq']
+                    self._buffer.append(event)
+                self._cond.notify_all()
+            self._stats['published'] += len(events)
+        return len(events)
+
+    def purge(self):
+        self._last_purge = time.monotonic()
+        with self.dbpool.acquire() as conn, conn.cursor() as cursor:
+            queries.execute(cursor, "changelog.purge", hours=CHANGELOG_RETENTION_HOURS)
+            purged = cursor.rowcount
+            conn.commit()
+        if purged:
+            self.logger.info(f"[{self.name}] purged {purged} changelog rows older than {CHANGELOG_RETENTION_HOURS}h")
+        return purged
+
+    @property
+    def last_seq(self):
+        with self._cond:
+            return self._buffer[-1]['seq'] if self._buffer else self._base
+
+    def wait(self, after_seq, timeout=None):
+        """after_seq 이후 변경이 생길 때까지 최대 timeout 초 기다려. (events, reset)
+
+        reset 이 True 면 after_seq 이후 변경 일부가 버퍼에 없어서(다른 워커에서 받던 구독자, 오래 끊겼던 구독자)
+        구독자가 전체를 다시 읽어야 해. 그때 events 는 버퍼에 남아 있는 변경 전부야.
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: bool(self._buffer) and self._buffer[-1]['seq'] > after_seq, timeout)
+            reset = after_seq < self._base
+            return [event for event in self._buffer if event['seq'] > after_seq], reset
+
+    def get_stats(self):
+        """이 프로세스의 tail 통계. gunicorn 워커마다 따로라서 어느 워커 것인지 pid 를 같이 돌려줘."""
+        running = self._thread is not None and self._thread.is_alive()
+        return dict(self._stats, pid=os.getpid(), running=running, low_seq=self._low,
+                    buffered=len(self._buffer), pending_gaps=len(self._gaps))
+
+    def stop(self):
+        self._stopped.set()
+        with self._cond:
+            self._cond.notify_all()
+
+
+class ChangeFeedListener:
+    """main.py 의 /events/tasks (SSE) 를 구독해서 변경이 올 때마다 on_change(events, reset) 를 부르는 클라이언트
+
+    대시보드처럼 DB 를 주기적으로 다시 읽던 쪽이 변경이 있을 때만 읽게 하려고 써. 연결이 끊기면
+    reconnect_sec 뒤에 Last-Event-ID 로 이어서 받고, 끊긴 동안 놓친 게 있으면 서버가 reset 을 보내줘.
+    """
+
+    def __init__(self, url, on_change, logger, reconnect_sec=5, read_timeout_sec=60, name="changefeed-listener"):
+        self.url = url
+        self.on_change = on_change
+        self.logger = logger
+        self.reconnect_sec = reconnect_sec
+        self.read_timeout_sec = read_timeout_sec
+        self.name = name
+        self.last_event_id = None
+        self.connected = False
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                self._listen()
+            except Exception as e:
+                self.logger.info(f"[{self.name}] {self.url} 연결 끊김: {e}")
+            if self.connected:
+                self.connected = False
+                # 끊긴 동안의 변경은 모르니까 한 번 다시 읽게 해
+                self._notify([], True)
+            self._stopped.wait(self.reconnect_sec)
+
+    def _listen(self):
+        headers = {'Accept': 'text/event-stream'}
+        if self.last_event_id is not None:
+            headers['Last-Event-ID'] = self.last_event_id
+        request = urllib.request.Request(self.url, headers=headers)
+        with urllib.request.urlopen(request, timeout=self.read_timeout_sec) as response:
+            self.connected = True
+            self.logger.info(f"[{self.name}] {self.url} 구독 시작 (Last-Event-ID={self.last_event_id})")
+            event_name, data = "message", []
+            for raw in response:
+                if self._stopped.is_set():
+                    return
+                line = raw.decode('utf-8').rstrip('\r\n')
+                if not line:
+                    # 빈 줄 = 이벤트 하나 끝
+                    if data:
+                        self._dispatch(event_name, "\n".join(data))
+                    event_name, data = "message", []
+                elif line.startswith(':'):
+                    continue    # keepalive 주석
+                else:
+                    field, _, value = line.partition(':')
+                    value = value[1:] if value.startswith(' ') else value
+                    if field == 'event':
+                        event_name = value
+                    elif field == 'data':
+                        data.append(value)
+                    elif field == 'id':
+                        self.last_event_id = value
+
+    def _dispatch(self, event_name, data):
+        if event_name == 'tasks':
+            self._notify(json.loads(data), False)
+        elif event_name == 'reset':
+            self._notify([], True)
+
+    def _notify(self, events, reset):
+        try:
+            self.on_change(events, reset)
+        except Exception as e:
+            self.logger.error(f"[{self.name}] on_change failed: {e}", exc_info=True)
+
+    def stop(self):
+        self._stopped.set()
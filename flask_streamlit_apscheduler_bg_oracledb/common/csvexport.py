@@ -0,0 +1,64 @@
+import csv
+import gzip
+import io
+import os
+import time
+
+try:
+    import zstandard
+except ImportError:  # zstd 압축을 쓸 때만 필요해
+    zstandard = None
+
+# fetchmany 한 번에 가져올 행 수 (cursor.arraysize 로도 씀)
+EXPORT_ARRAYSIZE = 5000
+
+# 압축 방식별 파일 확장자
+COMPRESSION_SUFFIXES = {
+    None: "",
+    "gzip": ".gz",
+    "zstd": ".zst",
+}
+
+
+def open_output(path, compression=None):
+    """압축 방식에 맞게 텍스트 모드로 출력 파일을 열어줘."""
+    if compression is None:
+        return open(path, "w", newline="", encoding="utf-8")
+    if compression == "gzip":
+        return gzip.open(path, "wt", newline="", encoding="utf-8", compresslevel=6)
+    if compression == "zstd":
+        if zstandard is None:
+            raise ValueError("zstd compression requires the 'zstandard' package")
+        raw = open(path, "wb")
+        writer = zstandard.ZstdCompressor(level=3).stream_writer(raw, closefd=True)
+        return io.TextIOWrapper(writer, newline="", encoding="utf-8")
+    raise ValueError(f"unknown compression: {compression}")
+
+
+def export_cursor_to_csv(cursor, path, compression=None, arraysize=EXPORT_ARRAYSIZE):
+    """execute 가 끝난 cursor 의 결과를 fetchmany 로 arraysize 행씩 꺼내 CSV 파일에 바로바로 씀
+
+    결과 전체를 메모리에 올리지 않으니 메모리는 배치 하나 크기로 묶여 있어.
+    쓴 파일 경로, 행 수, 디스크에 쓴 바이트 수, 걸린 시간, 초당 행 수를 dict 로 돌려줘.
+    """
+    path += COMPRESSION_SUFFIXES[compression]
+    cursor.arraysize = arraysize
+    started = time.perf_counter()
+    rows = 0
+    with open_output(path, compression) as f:
+        writer = csv.writer(f)
+        writer.writerow([d[0] for d in cursor.description])
+        while True:
+            batch = cursor.fetchmany(arraysize)
+            if not batch:
+                break
+            writer.writerows(batch)
+            rows += len(batch)
+    elapsed = time.perf_counter() - started
+    return {
+        "path": path,
+        "rows": rows,
+        "bytes": os.path.getsize(path),
+        "elapsed_sec": round(elapsed, 3),
+        "rows_per_sec": round(rows / elapsed, 1) if elapsed > 0 else 0.0,
+    }
@@ -0,0 +1,235 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from common import queries
+
+# 스냅샷을 새로 모으는 기본 주기(초). 세션 수와 상관없이 이 주기로 한 번씩만 DB/psutil 을 조회해.
+SNAPSHOT_INTERVAL_SEC = 3
+# lastchanged_at 은 UPDATE 시각이라 커밋이 늦은 행은 앞선 시각으로 들어와. 이만큼 겹쳐서 다시 읽어.
+DELTA_OVERLAP_SEC = 60
+
+
+class Snapshot:
+    """한 시점의 대시보드 데이터 묶음 (세션끼리 같이 보니까 읽기만 해야 해)
+
+    data[name]     : 섹션별 마지막으로 성공한 값
+    errors[name]   : 섹션별 마지막 조회 오류 (성공하면 빠짐)
+    versions[name] : 섹션 값이나 오류가 바뀔 때만 1 씩 올라가는 번호
+    version        : versions 의 합. 스냅샷이 바뀔 때마다 올라가.
+    """
+
+    __slots__ = ("data", "errors", "versions", "version", "refreshed_at")
+
+    def __init__(self, data, errors, versions, refreshed_at):
+        self.data = data
+        self.errors = errors
+        self.versions = versions
+        self.version = sum(versions.values())
+        self.refreshed_at = refreshed_at
+
+
+def _same(old, new):
+    if old is new:
+        return True
+    # DataFrame/Series 는 == 가 원소별 비교라서 equals 로 비교해
+    if hasattr(new, 'equals'):
+        return type(old) is type(new) and new.equals(old)
+    return old == new
+
+
+class SnapshotRefresher:
+    """대시보드 데이터를 프로세스에 하나만 있는 백그라운드 스레드가 주기적으로 모아두는 refresher
+
+    add(name, fetch, interval_sec) 로 섹션(스케줄 그래프, 스케줄 목록, 메트릭스 ...)을 등록하면
+    섹션마다 interval_sec 마다 fetch() 를 한 번 불러서 값이 바뀐 섹션만 버전을 올려.
+    streamlit 은 브라우저 세션마다 스크립트를 따로 돌리기 때문에 st.cache_resource 로 하나만 만들고,
+    세션들은 주기적으로 get() 으로 지금 스냅샷을 보고 버전이 바뀐 섹션만 다시 그리면 돼.
+    탭을 열 개 띄워도 DB 조회는 한 번이야.
+    """
+
+    def __init__(self, logger, interval_sec=SNAPSHOT_INTERVAL_SEC, name="dash"):
+        self.logger = logger
+        self.interval_sec = interval_sec
+        self.name = name
+        self._sources = {}                 # name -> [fetch, interval_sec, 다음 조회 monotonic]
+        self._data = {}
+        self._errors = {}
+        self._versions = {}
+        self._snapshot = Snapshot({}, {}, {}, None)
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._stats = {'refreshes': 0, 'changes': 0, 'errors': 0, 'triggers': 0, 'refresh_ms_max': 0.0}
+
+    def add(self, name, fetch, interval_sec=None):
+        """섹션 하나를 등록해. fetch 는 인자 없이 값을 돌려주는 함수 (오류는 예외로)."""
+        self._sources[name] = [fetch, interval_sec or self.interval_sec, 0.0]
+        self._versions[name] = 0
+        return self
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name=f"{self.name}-snapshot", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self.refresh()
+            next_due = min(source[2] for source in self._sources.values())
+            self._wakeup.wait(max(0.05, next_due - time.monotonic()))
+            self._wakeup.clear()
+
+    def trigger(self, *names):
+        """주기를 기다리지 않고 names 섹션을 바로 다시 읽게 해 (change feed 로 변경을 받았을 때)"""
+        for name in names:
+            self._sources[name][2] = 0.0
+        self._stats['triggers'] += 1
+        self._wakeup.set()
+
+    def refresh(self, force=False):
+        """조회할 때가 된 섹션을 다시 읽어서 바뀐 게 있으면 새 스냅샷을 만들어. 바뀐 섹션 이름을 돌려줘."""
+        started = time.perf_counter()
+        changed = []
+        for name, source in self._sources.items():
+            fetch, interval_sec, due = source
+            now = time.monotonic()
+            if not force and now < due:
+                continue
+            source[2] = now + interval_sec
+            try:
+                value, error = fetch(), None
+            except Exception as e:
+                value, error = self._data.get(name), str(e)
+                self._stats['errors'] += 1
+                self.logger.error(f"[{self.name}] snapshot '{name}' 조회 오류: {e}")
+            if (name in self._data and _same(self._data[name], value)) and self._errors.get(name) == error:
+                continue
+            self._data[name] = value
+            if error is None:
+                self._errors.pop(name, None)
+            else:
+                self._errors[name] = error
+            self._versions[name] += 1
+            changed.append(name)
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self._stats['refreshes'] += 1
+        self._stats['refresh_ms_max'] = round(max(self._stats['refresh_ms_max'], elapsed_ms), 2)
+        if changed:
+            self._stats['changes'] += 1
+            snapshot = Snapshot(dict(self._data), dict(self._errors), dict(self._versions), datetime.now())
+            with self._lock:
+                self._snapshot = snapshot
+        return changed
+
+    def get(self):
+        """지금 스냅샷 (처음 조회가 끝나기 전에는 빈 스냅샷)"""
+        with self._lock:
+            return self._snapshot
+
+    def get_stats(self):
+        return dict(self._stats, version=self.get().version, sources=len(self._sources))
+
+    def stop(self):
+        self._stopped.set()
+        self._wakeup.set()
+
+
+class IncrementalScheduleList:
+    """스케줄 등록 현황(TASK 전체 목록)을 바뀐 행만 받아서 유지하는 캐시
+
+    처음 한 번만 전체를 읽고, 그 뒤로는 dash.schedule_changed 로 마지막으로 본 taskid 보다 큰 행과
+    lastchanged_at 이 high-water mark(마지막으로 본 값 - overlap_sec) 이후인 행만 읽어서 taskid 인덱스
+    frame 에 합쳐. 겹쳐 읽은 행 중 실제로 값이 바뀐 행이 없으면 같은 frame 객체를 그대로 돌려줘서
+    SnapshotRefresher 가 버전을 올리지 않아. 삭제는 delta 로 알 수 없어서 TASK_CHANGELOG 의 'D' 행
+    (dash.schedule_deleted)을 같은 방식으로 겹쳐 읽어서 캐시에서 빼.
+
+    목록 전체는 streamlit 프로세스에 하나만 두고 세션들이 나눠 보며, 페이지는 page() 가 메모리에서 잘라줘.
+    그래서 DB 조회량은 바뀐 행 수에 비례하지만 메모리는 TASK 행 수에 비례해. 세션마다 아무 페이지로나
+    바로 이동할 수 있게 하려고 서버 쪽 keyset 페이징 대신 이렇게 했어.
+    """
+
+    COLUMNS = ['taskid', 'subprocee_starttime', 'taskname', 'task_status', 'lastchanged_at']
+
+    def __init__(self, dbpool, logger, overlap_sec=DELTA_OVERLAP_SEC):
+        self.dbpool = dbpool
+        self.logger = logger
+        self.overlap = timedelta(seconds=overlap_sec)
+        self._frame = self._empty()
+        self._max_taskid = 0
+        self._since = None
+        self._deleted_since = None
+        self._stats = {'delta_rows': 0, 'merged_rows': 0, 'deleted_rows': 0}
+
+    def _empty(self):
+        return pd.DataFrame(columns=self.COLUMNS).set_index('taskid')
+
+    def refresh(self):
+        """바뀐 행을 합친 frame (subprocee_starttime 최신 순, taskid 인덱스)"""
+        if self.dbpool is None:
+            raise RuntimeError("데이터베이스 커넥션 풀을 만들지 못했습니다.")
+        # 바뀐 행을 먼저 읽고 삭제를 나중에 읽어야 그 사이 지워진 행도 빠져
+        with self.dbpool.acquire() as conn, conn.cursor() as cursor:
+            queries.execute(cursor, "dash.schedule_changed", after_taskid=self._max_taskid, since=self._since)
+            rows = cursor.fetchall()
+            queries.execute(cursor, "dash.schedule_deleted", since=self._deleted_since,
+                            overlap_sec=self.overlap.total_seconds())
+            deleted = cursor.fetchall()
+        self._stats['delta_rows'] += len(rows)
+        self._merge(rows)
+        return self._drop(deleted)
+
+    def _merge(self, rows):
+        if not rows:
+            return self._frame
+        delta = pd.DataFrame(rows, columns=self.COLUMNS).set_index('taskid')
+        self._max_taskid = max(self._max_taskid, int(delta.index.max()))
+        changed_at = delta['lastchanged_at'].max()
+        if pd.notna(changed_at):
+            since = changed_at.to_pydatetime() - self.overlap
+            self._since = since if self._since is None else max(self._since, since)
+
+        # overlap 때문에 다시 읽힌, 값이 그대로인 행은 버려
+        old = self._frame.reindex(delta.index)
+        unchanged = (old.eq(delta) | (old.isna() & delta.isna())).all(axis=1)
+        delta = delta[~unchanged]
+        if delta.empty:
+            return self._frame
+
+        self._stats['merged_rows'] += len(delta)
+        kept = self._frame.drop(delta.index, errors='ignore')
+        frame = pd.concat([kept, delta]) if not kept.empty else delta
+        self._frame = frame.sort_values('subprocee_starttime', ascending=False, kind='stable')
+        return self._frame
+
+    def _drop(self, deleted):
+        """TASK_CHANGELOG 의 삭제 행 [(taskid, changed_at)] 을 캐시에서 빼. 이미 없는 taskid 는 그냥 넘어가."""
+        if not deleted:
+            return self._frame
+        changed_at = max(row[1] for row in deleted)
+        since = changed_at - self.overlap
+        self._deleted_since = since if self._deleted_since is None else max(self._deleted_since, since)
+
+        gone = self._frame.index.intersection([row[0] for row in deleted])
+        if gone.empty:
+            return self._frame
+        self._stats['deleted_rows'] += len(gone)
+        self._frame = self._frame.drop(gone)
+        return self._frame
+
+    @staticmethod
+    def page(frame, page_no, page_size):
+        """frame 의 page_no(1부터) 페이지만 화면용 컬럼으로 잘라줘. (page_df, 전체 페이지 수)"""
+        pages = max(1, -(-len(frame) // page_size))
+        page_no = min(max(1, page_no), pages)
+        start = (page_no - 1) * page_size
+        page_df = frame.iloc[start:start + page_size].drop(columns=['lastchanged_at']).reset_index()
+        return page_df, pages
+
+    def get_stats(self):
+        return dict(self._stats, rows=len(self._frame), max_taskid=self._max_taskid,
+                    since=self._since.strftime('%Y-%m-%d %H:%M:%S') if self._since else None)
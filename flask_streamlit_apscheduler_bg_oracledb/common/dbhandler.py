@@ -1,4 +1,162 @@
+import threading
+import time
+from contextlib import contextmanager, asynccontextmanager
 import oracledb
+from common.queries import STMT_CACHE_SIZE, query_stats
+
+class DBPool:
+    """oracledb 커넥션 풀 래퍼 (체크아웃 시 ping/재연결, 풀 통계)"""
+
+    def __init__(self, pool, logger, name="default", ping_on_checkout=True):
+        self.pool = pool
+        self.logger = logger
+        self.name = name
+        self.ping_on_checkout = ping_on_checkout
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'acquires': 0,     # 체크아웃 성공 횟수
+            'waits': 0,        # 풀이 꽉 차서 대기한 횟수
+            'timeouts': 0,     # wait_timeout 안에 커넥션을 못 받은 횟수
+            'reconnects': 0,   # ping 실패로 커넥션을 버리고 다시 받은 횟수
+            'errors': 0,       # 그 밖의 체크아웃 오류
+            'wait_ms_total': 0.0,
+            'wait_ms_max': 0.0,
+        }
+
+    def _count(self, key, value=1):
+        with self._stats_lock:
+            self._stats[key] += value
+
+    def get_connection(self):
+        """풀에서 커넥션 하나를 꺼내옴. 다 쓰면 반드시 release() 해줘야 해."""
+        started = time.perf_counter()
+        waited = self.pool.busy >= self.pool.max
+        try:
+            conn = self.pool.acquire()
+        except oracledb.Error as e:
+            error_obj, = e.args
+            # DPY-4005: 풀에서 커넥션을 wait_timeout 안에 받지 못함
+            if getattr(error_obj, 'full_code', '') == 'DPY-4005':
+                self._count('timeouts')
+            else:
+                self._count('errors')
+            raise
+
+        if self.ping_on_checkout:
+            try:
+                conn.ping()
+            except oracledb.Error as e:
+                self.logger.info(f"[{self.name}] 풀 커넥션 ping 실패, 재연결: {e}")
+                self._count('reconnects')
+                try:
+                    self.pool.drop(conn)
+                except Exception:
+                    pass
+                conn = self.pool.acquire()
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._stats_lock:
+            self._stats['acquires'] += 1
+            if waited:
+                self._stats['waits'] += 1
+                self._stats['wait_ms_total'] += elapsed_ms
+                self._stats['wait_ms_max'] = max(self._stats['wait_ms_max'], elapsed_ms)
+        return conn
+
+    def release(self, conn):
+        """커넥션을 풀에 돌려줌. 커밋 안 된 트랜잭션은 롤백돼."""
+        try:
+            self.pool.release(conn)
+        except oracledb.Error as e:
+            self.logger.info(f"[{self.name}] 커넥션 반납 오류: {e}")
+            try:
+                self.pool.drop(conn)
+            except Exception:
+                pass
+
+    @contextmanager
+    def acquire(self):
+        """with dbpool.acquire() as conn: 형태로 쓰는 체크아웃/반납 컨텍스트 매니저"""
+        conn = self.get_connection()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def get_stats(self):
+        """풀 통계 (대기, 타임아웃, 사용중 커넥션 수 등)"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['wait_ms_total'] = round(stats['wait_ms_total'], 2)
+        stats['wait_ms_max'] = round(stats['wait_ms_max'], 2)
+        stats.update({
+            'name': self.name,
+            'busy': self.pool.busy,
+            'opened': self.pool.opened,
+            'min': self.pool.min,
+            'max': self.pool.max,
+            'increment': self.pool.increment,
+            'stmtcachesize': self.pool.stmtcachesize,
+        })
+        return stats
+
+    def close(self):
+        try:
+            self.pool.close(force=True)
+        except Exception as e:
+            self.logger.info(f"[{self.name}] 풀 종료 오류: {e}")
+
+
+class AsyncDBPool:
+    """oracledb.create_pool_async 풀 래퍼 (sch_async.py 용). DBPool 과 같은 방식으로 체크아웃/통계를 다뤄."""
+
+    def __init__(self, pool, logger, name="default", ping_on_checkout=True):
+        self.pool = pool
+        self.logger = logger
+        self.name = name
+        self.ping_on_checkout = ping_on_checkout
+        self._stats = {'acquires': 0, 'reconnects': 0, 'errors': 0}
+
+    @asynccontextmanager
+    async def acquire(self):
+        """async with dbpool.acquire() as conn: 형태로 쓰는 체크아웃/반납 컨텍스트 매니저"""
+        try:
+            conn = await self.pool.acquire()
+        except oracledb.Error:
+            self._stats['errors'] += 1
+            raise
+        if self.ping_on_checkout:
+            try:
+                await conn.ping()
+            except oracledb.Error as e:
+                self.logger.info(f"[{self.name}] 풀 커넥션 ping 실패, 재연결: {e}")
+                self._stats['reconnects'] += 1
+                try:
+                    await self.pool.drop(conn)
+                except Exception:
+                    pass
+                conn = await self.pool.acquire()
+        self._stats['acquires'] += 1
+        try:
+            yield conn
+        finally:
+            try:
+                await self.pool.release(conn)
+            except oracledb.Error as e:
+                self.logger.info(f"[{self.name}] 커넥션 반납 오류: {e}")
+
+    def get_stats(self):
+        stats = dict(self._stats)
+        stats.update({'name': self.name, 'busy': self.pool.busy, 'opened': self.pool.opened,
+                      'min': self.pool.min, 'max': self.pool.max})
+        return stats
+
+    async def close(self):
+        try:
+            await self.pool.close(force=True)
+        except Exception as e:
+            self.logger.info(f"[{self.name}] 풀 종료 오류: {e}")
+
 
 class DBHandler:
 
@@ -9,6 +167,15 @@ class DBHandler:
             'password': '1234',
             'dsn': '127.0.0.1:1521/FREE'
         }
+        # 커넥션 풀 설정 (get_db_pool 에서 프로세스별로 덮어쓸 수 있음)
+        self.pool_config = {
+            'min': 2,
+            'max': 10,
+            'increment': 1,
+            'wait_timeout': 5000,     # 풀이 꽉 찼을 때 최대 대기 시간(ms)
+            'ping_on_checkout': True, # 체크아웃마다 ping 해서 끊어진 커넥션은 교체
+            'stmtcachesize': STMT_CACHE_SIZE  # 커넥션별 statement cache 크기 (common/queries.py 문장 수보다 크게)
+        }
 
     def get_db_config(self):
         return self.db_config
@@ -21,4 +188,40 @@ class DBHandler:
             return connection
         except Exception as e:
             logger.info(f"DB 연결 오류: {e}")
-            return None
\ No newline at end of file
+            return None
+
+    def get_db_pool(self, logger, name="default", **overrides):
+        """oracledb.create_pool 기반 커넥션 풀을 만들어 DBPool 로 감싸서 돌려주는 함수"""
+        config = dict(self.pool_config)
+        config.update(overrides)
+        try:
+            pool = oracledb.create_pool(
+                user=self.db_config['user'], password=self.db_config['password'], dsn=self.db_config['dsn'],
+                min=config['min'], max=config['max'], increment=config['increment'],
+                getmode=oracledb.POOL_GETMODE_TIMEDWAIT, wait_timeout=config['wait_timeout'],
+                stmtcachesize=config['stmtcachesize'])
+            logger.info(f"DB 커넥션 풀 생성 ({name}): min={config['min']}, max={config['max']}, "
+                        f"increment={config['increment']}, stmtcachesize={config['stmtcachesize']}")
+            query_stats.add_pool(config['max'])
+            return DBPool(pool, logger, name=name, ping_on_checkout=config['ping_on_checkout'])
+        except Exception as e:
+            logger.info(f"DB 커넥션 풀 생성 오류: {e}")
+            return None
+
+    def get_async_db_pool(self, logger, name="default", **overrides):
+        """oracledb.create_pool_async 기반 풀을 AsyncDBPool 로 감싸서 돌려주는 함수 (asyncio 코드용)"""
+        config = dict(self.pool_config)
+        config.update(overrides)
+        try:
+            pool = oracledb.create_pool_async(
+                user=self.db_config['user'], password=self.db_config['password'], dsn=self.db_config['dsn'],
+                min=config['min'], max=config['max'], increment=config['increment'],
+                getmode=oracledb.POOL_GETMODE_TIMEDWAIT, wait_timeout=config['wait_timeout'],
+                stmtcachesize=config['stmtcachesize'])
+            logger.info(f"DB async 커넥션 풀 생성 ({name}): min={config['min']}, max={config['max']}, "
+                        f"increment={config['increment']}, stmtcachesize={config['stmtcachesize']}")
+            query_stats.add_pool(config['max'])
+            return AsyncDBPool(pool, logger, name=name, ping_on_checkout=config['ping_on_checkout'])
+        except Exception as e:
+            logger.info(f"DB async 커넥션 풀 생성 오류: {e}")
+            return None
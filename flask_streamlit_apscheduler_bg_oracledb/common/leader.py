@@ -0,0 +1,129 @@
+import threading
+import time
+import oracledb
+from common import queries
+from common.taskclaim import default_owner
+
+# 리더가 이 시간 동안 heartbeat 를 못 하면 대기중인 인스턴스가 리더를 넘겨받아
+LEADER_LEASE_SEC = 15
+# heartbeat(리더 연장 / 대기 인스턴스의 리더 확인) 주기. 넘겨받는 데 최대 LEASE + HEARTBEAT 초 정도 걸려.
+LEADER_HEARTBEAT_SEC = 5
+
+
+class LeaderElector:
+    """SCH_LEADER 테이블의 lease 행 하나로 sch.py 인스턴스 중 리더 하나를 뽑는 elector
+
+    모든 인스턴스가 heartbeat_sec 마다 MERGE 를 한 번씩 해. 자기가 리더이거나 lease 가 끝난 행만
+    바뀌기 때문에 MERGE 가 행을 바꾼 인스턴스가 리더야. 시각은 전부 DB 의 SYSTIMESTAMP 라서
+    노드끼리 시계가 달라도 상관없어. 리더가 죽으면 lease_sec 안에 대기 인스턴스 중 하나가 넘겨받고,
+    넘겨받은 시각과 이전 리더의 마지막 heartbeat 차이를 failover 지연으로 남겨.
+    """
+
+    def __init__(self, dbpool, logger, name="sch", owner=None, lease_sec=LEADER_LEASE_SEC,
+                 heartbeat_sec=LEADER_HEARTBEAT_SEC):
+        self.dbpool = dbpool
+        self.logger = logger
+        self.name = name
+        self.owner = owner or default_owner()
+        self.lease_sec = lease_sec
+        self.heartbeat_sec = heartbeat_sec
+        self._leader = False
+        self._lease_deadline = 0.0        # 로컬 monotonic 기준, 이때까지 연장 못 하면 스스로 내려와
+        self._lock = threading.Lock()
+        self._stats = {"elections": 0, "heartbeats": 0, "heartbeat_errors": 0}
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.heartbeat()
+        self._thread = threading.Thread(target=self._run, name=f"{self.name}-leader", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stopped.wait(self.heartbeat_sec):
+            self.heartbeat()
+
+    def heartbeat(self):
+        """리더면 lease 를 연장하고, 리더가 없으면(lease 만료) 리더가 돼. 지금 리더인지 돌려줘."""
+        started = time.monotonic()
+        try:
+            with self.dbpool.acquire() as conn, conn.cursor() as cursor:
+                queries.execute(cursor, "leader.acquire", name=self.name, owner=self.owner,
+                                lease_sec=self.lease_sec)
+                acquired = cursor.rowcount == 1
+                conn.commit()
+        except oracledb.IntegrityError:
+            # 처음 행을 만들 때 다른 인스턴스와 동시에 INSERT 한 경우. 그쪽이 리더야.
+            acquired = False
+        except Exception as e:
+            with self._lock:
+                self._stats["heartbeat_errors"] += 1
+                still_leader = self._leader and time.monotonic() < self._lease_deadline
+            self.logger.error(f"[{self.owner}] leader heartbeat failed: {e}", exc_info=True)
+            self._set_leader(still_leader)
+            return still_leader
+
+        with self._lock:
+            self._stats["heartbeats"] += 1
+            if acquired:
+                self._lease_deadline = started + self.lease_sec
+        self._set_leader(acquired)
+        return acquired
+
+    def _set_leader(self, leader):
+        with self._lock:
+            changed = leader != self._leader
+            self._leader = leader
+            if changed and leader:
+                self._stats["elections"] += 1
+        if changed:
+            self.logger.info(f"[{self.owner}] {'became leader' if leader else 'lost leadership, now standby'} "
+                             f"({self.name})")
+
+    def is_leader(self):
+        with self._lock:
+            return self._leader and time.monotonic() < self._lease_deadline
+
+    def stop(self):
+        """heartbeat 를 멈추고, 리더였으면 lease 를 바로 끝내서 대기 인스턴스가 기다리지 않고 넘겨받게 해."""
+        self._stopped.set()
+        if self._thread:
+            self._thread.join(timeout=self.heartbeat_sec)
+        if not self.is_leader():
+            return
+        try:
+            with self.dbpool.acquire() as conn, conn.cursor() as cursor:
+                queries.execute(cursor, "leader.release", name=self.name, owner=self.owner)
+                conn.commit()
+            self.logger.info(f"[{self.owner}] released leadership ({self.name})")
+        except Exception as e:
+            self.logger.error(f"[{self.owner}] leader release failed: {e}", exc_info=True)
+        self._set_leader(False)
+
+    def get_stats(self):
+        with self._lock:
+            return dict(self._stats, owner=self.owner, leader=self._leader)
+
+
+def get_leader_status(cursor, name="sch"):
+    """SCH_LEADER 에서 현재 리더와 마지막 failover 정보를 읽어 (/health 용). 행이 없으면 None."""
+    queries.execute(cursor, "leader.status", name=name)
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    owner, acquired_at, heartbeat_at, lease_until, previous_owner, previous_heartbeat_at, alive = row
+    status = {
+        "status": "UP" if alive else "DOWN",
+        "leader": owner,
+        "acquired_at": acquired_at.strftime('%Y-%m-%d %H:%M:%S'),
+        "heartbeat_at": heartbeat_at.strftime('%Y-%m-%d %H:%M:%S'),
+        "lease_until": lease_until.strftime('%Y-%m-%d %H:%M:%S'),
+    }
+    if previous_owner is not None and previous_heartbeat_at is not None:
+        status["last_failover"] = {
+            "from": previous_owner,
+            "at": acquired_at.strftime('%Y-%m-%d %H:%M:%S'),
+            # 이전 리더의 마지막 heartbeat 부터 새 리더가 넘겨받기까지
+            "latency_sec": round((acquired_at - previous_heartbeat_at).total_seconds(), 3),
+        }
+    return status
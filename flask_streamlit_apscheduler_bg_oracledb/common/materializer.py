@@ -0,0 +1,218 @@
+from datetime import datetime, date, time, timedelta
+import oracledb
+from common.schedule import iter_schedule_times
+from common import queries
+
+# TASK 테이블에 미리 만들어 둘 기간 (일)
+MATERIALIZE_HORIZON_DAYS = 7
+# TASK 행을 executemany 로 넣을 때 한 번에 바인딩할 행 수
+TASK_INSERT_BATCH_SIZE = 1000
+
+
+def parse_int_list(value):
+    """'1,2,3' 같은 콤마 구분 문자열을 [1, 2, 3] 으로 바꿔줘. None 이면 None."""
+    if value is None:
+        return None
+    return [int(v) for v in str(value).split(',') if v.strip()]
+
+
+def parse_start_time(value):
+    """'HH:MI:SS' 또는 'HH:MI' 문자열을 time 으로. None 이면 TASKRESERVE 기본값 08:00:00."""
+    if value is None:
+        return time(8, 0, 0)
+    if isinstance(value, time):
+        return value
+    parts = [int(p) for p in str(value).split(':')]
+    return time(*parts)
+
+
+def to_date(value):
+    """date / datetime / 'YYYY-MM-DD' 문자열을 date 로"""
+    if value is None or (isinstance(value, date) and not isinstance(value, datetime)):
+        return value
+    if isinstance(value, datetime):
+        return value.date()
+    return datetime.strptime(str(value)[:10], '%Y-%m-%d').date()
+
+
+def build_schedule_args(reserve):
+    """TASKRESERVE 행(또는 POST 요청 본문) dict 를 iter_schedule_times 인자로 바꿔줘."""
+    reserve = {k.lower(): v for k, v in reserve.items()}
+    return {
+        'start_date': to_date(reserve['start_date']),
+        'end_date': to_date(reserve['end_date']),
+        'start_time': parse_start_time(reserve.get('start_time')),
+        'frequency': reserve.get('frequency') or 'daily',
+        'specific_months': parse_int_list(reserve.get('specific_months')),
+        'specific_weekdays': parse_int_list(reserve.get('specific_weekdays')),
+        'specific_days_of_month': parse_int_list(reserve.get('specific_days_of_month')),
+    }
+
+
+def validate_reserve(data):
+    """POST /tasks 요청 본문을 DB 에 쓰기 전에 검사해. 문제가 있으면 오류 메시지 목록, 없으면 빈 목록."""
+    missing = [k for k in ('taskname', 'start_date', 'end_date') if not data.get(k)]
+    if missing:
+        return [f"필수 정보가 없어: {', '.join(missing)}"]
+    errors = []
+    try:
+        args = build_schedule_args(data)
+    except (ValueError, TypeError) as e:
+        return [f"날짜/시간/목록 형식이 잘못됐어: {e}"]
+    if args['start_date'] > args['end_date']:
+        errors.append("start_date 가 end_date 보다 늦어.")
+    if args['frequency'] not in ('daily', 'weekly', 'monthly'):
+        errors.append(f"frequency 는 daily, weekly, monthly 중 하나여야 해: {args['frequency']}")
+    if args['frequency'] == 'weekly' and args['specific_weekdays'] is None:
+        errors.append("weekly 는 specific_weekdays 가 있어야 해.")
+    for key, low, high in (('specific_months', 1, 12), ('specific_weekdays', 0, 6),
+                           ('specific_days_of_month', 1, 31)):
+        if any(v < low or v > high for v in args[key] or []):
+            errors.append(f"{key} 값은 {low}~{high} 사이여야 해.")
+    return errors
+
+
+def schedule_times_between(reserve, after, until):
+    """예약 규칙으로 (after, until] 구간에 해당하는 시작 시각 목록을 만들어줘."""
+    args = build_schedule_args(reserve)
+    args['start_date'] = max(args['start_date'], after.date())
+    args['end_date'] = min(args['end_date'], until.date())
+    return [s for s in iter_schedule_times(**args) if after < s <= until]
+
+
+def executemany_chunked(cursor, name, rows, batch_size=TASK_INSERT_BATCH_SIZE):
+    """rows 를 batch_size 씩 나눠서 등록된 문장 name 으로 executemany. 처리한 행 수를 돌려줘."""
+    for i in range(0, len(rows), batch_size):
+        queries.executemany(cursor, name, rows[i:i + batch_size])
+    return len(rows)
+
+
+def insert_task_rows(cursor, taskreserveid, taskname, schedules, batch_size=TASK_INSERT_BATCH_SIZE):
+    """스케줄 시각 목록을 TASK 테이블에 array binding(executemany)으로 batch_size 씩 넣어. 커밋은 호출한 쪽에서!"""
+    rows = [{'taskreserveid': taskreserveid, 'taskname': taskname, 'subprocee_starttime': s} for s in schedules]
+    return executemany_chunked(cursor, "task.insert_occurrence", rows, batch_size)
+
+
+def diff_future_rows(existing, schedules):
+    """기존 미래 'R' 행 [(taskid, 시작 시각)] 과 새 스케줄 시각을 비교해서
+    (새로 넣을 시각 목록, 지울 taskid 목록, 그대로 둘 행 수) 를 돌려줘.
+    같은 시각에 'R' 행이 여러 개 있으면 하나만 남기고 나머지는 지워.
+    """
+    wanted = set(schedules)
+    removed = []
+    kept = set()
+    for taskid, start_time in existing:
+        if start_time in wanted and start_time not in kept:
+            kept.add(start_time)
+        else:
+            removed.append(taskid)
+    return sorted(wanted - kept), removed, len(kept)
+
+
+class RollingMaterializer:
+    """TASKRESERVE 별로 앞으로 horizon_days 일치 TASK 행만 만들어 두고, 시간이 지나면 조금씩 늘려가는 materializer
+
+    어디까지 만들었는지는 TASKRESERVE.MATERIALIZED_UNTIL 에 기록해. 그 시각 이전의 발생분은 이미
+    TASK 에 있다는 뜻이고, 다음 실행 때는 (MATERIALIZED_UNTIL, 지금 + horizon] 구간만 새로 넣어.
+    MATERIALIZED_UNTIL 이 NULL 인 예약(컬럼 추가 전에 등록돼서 전체 기간이 이미 TASK 에 있는 예약)은
+    그 예약의 마지막 TASK 시작 시각부터 이어서 만들어.
+    """
+
+    def __init__(self, dbpool, logger, horizon_days=MATERIALIZE_HORIZON_DAYS, batch_size=TASK_INSERT_BATCH_SIZE):
+        self.dbpool = dbpool
+        self.logger = logger
+        self.horizon_days = horizon_days
+        self.batch_size = batch_size
+
+    def horizon_end(self, now=None):
+        return (now or datetime.now()) + timedelta(days=self.horizon_days)
+
+    def materialize(self, cursor, taskreserveid, reserve, after, until):
+        """한 예약의 (after, until] 발생분을 TASK 에 넣고 MATERIALIZED_UNTIL 을 until 로 옮김. 커밋은 호출한 쪽에서!"""
+        schedules = schedule_times_between(reserve, after, until)
+        inserted = insert_task_rows(cursor, taskreserveid, reserve['taskname'], schedules, self.batch_size)
+        queries.execute(cursor, "reserve.set_materialized_until", materialized_until=until, taskreserveid=taskreserveid)
+        return inserted
+
+    @staticmethod
+    def materialized_until(cursor, taskreserveid, reserve):
+        """이 예약의 발생분이 어디까지 TASK 에 있는지. 기록이 없으면 TASK 의 마지막 시작 시각 (행이 없으면 None)."""
+        if reserve['materialized_until'] is not None:
+            return reserve['materialized_until']
+        queries.execute(cursor, "task.max_reserved_starttime", taskreserveid=taskreserveid)
+        return cursor.fetchone()[0]
+
+    def reschedule(self, cursor, taskreserveid, reserve, after, until):
+        """예약 규칙이 바뀌었을 때 (after, until] 구간의 'R' 발생분을 새 규칙에 맞게 고쳐. 커밋은 호출한 쪽에서!
+
+        이미 있는 미래 'R' 행과 새 스케줄을 시각 기준으로 비교해서 새로 생긴 시각만 INSERT, 없어진 시각만
+        DELETE 하고 그대로인 행은 건드리지 않아. 실행됐거나 지난 행(이력)은 대상이 아니야.
+        (insert 건수, delete 건수, 유지 건수) 를 돌려줘.
+        """
+        queries.execute(cursor, "task.future_reserved", taskreserveid=taskreserveid, after=after)
+        added, removed, kept = diff_future_rows(cursor.fetchall(), schedule_times_between(reserve, after, until))
+        executemany_chunked(cursor, "task.delete_reserved", [{'taskid': t} for t in removed], self.batch_size)
+        inserted = insert_task_rows(cursor, taskreserveid, reserve['taskname'], added, self.batch_size)
+        queries.execute(cursor, "reserve.set_materialized_until", materialized_until=until, taskreserveid=taskreserveid)
+        return inserted, len(removed), kept
+
+    def reschedule_many(self, cursor, items, after, until):
+        """reschedule 의 여러 예약 버전. 커밋은 호출한 쪽에서!
+
+        items 는 [(taskreserveid, taskname, 미리 펼친 (after, until] 시작 시각 목록)].
+        기존 'R' 행 조회, DELETE, INSERT, MATERIALIZED_UNTIL 갱신을 예약별로 하지 않고 전체를 모아서
+        각각 한 번씩(array DML) 해. items 순서대로 (insert, delete, 유지) 건수 목록을 돌려줘.
+        """
+        if not items:
+            return []
+        conn = cursor.connection
+        id_list = conn.gettype("SYS.ODCINUMBERLIST").newobject([taskreserveid for taskreserveid, _, _ in items])
+        queries.execute(cursor, "task.future_reserved_many", taskreserveids=id_list, after=after)
+        existing = {}
+        for taskreserveid, taskid, start_time in cursor.fetchall():
+            existing.setdefault(taskreserveid, []).append((taskid, start_time))
+
+        delete_rows, insert_rows, counts = [], [], []
+        for taskreserveid, taskname, schedules in items:
+            added, removed, kept = diff_future_rows(existing.get(taskreserveid, []), schedules)
+            delete_rows.extend({'taskid': t} for t in removed)
+            insert_rows.extend({'taskreserveid': taskreserveid, 'taskname': taskname, 'subprocee_starttime': s}
+                               for s in added)
+            counts.append((len(added), len(removed), kept))
+
+        executemany_chunked(cursor, "task.delete_reserved", delete_rows, self.batch_size)
+        executemany_chunked(cursor, "task.insert_occurrence", insert_rows, self.batch_size)
+        executemany_chunked(cursor, "reserve.set_materialized_until",
+                            [{'materialized_until': until, 'taskreserveid': taskreserveid}
+                             for taskreserveid, _, _ in items], self.batch_size)
+        return counts
+
+    def run(self, now=None):
+        """horizon 이 모자란 예약들을 찾아서 늘려줘. 새로 넣은 TASK 행 수를 돌려줘."""
+        now = now or datetime.now()
+        until = self.horizon_end(now)
+        total = 0
+        with self.dbpool.acquire() as conn, conn.cursor() as cursor:
+            queries.execute(cursor, "reserve.materialize_candidates", now=now, horizon_end=until)
+            candidates = [row[0] for row in cursor.fetchall()]
+            for taskreserveid in candidates:
+                try:
+                    # POST /tasks 나 다른 sch 인스턴스가 같은 예약을 만지고 있으면 이번엔 건너뜀
+                    queries.execute(cursor, "reserve.lock_for_materialize", taskreserveid=taskreserveid)
+                    columns = [d[0].lower() for d in cursor.description]
+                    row = cursor.fetchone()
+                    if row is None:
+                        conn.rollback()
+                        continue
+                    reserve = dict(zip(columns, row))
+                    after = max(self.materialized_until(cursor, taskreserveid, reserve) or now, now)
+                    # 예전 POST 가 horizon 보다 멀리까지 펼쳐 둔 예약은 그 시각까지 만든 걸로 기록만 해
+                    inserted = self.materialize(cursor, taskreserveid, reserve, after, max(after, until))
+                    conn.commit()
+                    total += inserted
+                    if inserted:
+                        self.logger.info(f"taskreserveid={taskreserveid} materialized {inserted} tasks up to {until}")
+                except oracledb.Error as e:
+                    conn.rollback()
+                    self.logger.error(f"taskreserveid={taskreserveid} materialize failed: {e}", exc_info=True)
+        return total
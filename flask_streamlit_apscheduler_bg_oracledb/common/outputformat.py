@@ -0,0 +1,156 @@
+import os
+import time
+
+from common.csvexport import export_cursor_to_csv, EXPORT_ARRAYSIZE
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    import pyarrow.ipc as ipc
+except ImportError:  # parquet / arrow 형식을 쓸 때만 필요해
+    pa = None
+
+# TASK.OUTPUT_FORMAT 이 비어 있으면 쓰는 형식
+DEFAULT_OUTPUT_FORMAT = "csv"
+
+# 형식 이름 -> (파일 확장자, writer 함수)
+OUTPUT_FORMATS = {}
+
+
+def register_format(name, suffix):
+    """writer(conn, query, params, path, batch_size, **options) -> stats dict 를 형식 이름으로 등록하는 데코레이터"""
+    def decorator(writer):
+        OUTPUT_FORMATS[name] = (suffix, writer)
+        return writer
+    return decorator
+
+
+def _require_pyarrow(name):
+    if pa is None:
+        raise ValueError(f"'{name}' output format requires the 'pyarrow' package")
+
+
+# oracledb DbType 이름 -> Arrow 타입. NUMBER 는 정밀도/스케일을 보고 _arrow_type 에서 정해.
+_ARROW_TYPES = {
+    "DB_TYPE_VARCHAR": "string", "DB_TYPE_NVARCHAR": "string", "DB_TYPE_CHAR": "string",
+    "DB_TYPE_NCHAR": "string", "DB_TYPE_LONG": "string", "DB_TYPE_ROWID": "string",
+    "DB_TYPE_BINARY_FLOAT": "float64", "DB_TYPE_BINARY_DOUBLE": "float64",
+    "DB_TYPE_CLOB": "string", "DB_TYPE_NCLOB": "string",
+    "DB_TYPE_DATE": "timestamp", "DB_TYPE_TIMESTAMP": "timestamp", "DB_TYPE_TIMESTAMP_TZ": "timestamp",
+    "DB_TYPE_TIMESTAMP_LTZ": "timestamp",
+    "DB_TYPE_RAW": "binary", "DB_TYPE_LONG_RAW": "binary", "DB_TYPE_BLOB": "binary", "DB_TYPE_BOOLEAN": "bool",
+}
+
+
+def _arrow_type(column):
+    """cursor.description 한 줄의 Arrow 타입. 모르는 타입이면 None (첫 배치에서 추론)."""
+    _, type_code, _, _, precision, scale, _ = column
+    name = getattr(type_code, "name", None)
+    if name in ("DB_TYPE_NUMBER", "DB_TYPE_BINARY_INTEGER"):
+        # NUMBER(p, 0) 은 드라이버가 int 로, 나머지(스케일이 있거나 정밀도 없는 NUMBER)는 배치마다
+        # int/float 가 섞여 나올 수 있어서 float64 로 고정해
+        if name == "DB_TYPE_BINARY_INTEGER" or (scale == 0 and 0 < (precision or 0) <= 18):
+            return pa.int64()
+        return pa.float64()
+    kind = _ARROW_TYPES.get(name)
+    if kind == "timestamp":
+        return pa.timestamp("us")
+    return getattr(pa, kind)() if kind else None
+
+
+def iter_arrow_batches(conn, query, params, batch_size=EXPORT_ARRAYSIZE):
+    """쿼리 결과를 batch_size 행씩 pyarrow.Table 로 꺼내줘.
+
+    oracledb 3.x 의 Connection.fetch_df_batches 가 있으면 드라이버가 만든 Arrow 배열을 그대로 쓰고,
+    없으면 cursor.fetchmany 로 받은 행을 열 단위로 묶어서 만들어. 이때 스키마는 cursor.description 으로
+    처음에 한 번 정해서(모르는 타입만 첫 배치에서 추론) 모든 배치에 똑같이 써. 첫 배치에서 전부 NULL 인 열이나
+    배치마다 int/float 가 바뀌는 NUMBER 열 때문에 writer 의 스키마와 어긋나지 않게.
+    """
+    if hasattr(conn, "fetch_df_batches"):
+        for odf in conn.fetch_df_batches(query, parameters=params, size=batch_size):
+            if odf.num_rows() == 0:
+                continue
+            yield pa.Table.from_arrays(odf.column_arrays(), names=odf.column_names())
+        return
+
+    with conn.cursor() as cursor:
+        cursor.arraysize = batch_size
+        cursor.execute(query, params)
+        names = [d[0] for d in cursor.description]
+        types = [_arrow_type(d) for d in cursor.description]
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            arrays = [pa.array(col, type=arrow_type) for col, arrow_type in zip(zip(*rows), types)]
+            # 추론한 타입은 첫 배치 것으로 고정해
+            types = [array.type for array in arrays]
+            yield pa.Table.from_arrays(arrays, names=names)
+
+
+def _stats(path, rows, started):
+    elapsed = time.perf_counter() - started
+    return {
+        "path": path,
+        "rows": rows,
+        "bytes": os.path.getsize(path),
+        "elapsed_sec": round(elapsed, 3),
+        "rows_per_sec": round(rows / elapsed, 1) if elapsed > 0 else 0.0,
+    }
+
+
+def _write_arrow_stream(batches, path, open_writer):
+    """첫 배치의 스키마로 writer 를 열고 배치를 차례로 씀. 결과가 없으면 빈 테이블을 남겨."""
+    rows = 0
+    writer = None
+    try:
+        for table in batches:
+            if writer is None:
+                writer = open_writer(path, table.schema)
+            writer.write_table(table)
+            rows += table.num_rows
+        if writer is None:
+            writer = open_writer(path, pa.schema([]))
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+@register_format("csv", ".csv")
+def write_csv(conn, query, params, path, batch_size=EXPORT_ARRAYSIZE, compression=None, **options):
+    with conn.cursor() as cursor:
+        cursor.arraysize = batch_size
+        cursor.prefetchrows = batch_size + 1
+        cursor.execute(query, params)
+        return export_cursor_to_csv(cursor, path, compression=compression, arraysize=batch_size)
+
+
+@register_format("parquet", ".parquet")
+def write_parquet(conn, query, params, path, batch_size=EXPORT_ARRAYSIZE, **options):
+    _require_pyarrow("parquet")
+    started = time.perf_counter()
+    rows = _write_arrow_stream(iter_arrow_batches(conn, query, params, batch_size), path,
+                               lambda p, schema: pq.ParquetWriter(p, schema, compression="zstd"))
+    return _stats(path, rows, started)
+
+
+@register_format("arrow", ".arrow")
+def write_arrow(conn, query, params, path, batch_size=EXPORT_ARRAYSIZE, **options):
+    _require_pyarrow("arrow")
+    started = time.perf_counter()
+    rows = _write_arrow_stream(iter_arrow_batches(conn, query, params, batch_size), path,
+                               lambda p, schema: ipc.new_file(p, schema))
+    return _stats(path, rows, started)
+
+
+def write_output(output_format, conn, query, params, path_without_suffix, batch_size=EXPORT_ARRAYSIZE, **options):
+    """output_format 에 등록된 writer 로 쿼리 결과를 path_without_suffix + 확장자 파일에 써줘.
+
+    options 는 writer 별 옵션이야 (csv 의 compression 등). 모르는 옵션은 writer 가 무시해.
+    """
+    output_format = (output_format or DEFAULT_OUTPUT_FORMAT).lower()
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"unknown output format: {output_format} (available: {', '.join(OUTPUT_FORMATS)})")
+    suffix, writer = OUTPUT_FORMATS[output_format]
+    return writer(conn, query, params, path_without_suffix + suffix, batch_size, **options)
@@ -0,0 +1,122 @@
+import logging
+import logging.handlers
+import os
+import subprocess
+import threading
+import time
+
+# 태스크별 app.py 출력 로그 위치와 회전 설정
+TASK_LOG_DIR = os.path.join("logs", "tasks")
+TASK_LOG_MAX_BYTES = 10 * 1024 * 1024
+TASK_LOG_BACKUP_COUNT = 3
+
+
+def open_task_log(taskid, log_dir=TASK_LOG_DIR, max_bytes=TASK_LOG_MAX_BYTES, backup_count=TASK_LOG_BACKUP_COUNT):
+    """log_dir/task_<taskid>.log 에 쓰는 회전 핸들러를 열어줘. sch_async.py 도 같은 파일에 출력을 남겨."""
+    os.makedirs(log_dir, exist_ok=True)
+    handler = logging.handlers.RotatingFileHandler(
+        os.path.join(log_dir, f"task_{taskid}.log"), maxBytes=max_bytes, backupCount=backup_count,
+        encoding="utf-8")
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    return handler
+
+
+def write_task_log(handler, raw):
+    """자식이 출력한 한 줄(bytes)을 태스크 로그에 써."""
+    handler.handle(logging.makeLogRecord({'msg': raw.decode('utf-8', 'replace').rstrip('\r\n')}))
+
+
+class ProcessSupervisor:
+    """app.py 자식 프로세스를 띄우고 끝날 때까지 책임지는 supervisor
+
+    자식의 stdout/stderr 를 파이프 하나로 받아서 자식마다 붙는 스레드가 계속 읽어 태스크별 로그 파일
+    (log_dir/task_<taskid>.log, max_bytes 마다 회전)에 써. 그래서 파이프 버퍼가 차서 자식이 멈추지 않아.
+    출력이 끝나면 같은 스레드가 os.wait4 로 그 자식을 reap 해서 좀비가 남지 않고, 종료 코드, 경과 시간,
+    CPU 시간(user+sys), 최대 RSS 를 on_exit(taskid, usage) 로 넘겨줘.
+    runner pool 워커처럼 다른 곳에서 띄운 자식은 건드리지 않도록 waitpid(-1) 이 아니라 pid 별로 기다려.
+    """
+
+    def __init__(self, logger, on_exit=None, log_dir=TASK_LOG_DIR, max_bytes=TASK_LOG_MAX_BYTES,
+                 backup_count=TASK_LOG_BACKUP_COUNT):
+        self.logger = logger
+        self.on_exit = on_exit
+        self.log_dir = log_dir
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        os.makedirs(log_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._threads = {}          # pid -> supervise 스레드
+        self._stats = {'spawned': 0, 'exited': 0, 'signaled': 0, 'nonzero': 0}
+
+    def spawn(self, taskid, argv, cwd=None):
+        """argv 를 새 세션으로 띄우고 출력 수집과 reap 을 시작해. Popen 객체를 돌려줘."""
+        started = time.monotonic()
+        proc = subprocess.Popen(argv, cwd=cwd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                                stderr=subprocess.STDOUT, start_new_session=True)
+        thread = threading.Thread(target=self._supervise, args=(taskid, proc, started),
+                                  name=f"supervise-{taskid}", daemon=True)
+        with self._lock:
+            self._stats['spawned'] += 1
+            self._threads[proc.pid] = thread
+        thread.start()
+        return proc
+
+    def _supervise(self, taskid, proc, started):
+        handler = open_task_log(taskid, self.log_dir, self.max_bytes, self.backup_count)
+        try:
+            for raw in iter(proc.stdout.readline, b''):
+                write_task_log(handler, raw)
+        except Exception as e:
+            self.logger.error(f"taskid={taskid}: output drain failed: {e}", exc_info=True)
+        finally:
+            proc.stdout.close()
+            handler.close()
+
+        usage = self._reap(proc, started)
+        with self._lock:
+            self._threads.pop(proc.pid, None)
+            self._stats['exited'] += 1
+            if usage['exit_code'] < 0:
+                self._stats['signaled'] += 1
+            elif usage['exit_code'] > 0:
+                self._stats['nonzero'] += 1
+        self.logger.info(f"taskid={taskid}: app.py pid={proc.pid} exited {usage}")
+        if self.on_exit:
+            try:
+                self.on_exit(taskid, usage)
+            except Exception as e:
+                self.logger.error(f"taskid={taskid}: on_exit failed: {e}", exc_info=True)
+
+    @staticmethod
+    def _reap(proc, started):
+        """자식 하나를 wait4 로 거두고 리소스 사용량을 돌려줘. 종료 코드가 음수면 그 시그널로 죽은 거야."""
+        try:
+            _, status, rusage = os.wait4(proc.pid, 0)
+        except ChildProcessError:
+            # 이미 누가 거둬간 경우: 종료 코드만 남아 있어
+            proc.wait()
+            return {'exit_code': proc.returncode, 'wall_sec': round(time.monotonic() - started, 3),
+                    'cpu_sec': None, 'max_rss_kb': None}
+        # Popen 이 나중에 다시 waitpid 하지 않도록 결과를 넣어 둬
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        return {
+            'exit_code': proc.returncode,
+            'wall_sec': round(time.monotonic() - started, 3),
+            'cpu_sec': round(rusage.ru_utime + rusage.ru_stime, 3),
+            'max_rss_kb': rusage.ru_maxrss,   # Linux 는 KB 단위
+        }
+
+    def get_stats(self):
+        with self._lock:
+            return dict(self._stats, running=len(self._threads))
+
+    def shutdown(self, timeout=None):
+        """실행중인 자식이 끝나서 기록될 때까지 최대 timeout 초 기다려. 남은 자식 수를 돌려줘."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            threads = list(self._threads.values())
+        for thread in threads:
+            thread.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+        remaining = self.get_stats()['running']
+        self.logger.info(f"ProcessSupervisor shut down ({remaining} children still running): {self.get_stats()}")
+        return remaining
@@ -0,0 +1,386 @@
+import threading
+from collections import OrderedDict
+
+import oracledb
+
+# 커넥션별 statement cache 크기 (DBHandler.pool_config['stmtcachesize'] 기본값). 아래 등록된 문장 수보다 넉넉하게.
+STMT_CACHE_SIZE = 40
+
+
+class Query:
+    """고정된 SQL 문장 하나. 문장 텍스트가 항상 같아야 Oracle 과 드라이버의 statement cache 를 그대로 다시 써."""
+
+    __slots__ = ("name", "sql", "inputsizes")
+
+    def __init__(self, name, sql, inputsizes=None):
+        self.name = name
+        self.sql = sql
+        # None 이 들어올 수 있는 바인드 변수는 타입을 고정해 둬야 실행마다 child cursor 가 새로 생기지 않아
+        self.inputsizes = inputsizes or {}
+
+
+QUERIES = {}
+
+
+def register(name, sql, **inputsizes):
+    QUERIES[name] = Query(name, " ".join(sql.split()), inputsizes)
+    return QUERIES[name]
+
+
+# --- TASK: sch.py ---
+register("task.fetch_due", """
+    SELECT taskid, taskname, subprocee_starttime, task_status FROM TESTCHO.TASK
+    WHERE task_status = 'R' AND subprocee_starttime >= :window_start AND subprocee_starttime < :window_end""")
+
+register("task.fetch_changed", """
+    SELECT taskid, taskname, subprocee_starttime, task_status FROM TESTCHO.TASK
+    WHERE lastchanged_at >= :since AND subprocee_starttime >= :window_start AND subprocee_starttime < :window_end""")
+
+register("task.update_status", """
+    UPDATE TESTCHO.TASK SET task_status = :status, lastchanged_at = CURRENT_TIMESTAMP WHERE taskid = :taskid""")
+
+# 여러 sch 인스턴스용 claim (common/taskclaim.py). SKIP LOCKED 라 다른 인스턴스가 잠근 행은 기다리지 않고 건너뜀.
+register("task.claim_due", """
+    SELECT taskid, taskname, subprocee_starttime FROM TESTCHO.TASK
+    WHERE task_status = 'R' AND subprocee_starttime >= :window_start AND subprocee_starttime <= :now
+    ORDER BY subprocee_starttime
+    FOR UPDATE SKIP LOCKED""")
+
+# lease 시각은 sch 인스턴스마다 다를 수 있는 로컬 시계 대신 DB 시계로 쓰고 비교해 (SCH_LEADER 와 같은 이유).
+# TASK.lease_until 은 TIMESTAMP 라서 세션 타임존에 흔들리지 않게 CAST(SYSTIMESTAMP AS TIMESTAMP) 로 맞춰.
+register("task.claim_expired", """
+    SELECT taskid, taskname, subprocee_starttime FROM TESTCHO.TASK
+    WHERE task_status = 'I' AND lease_until < CAST(SYSTIMESTAMP AS TIMESTAMP)
+    ORDER BY subprocee_starttime
+    FOR UPDATE SKIP LOCKED""")
+
+register("task.set_claim", """
+    UPDATE TESTCHO.TASK SET task_status = 'I', owner = :owner,
+        lease_until = CAST(SYSTIMESTAMP AS TIMESTAMP) + NUMTODSINTERVAL(:lease_sec, 'SECOND'),
+        lastchanged_at = CURRENT_TIMESTAMP
+    WHERE taskid = :taskid""")
+
+register("task.renew_leases", """
+    UPDATE TESTCHO.TASK SET lease_until = CAST(SYSTIMESTAMP AS TIMESTAMP) + NUMTODSINTERVAL(:lease_sec, 'SECOND')
+    WHERE taskid = :taskid AND owner = :owner AND task_status = 'I'""")
+
+# app.py 실행이 끝나면 종료 코드와 리소스 사용량을 남겨 (common/procsupervisor.py, runner pool)
+register("task.record_exit", """
+    UPDATE TESTCHO.TASK SET exit_code = :exit_code, wall_sec = :wall_sec, cpu_sec = :cpu_sec, max_rss_kb = :max_rss_kb
+    WHERE taskid = :taskid""",
+    exit_code=oracledb.DB_TYPE_NUMBER, wall_sec=oracledb.DB_TYPE_NUMBER, cpu_sec=oracledb.DB_TYPE_NUMBER,
+    max_rss_kb=oracledb.DB_TYPE_NUMBER)
+
+# app.py 가 상태를 남기지 못하고 0 이 아닌 코드로 끝났을 때. 이미 최종 상태를 쓴 행은 건드리지 않아.
+register("task.fail_unfinished", """
+    UPDATE TESTCHO.TASK SET task_status = 'F', lastchanged_at = CURRENT_TIMESTAMP
+    WHERE taskid = :taskid AND task_status = 'I'""")
+
+register("task.insert_occurrence", """
+    INSERT INTO TESTCHO.TASK (taskreserveid, taskname, subprocee_starttime, task_status, created_at, lastchanged_at)
+    VALUES (:taskreserveid, :taskname, :subprocee_starttime, 'R', CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)""",
+    taskreserveid=oracledb.DB_TYPE_NUMBER, taskname=oracledb.DB_TYPE_VARCHAR,
+    subprocee_starttime=oracledb.DB_TYPE_TIMESTAMP)
+
+# 예약이 바뀌면 아직 실행 전('R')인 미래 발생분만 새 규칙과 비교해서 바뀐 것만 넣고 지워. 지난 이력은 그대로 둬.
+register("task.future_reserved", """
+    SELECT taskid, subprocee_starttime FROM TESTCHO.TASK
+    WHERE taskreserveid = :taskreserveid AND task_status = 'R' AND subprocee_starttime > :after""")
+
+# POST /tasks/batch: 여러 예약의 미래 'R' 행을 한 번에. :taskreserveids 는 SYS.ODCINUMBERLIST 객체로 바인딩해.
+register("task.future_reserved_many", """
+    SELECT taskreserveid, taskid, subprocee_starttime FROM TESTCHO.TASK
+    WHERE taskreserveid IN (SELECT column_value FROM TABLE(:taskreserveids))
+      AND task_status = 'R' AND subprocee_starttime > :after""")
+
+# MATERIALIZED_UNTIL 컬럼이 생기기 전에 등록된 예약은 전체 기간을 이미 펼쳐 놨어. 어디까지 있는지는 이걸로 봐.
+register("task.max_reserved_starttime", """
+    SELECT MAX(subprocee_starttime) FROM TESTCHO.TASK WHERE taskreserveid = :taskreserveid""")
+
+register("task.delete_reserved", """
+    DELETE FROM TESTCHO.TASK WHERE taskid = :taskid AND task_status = 'R'""")
+
+# --- TASK: app.py ---
+register("task.export_rows", """
+    SELECT * FROM TESTCHO.TASK WHERE taskid = :taskid""")
+
+register("task.output_format", """
+    SELECT output_format FROM TESTCHO.TASK WHERE taskid = :taskid""")
+
+register("task.update_export_stats", """
+    UPDATE TESTCHO.TASK SET output_rows = :output_rows, output_bytes = :output_bytes,
+    output_rows_per_sec = :output_rows_per_sec WHERE taskid = :taskid""")
+
+# --- TASK / TASKRESERVE: main.py GET /tasks ---
+# 조건이 없으면 NULL 을 바인딩해서 필터를 끄는 방식이라 조건 조합이 달라도 문장 텍스트는 하나야.
+_LIST_INPUTSIZES = dict(key_id=oracledb.DB_TYPE_NUMBER, taskname=oracledb.DB_TYPE_VARCHAR,
+                        starttime=oracledb.DB_TYPE_TIMESTAMP, endtime=oracledb.DB_TYPE_TIMESTAMP,
+                        after_id=oracledb.DB_TYPE_NUMBER)
+
+_TASK_LIST_SQL = """
+    SELECT TASKID, TASKRESERVEID, TASKNAME, SUBPROCEE_STARTTIME, TASK_STATUS FROM TESTCHO.TASK
+    WHERE (:key_id IS NULL OR taskid = :key_id)
+      AND (:taskname IS NULL OR taskname = :taskname)
+      AND (:starttime IS NULL OR subprocee_starttime >= :starttime)
+      AND (:endtime IS NULL OR subprocee_starttime <= :endtime)
+      AND (:after_id IS NULL OR taskid > :after_id)
+    ORDER BY taskid"""
+
+_RESERVE_LIST_SQL = """
+    SELECT taskreserveid, taskname, start_date, end_date, start_time, frequency, specific_months,
+           specific_weekdays, specific_days_of_month, use_yn, register, lastchanger, created_at, lastchanged_at
+    FROM TESTCHO.TASKRESERVE
+    WHERE (:key_id IS NULL OR taskreserveid = :key_id)
+      AND (:taskname IS NULL OR taskname = :taskname)
+      AND (:starttime IS NULL OR lastchanged_at >= :starttime)
+      AND (:endtime IS NULL OR lastchanged_at <= :endtime)
+      AND (:after_id IS NULL OR taskreserveid > :after_id)
+    ORDER BY taskreserveid"""
+
+register("task.list_page", _TASK_LIST_SQL + " FETCH FIRST :page_size ROWS ONLY", **_LIST_INPUTSIZES)
+register("task.list_stream", _TASK_LIST_SQL, **_LIST_INPUTSIZES)
+register("reserve.list_page", _RESERVE_LIST_SQL + " FETCH FIRST :page_size ROWS ONLY", **_LIST_INPUTSIZES)
+register("reserve.list_stream", _RESERVE_LIST_SQL, **_LIST_INPUTSIZES)
+
+# --- TASKRESERVE: main.py POST /tasks ---
+# 있으면 UPDATE, 없으면 INSERT 를 한 문장으로 하고 TASKRESERVEID 를 바로 돌려받아 (Oracle 23ai MERGE ... RETURNING)
+register("reserve.upsert", """
+    MERGE INTO TESTCHO.TASKRESERVE r
+    USING (SELECT :taskname AS taskname FROM dual) s
+    ON (r.taskname = s.taskname)
+    WHEN MATCHED THEN UPDATE SET
+        r.start_date = :start_date, r.end_date = :end_date, r.start_time = :start_time, r.frequency = :frequency,
+        r.specific_months = :specific_months, r.specific_weekdays = :specific_weekdays,
+        r.specific_days_of_month = :specific_days_of_month, r.use_yn = 'C', r.lastchanger = :lastchanger,
+        r.lastchanged_at = CURRENT_TIMESTAMP
+    WHEN NOT MATCHED THEN INSERT (taskname, start_date, end_date, start_time, frequency, specific_months,
+        specific_weekdays, specific_days_of_month, use_yn, register, lastchanger, created_at, lastchanged_at)
+    VALUES (s.taskname, :start_date, :end_date, :start_time, :frequency, :specific_months, :specific_weekdays,
+        :specific_days_of_month, 'C', :register, NVL(:lastchanger, :register), CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
+    RETURNING taskreserveid INTO :taskreserveid""",
+    start_date=oracledb.DB_TYPE_DATE, end_date=oracledb.DB_TYPE_DATE, start_time=oracledb.DB_TYPE_VARCHAR,
+    frequency=oracledb.DB_TYPE_VARCHAR, specific_months=oracledb.DB_TYPE_VARCHAR,
+    specific_weekdays=oracledb.DB_TYPE_VARCHAR, specific_days_of_month=oracledb.DB_TYPE_VARCHAR,
+    register=oracledb.DB_TYPE_VARCHAR, lastchanger=oracledb.DB_TYPE_VARCHAR)
+
+# --- TASKRESERVE: RollingMaterializer ---
+register("reserve.materialize_candidates", """
+    SELECT taskreserveid FROM TESTCHO.TASKRESERVE
+    WHERE use_yn <> 'N'
+      AND (end_date IS NULL OR end_date >= TRUNC(:now))
+      AND (materialized_until IS NULL OR materialized_until < :horizon_end)
+      AND (end_date IS NULL OR materialized_until IS NULL OR materialized_until < end_date + 1)""")
+
+register("reserve.lock_for_materialize", """
+    SELECT taskreserveid, taskname, start_date, end_date, start_time, frequency,
+           specific_months, specific_weekdays, specific_days_of_month, materialized_until
+    FROM TESTCHO.TASKRESERVE WHERE taskreserveid = :taskreserveid FOR UPDATE SKIP LOCKED""")
+
+register("reserve.set_materialized_until", """
+    UPDATE TESTCHO.TASKRESERVE SET materialized_until = :materialized_until WHERE taskreserveid = :taskreserveid""")
+
+# --- SCH_LEADER: sch.py 리더 선출 (common/leader.py) ---
+# 자기가 리더이거나 lease 가 끝났을 때만 행이 바뀌어 (rowcount 1 = 리더). SET 오른쪽의 l.* 는 바뀌기 전 값이야.
+register("leader.acquire", """
+    MERGE INTO TESTCHO.SCH_LEADER l
+    USING (SELECT :name AS name FROM dual) s
+    ON (l.name = s.name)
+    WHEN MATCHED THEN UPDATE SET
+        l.previous_owner = CASE WHEN l.owner = :owner THEN l.previous_owner ELSE l.owner END,
+        l.previous_heartbeat_at = CASE WHEN l.owner = :owner THEN l.previous_heartbeat_at ELSE l.heartbeat_at END,
+        l.acquired_at = CASE WHEN l.owner = :owner THEN l.acquired_at ELSE SYSTIMESTAMP END,
+        l.owner = :owner, l.heartbeat_at = SYSTIMESTAMP,
+        l.lease_until = SYSTIMESTAMP + NUMTODSINTERVAL(:lease_sec, 'SECOND')
+        WHERE l.owner = :owner OR l.lease_until < SYSTIMESTAMP
+    WHEN NOT MATCHED THEN INSERT (name, owner, acquired_at, heartbeat_at, lease_until)
+    VALUES (s.name, :owner, SYSTIMESTAMP, SYSTIMESTAMP, SYSTIMESTAMP + NUMTODSINTERVAL(:lease_sec, 'SECOND'))""")
+
+register("leader.release", """
+    UPDATE TESTCHO.SCH_LEADER SET lease_until = SYSTIMESTAMP WHERE name = :name AND owner = :owner""")
+
+register("leader.status", """
+    SELECT owner, acquired_at, heartbeat_at, lease_until, previous_owner, previous_heartbeat_at,
+        CASE WHEN lease_until > SYSTIMESTAMP THEN 1 ELSE 0 END AS alive
+    FROM TESTCHO.SCH_LEADER WHERE name = :name""")
+
+# --- TASK 변경 로그 (common/changefeed.py, main.py /events/tasks) ---
+register("changelog.max_seq", """
+    SELECT NVL(MAX(seq), 0) FROM TESTCHO.TASK_CHANGELOG""")
+
+register("changelog.tail", """
+    SELECT seq, taskid, op, old_status, new_status, subprocee_starttime, changed_at FROM TESTCHO.TASK_CHANGELOG
+    WHERE seq > :after_seq ORDER BY seq FETCH FIRST :limit ROWS ONLY""")
+
+register("changelog.purge", """
+    DELETE FROM TESTCHO.TASK_CHANGELOG WHERE changed_at < SYSTIMESTAMP - NUMTODSINTERVAL(:hours, 'HOUR')""")
+
+# --- 대시보드 (dash_app.py, dash_app1.py) ---
+# 시간대별 상태 건수는 TASK 를 GROUP BY 하지 않고 TASK 트리거(trg_task_status_hourly)가 유지하는
+# TASK_STATUS_HOURLY(시간 버킷 x 상태 -> 건수)를 읽어. 버킷 수만큼만 읽으니 TASK 크기와 상관없어.
+# 범위는 시간 버킷 단위라서 시작 시각이 속한 시간대 전체가 들어가.
+register("dash.hourly_status", """
+    SELECT TO_CHAR(bucket_hour, 'YYYY-MM-DD HH24') AS hourly, task_status, cnt AS cnt_status
+    FROM TESTCHO.TASK_STATUS_HOURLY
+    WHERE bucket_hour BETWEEN TRUNC(SYSDATE - INTERVAL '12' HOUR, 'HH24') AND (SYSDATE + INTERVAL '12' HOUR)
+      AND cnt > 0""")
+
+register("dash.hourly_total", """
+    SELECT TO_CHAR(bucket_hour, 'YYYY-MM-DD HH24') AS hourly, SUM(cnt) AS total_cnt
+    FROM TESTCHO.TASK_STATUS_HOURLY
+    WHERE bucket_hour BETWEEN TRUNC(SYSDATE - INTERVAL '12' HOUR, 'HH24') AND (SYSDATE + INTERVAL '12' HOUR)
+    GROUP BY bucket_hour
+    HAVING SUM(cnt) > 0""")
+
+# 스케줄 목록은 전체를 매번 읽지 않고 새 행(taskid > 마지막 taskid)과 바뀐 행(lastchanged_at >= since)만 읽어
+# (common/dashsnapshot.py 의 IncrementalScheduleList). since 가 NULL 이면 taskid 조건만 남아.
+register("dash.schedule_changed", """
+    SELECT taskid, subprocee_starttime, taskname, task_status, lastchanged_at FROM TESTCHO.TASK
+    WHERE taskid > :after_taskid OR lastchanged_at >= :since""",
+    after_taskid=oracledb.DB_TYPE_NUMBER, since=oracledb.DB_TYPE_TIMESTAMP)
+
+# 삭제된 행은 delta 로 안 보여서 trg_task_changelog 가 남긴 'D' 행으로 찾아. since 가 NULL 이면(첫 조회)
+# 최근 overlap_sec 만 봐. changed_at 도 커밋보다 앞선 시각이라 schedule_changed 처럼 겹쳐 읽어.
+register("dash.schedule_deleted", """
+    SELECT taskid, changed_at FROM TESTCHO.TASK_CHANGELOG
+    WHERE op = 'D'
+      AND changed_at >= NVL(:since, CAST(SYSTIMESTAMP AS TIMESTAMP) - NUMTODSINTERVAL(:overlap_sec, 'SECOND'))""",
+    since=oracledb.DB_TYPE_TIMESTAMP)
+
+# 상태 필터는 ',R,S,' 처럼 콤마로 감싼 문자열 하나로 바인딩 (NULL 이면 전체). IN 목록 길이에 따라 문장이 바뀌지 않아.
+register("dash.hourly_status_range", """
+    SELECT TO_CHAR(bucket_hour, 'YYYY-MM-DD HH24') AS hourly, task_status, cnt AS cnt_status
+    FROM TESTCHO.TASK_STATUS_HOURLY
+    WHERE bucket_hour BETWEEN TRUNC(CAST(:start_dt AS DATE), 'HH24') AND :end_dt
+      AND cnt > 0
+      AND (:statuses IS NULL OR INSTR(:statuses, ',' || task_status || ',') > 0)
+    ORDER BY bucket_hour""",
+    statuses=oracledb.DB_TYPE_VARCHAR)
+
+register("dash.schedule_range", """
+    SELECT subprocee_starttime, taskname, task_status FROM TESTCHO.TASK
+    WHERE subprocee_starttime BETWEEN :start_dt AND :end_dt
+      AND (:statuses IS NULL OR INSTR(:statuses, ',' || task_status || ',') > 0)
+    ORDER BY subprocee_starttime""",
+    statuses=oracledb.DB_TYPE_VARCHAR)
+
+
+def status_filter(statuses):
+    """['R', 'S'] -> ',R,S,' (dash.*_range 의 :statuses 바인딩 값). 비어 있으면 None = 전체."""
+    return "," + ",".join(statuses) + "," if statuses else None
+
+
+def sql(name):
+    return QUERIES[name].sql
+
+
+class QueryStats:
+    """클라이언트에서 본 문장별 실행/파싱 횟수
+
+    드라이버는 커넥션마다 최근 stmtcachesize 개 문장을 LRU 로 들고 있어서, 캐시에 있는 문장은 서버에
+    파싱 요청을 보내지 않고 바로 실행해. 여기서는 그 캐시를 똑같이 흉내 내서
+    - cache_hits  : 커넥션 statement cache 에서 바로 실행 (파싱 없음)
+    - soft_parses : 캐시에 없어서 파싱 요청을 보냈지만 이 프로세스가 이미 쓴 적 있는 문장 (shared pool 에 있음)
+    - hard_parses : 이 프로세스에서 처음 보내는 문장 텍스트 (shared pool 에 없으면 서버가 hard parse)
+    를 세. 실제 서버 통계는 V$SQL 의 PARSE_CALLS / LOADS 로 확인할 수 있어.
+    풀이 세션을 바꿔가며 열어도 흉내 낸 캐시가 계속 늘지 않게, 세션 캐시도 이 프로세스 풀들의 max 합만큼만
+    LRU 로 들고 있어 (DBHandler 가 풀을 만들 때 add_pool 로 알려줘).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._caches = OrderedDict()   # 커넥션(세션) -> OrderedDict(문장 이름), 최근에 쓴 세션이 뒤
+        self._max_sessions = 0
+        self._seen = set()
+        self._stats = {}
+
+    def add_pool(self, max_sessions):
+        """풀 하나가 열 수 있는 세션 수만큼 세션 캐시 자리를 늘려."""
+        with self._lock:
+            self._max_sessions += max_sessions
+
+    @staticmethod
+    def _session_key(conn):
+        session_id = getattr(conn, "session_id", None)
+        if session_id is None:
+            return id(conn)
+        return (session_id, getattr(conn, "serial_num", None))
+
+    def record(self, conn, name, cache_size=STMT_CACHE_SIZE):
+        with self._lock:
+            stats = self._stats.setdefault(name, {"executions": 0, "cache_hits": 0, "soft_parses": 0,
+                                                  "hard_parses": 0})
+            stats["executions"] += 1
+            key = self._session_key(conn)
+            cache = self._caches.get(key)
+            if cache is None:
+                cache = self._caches[key] = OrderedDict()
+                # 풀이 닫은 세션의 캐시는 더 안 쓰니까 가장 오래 안 쓴 것부터 버려
+                while len(self._caches) > max(1, self._max_sessions):
+                    self._caches.popitem(last=False)
+            else:
+                self._caches.move_to_end(key)
+            if name in cache:
+                cache.move_to_end(name)
+                stats["cache_hits"] += 1
+                return
+            if name in self._seen:
+                stats["soft_parses"] += 1
+            else:
+                self._seen.add(name)
+                stats["hard_parses"] += 1
+            cache[name] = True
+            while len(cache) > cache_size:
+                cache.popitem(last=False)
+
+    def get_stats(self):
+        with self._lock:
+            return {name: dict(stats) for name, stats in self._stats.items()}
+
+
+query_stats = QueryStats()
+
+
+def _prepare(cursor, name, outvars=None):
+    query = QUERIES[name]
+    conn = cursor.connection
+    query_stats.record(conn, name, getattr(conn, "stmtcachesize", STMT_CACHE_SIZE))
+    inputsizes = {**query.inputsizes, **outvars} if outvars else query.inputsizes
+    if inputsizes:
+        cursor.setinputsizes(**inputsizes)
+    return query.sql
+
+
+def execute(cursor, name, params=None, **kwargs):
+    """등록된 문장 name 을 실행. 파라미터는 cursor.execute 와 같아 (dict 또는 키워드)."""
+    sql_text = _prepare(cursor, name)
+    if params is None:
+        return cursor.execute(sql_text, **kwargs)
+    return cursor.execute(sql_text, params)
+
+
+def executemany(cursor, name, rows, outvars=None, **kwargs):
+    """등록된 문장 name 을 array binding 으로 실행
+
+    outvars 는 RETURNING INTO 로 받을 변수 (이름 -> cursor.var(..., arraysize=len(rows))),
+    kwargs 는 cursor.executemany 로 그대로 넘겨 (batcherrors=True 등).
+    """
+    sql_text = _prepare(cursor, name, outvars)
+    return cursor.executemany(sql_text, rows, **kwargs)
+
+
+async def execute_async(cursor, name, params=None, **kwargs):
+    """execute 의 asyncio 버전 (oracledb AsyncCursor 용, sch_async.py)"""
+    sql_text = _prepare(cursor, name)
+    if params is None:
+        return await cursor.execute(sql_text, **kwargs)
+    return await cursor.execute(sql_text, params)
+
+
+async def executemany_async(cursor, name, rows, outvars=None, **kwargs):
+    """executemany 의 asyncio 버전"""
+    sql_text = _prepare(cursor, name, outvars)
+    return await cursor.executemany(sql_text, rows, **kwargs)
+
+
+def get_query_stats():
+    return query_stats.get_stats()
@@ -0,0 +1,354 @@
+import logging
+import logging.handlers
+import os
+import queue
+import subprocess
+import threading
+import time
+from common.procsupervisor import TASK_LOG_DIR, TASK_LOG_MAX_BYTES, TASK_LOG_BACKUP_COUNT
+
+_STOP = object()
+_TIMEOUT = object()
+_PREFIX = "@@RUNNER "
+# 워커를 띄우다 실패하면 이만큼 쉬고 다시 띄워
+SPAWN_RETRY_SEC = 5
+
+
+class _WorkerLog:
+    """워커의 stderr 와 프로토콜이 아닌 stdout 줄을 지금 처리중인 태스크의 로그(log_dir/task_<taskid>.log)에 써.
+    태스크를 처리하고 있지 않을 때 나온 줄은 log_dir/runner-<slot>.log 로 가."""
+
+    def __init__(self, slot, log_dir, max_bytes, backup_count):
+        self.slot = slot
+        self.log_dir = log_dir
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.taskid = None
+        self._lock = threading.Lock()
+        self._handler = None
+        self._file_name = None
+
+    def write(self, line):
+        with self._lock:
+            file_name = f"task_{self.taskid}.log" if self.taskid is not None else f"runner-{self.slot}.log"
+            if file_name != self._file_name:
+                self._close()
+                self._handler = logging.handlers.RotatingFileHandler(
+                    os.path.join(self.log_dir, file_name), maxBytes=self.max_bytes,
+                    backupCount=self.backup_count, encoding="utf-8")
+                self._handler.setFormatter(logging.Formatter('%(message)s'))
+                self._file_name = file_name
+            self._handler.handle(logging.makeLogRecord({'msg': line}))
+
+    def _close(self):
+        if self._handler:
+            self._handler.close()
+        self._handler, self._file_name = None, None
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+
+class _Worker:
+    """워커 프로세스 하나와 그 stdout/stderr 를 읽는 스레드 두 개. 프로토콜 줄('@@RUNNER ...')만 lines 로 넘겨."""
+
+    def __init__(self, proc, log):
+        self.proc = proc
+        self.log = log
+        self.lines = queue.Queue()
+        self._readers = [threading.Thread(target=self._drain, args=(proc.stdout, True), daemon=True),
+                         threading.Thread(target=self._drain, args=(proc.stderr, False), daemon=True)]
+        for reader in self._readers:
+            reader.start()
+
+    def _drain(self, stream, protocol):
+        try:
+            for line in iter(stream.readline, ''):
+                if protocol and line.startswith(_PREFIX):
+                    self.lines.put(line)
+                else:
+                    self.log.write(line.rstrip('\r\n'))
+        finally:
+            stream.close()
+            if protocol:
+                # EOF: 워커가 끝났거나 죽음
+                self.lines.put(None)
+
+    def readline(self, deadline):
+        """deadline(monotonic, None 이면 무한)까지 프로토콜 줄 하나. EOF 면 None, 시간이 지나면 queue.Empty."""
+        return self.lines.get(timeout=None if deadline is None else max(0.0, deadline - time.monotonic()))
+
+    def join_readers(self, timeout=5):
+        for reader in self._readers:
+            reader.join(timeout)
+        self.log.close()
+
+
+class RunnerPool:
+    """미리 띄워둔 워커 프로세스(python app.py --worker)들에 태스크를 나눠주는 runner pool
+
+    태스크마다 파이썬 인터프리터를 새로 띄우지 않고, oracledb import 와 커넥션 풀 생성을 마친
+    워커 size 개가 공유 대기열에서 taskid 를 받아 처리해. 워커마다 feeder 스레드가 하나씩 붙어서
+    stdin 으로 taskid 를 보내고 stdout 의 '@@RUNNER DONE' 줄로 완료를 확인해.
+
+    - 재활용: 워커가 max_tasks_per_worker 개를 처리하면 stdin 을 닫아 종료시키고 새 워커를 띄움
+    - 장애 격리: 처리 도중 워커가 죽거나 task_timeout 초 안에 끝내지 못하면(워커를 kill) 그 태스크만
+      on_task_crash 로 알리고 새 워커로 교체. READY 도 spawn_timeout 초까지만 기다려.
+    - 로그: 워커의 stderr(트레이스백)와 stdout 은 ProcessSupervisor 처럼 log_dir/task_<taskid>.log 에 남아
+    - 사용량: 태스크가 끝나면(워커가 죽은 경우 포함) on_task_done(taskid, usage) 로
+      종료 코드, 경과 시간, 워커가 보고한 CPU 시간/최대 RSS 를 알려줘
+    - 기동 실패: 워커가 max_spawn_failures 번 연달아 뜨지 못하면(인터프리터/import 오류, DB 다운 등) 대기열의
+      태스크를 기다리게 두지 않고 on_task_crash 로 실패 처리해. 그 뒤에도 SPAWN_RETRY_SEC 마다 다시 띄워 봐.
+    """
+
+    def __init__(self, argv, logger, size=4, max_tasks_per_worker=100, queue_size=1000,
+                 on_task_crash=None, cwd=None, spawn_timeout=60, on_task_done=None, task_timeout=None,
+                 max_spawn_failures=3,
+                 log_dir=TASK_LOG_DIR, max_bytes=TASK_LOG_MAX_BYTES, backup_count=TASK_LOG_BACKUP_COUNT):
+        self.argv = list(argv)
+        self.logger = logger
+        self.size = size
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self.on_task_crash = on_task_crash
+        self.on_task_done = on_task_done
+        self.cwd = cwd
+        self.spawn_timeout = spawn_timeout
+        self.task_timeout = task_timeout
+        self.max_spawn_failures = max_spawn_failures
+        self.log_dir = log_dir
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        os.makedirs(log_dir, exist_ok=True)
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._abandon = threading.Event()   # shutdown 시간이 지나면 대기열을 더 처리하지 않고 끝내
+        self._lock = threading.Lock()
+        self._stats = {
+            'spawned': 0,
+            'recycled': 0,
+            'crashed': 0,
+            'timeouts': 0,
+            'completed': 0,
+            'failed': 0,
+            'spawn_failures': 0,
+            'spawn_failed_tasks': 0,
+        }
+        self._threads = [threading.Thread(target=self._feeder, args=(slot,), name=f"runner-{slot}", daemon=True)
+                         for slot in range(size)]
+        for thread in self._threads:
+            thread.start()
+
+    def _count(self, key):
+        with self._lock:
+            self._stats[key] += 1
+
+    def submit(self, taskid):
+        """taskid 를 대기열에 넣음. 대기열이 꽉 차 있으면 자리가 날 때까지 기다려."""
+        self._queue.put(str(taskid))
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats['queue_depth'] = self._queue.qsize()
+        stats['workers'] = self.size
+        return stats
+
+    def _spawn(self, slot):
+        proc = subprocess.Popen(self.argv, cwd=self.cwd, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                stderr=subprocess.PIPE, text=True, bufsize=1)
+        worker = _Worker(proc, _WorkerLog(slot, self.log_dir, self.max_bytes, self.backup_count))
+        deadline = time.monotonic() + self.spawn_timeout
+        # import 와 커넥션 풀 생성이 끝나고 READY 를 보낼 때까지 기다림
+        try:
+            while True:
+                line = worker.readline(deadline)
+                if line is None:
+                    break
+                if line.startswith(_PREFIX + "READY"):
+                    self._count('spawned')
+                    self.logger.info(f"runner-{slot}: worker ready (pid={proc.pid})")
+                    return worker
+        except queue.Empty:
+            pass
+        self._stop_worker(worker, kill=True)
+        raise RuntimeError(f"runner-{slot}: worker did not become ready within {self.spawn_timeout}s "
+                           f"(exit={proc.returncode}, see {self.log_dir}/runner-{slot}.log)")
+
+    def _stop_worker(self, worker, kill=False):
+        proc = worker.proc
+        try:
+            if kill:
+                proc.kill()
+            elif proc.stdin:
+                proc.stdin.close()
+            proc.wait(timeout=30)
+        except Exception:
+            proc.kill()
+            proc.wait()
+        worker.join_readers()
+
+    def _run_one(self, worker, taskid):
+        """워커에 taskid 를 보내고 결과를 기다림. (성공 여부, 사용량) 이고 워커가 죽었으면 None,
+        task_timeout 초 안에 끝나지 않으면 _TIMEOUT.
+
+        완료 줄은 '@@RUNNER DONE <taskid> ok|error [경과초 CPU초 최대RSS_KB]' 야.
+        """
+        worker.log.taskid = taskid
+        try:
+            worker.proc.stdin.write(f"{taskid}\n")
+            worker.proc.stdin.flush()
+        except (BrokenPipeError, OSError):
+            return None
+        deadline = time.monotonic() + self.task_timeout if self.task_timeout else None
+        while True:
+            try:
+                line = worker.readline(deadline)
+            except queue.Empty:
+                return _TIMEOUT
+            if line is None:
+                return None
+            if line.startswith(_PREFIX + "DONE "):
+                fields = line.split()
+                if fields[2] == taskid:
+                    usage = {'exit_code': 0 if fields[3] == 'ok' else 1, 'wall_sec': None, 'cpu_sec': None,
+                             'max_rss_kb': None}
+                    if len(fields) >= 7:
+                        usage.update(wall_sec=float(fields[4]), cpu_sec=float(fields[5]), max_rss_kb=int(fields[6]))
+                    return fields[3] == 'ok', usage
+
+    def _fail_queued(self, slot, spawn_failures):
+        """워커를 띄울 수 없는 동안 대기열에 있는 태스크를 실패 처리. _STOP 을 만나면 False."""
+        failed = 0
+        try:
+            while True:
+                taskid = self._queue.get_nowait()
+                if taskid is _STOP:
+                    return False
+                failed += 1
+                self._count('spawn_failed_tasks')
+                self._crash(slot, taskid)
+                self._task_done(slot, taskid, {'exit_code': None, 'wall_sec': 0.0, 'cpu_sec': None,
+                                               'max_rss_kb': None})
+        except queue.Empty:
+            pass
+        finally:
+            if failed:
+                self.logger.error(f"runner-{slot}: worker could not start {spawn_failures} times in a row, "
+                                  f"failed {failed} queued tasks")
+        return True
+
+    def _feeder(self, slot):
+        worker = None
+        handled = 0
+        spawn_failures = 0
+        while True:
+            if worker is None:
+                if self._abandon.is_set():
+                    return
+                try:
+                    worker = self._spawn(slot)
+                    handled = 0
+                    spawn_failures = 0
+                except Exception as e:
+                    spawn_failures += 1
+                    self._count('spawn_failures')
+                    self.logger.error(f"runner-{slot}: worker spawn failed ({spawn_failures}): {e}", exc_info=True)
+                    if spawn_failures >= self.max_spawn_failures and not self._fail_queued(slot, spawn_failures):
+                        return
+                    time.sleep(SPAWN_RETRY_SEC)
+                    continue
+
+            taskid = self._queue.get()
+            if taskid is _STOP or self._abandon.is_set():
+                self._stop_worker(worker)
+                return
+
+            started = time.monotonic()
+            done = self._run_one(worker, taskid)
+            if done is None or done is _TIMEOUT:
+                proc = worker.proc
+                if done is _TIMEOUT:
+                    # 멈춘 워커가 슬롯을 계속 잡고 있지 않게 죽이고 새로 띄움
+                    self._count('timeouts')
+                    self._stop_worker(worker, kill=True)
+                    self.logger.error(f"runner-{slot}: taskid={taskid} did not finish within {self.task_timeout}s, "
+                                      f"worker pid={proc.pid} killed")
+                else:
+                    # 처리 도중 워커가 죽음 -> 이 태스크만 실패 처리하고 워커 교체
+                    self._count('crashed')
+                    self._stop_worker(worker, kill=True)
+                    self.logger.error(f"runner-{slot}: worker pid={proc.pid} died (exit={proc.returncode}) "
+                                      f"while running taskid={taskid}")
+                self._crash(slot, taskid)
+                self._task_done(slot, taskid, {'exit_code': proc.returncode, 'cpu_sec': None, 'max_rss_kb': None,
+                                               'wall_sec': round(time.monotonic() - started, 3)})
+                worker = None
+                continue
+
+            worker.log.taskid = None
+            result, usage = done
+            if usage['wall_sec'] is None:
+                usage['wall_sec'] = round(time.monotonic() - started, 3)
+            self._task_done(slot, taskid, usage)
+            self._count('completed' if result else 'failed')
+            handled += 1
+            if handled >= self.max_tasks_per_worker:
+                self._stop_worker(worker)
+                self._count('recycled')
+                self.logger.info(f"runner-{slot}: worker pid={worker.proc.pid} recycled after {handled} tasks")
+                worker = None
+
+    def _abandon_queue(self):
+        """대기열을 비우고 feeder 마다 _STOP 을 넣어. 버린 태스크는 lease 가 끝나면 다른 sch 인스턴스가 가져가."""
+        self._abandon.set()
+        dropped = 0
+        try:
+            while True:
+                if self._queue.get_nowait() is not _STOP:
+                    dropped += 1
+        except queue.Empty:
+            pass
+        for _ in self._threads:
+            try:
+                self._queue.put_nowait(_STOP)
+            except queue.Full:
+                break
+        if dropped:
+            self.logger.error(f"RunnerPool shutdown timed out, dropped {dropped} queued tasks")
+
+    def _crash(self, slot, taskid):
+        if self.on_task_crash:
+            try:
+                self.on_task_crash(taskid)
+            except Exception as e:
+                self.logger.error(f"runner-{slot}: on_task_crash failed: {e}", exc_info=True)
+
+    def _task_done(self, slot, taskid, usage):
+        if self.on_task_done:
+            try:
+                self.on_task_done(taskid, usage)
+            except Exception as e:
+                self.logger.error(f"runner-{slot}: on_task_done failed: {e}", exc_info=True)
+
+    def shutdown(self, wait=True, timeout=None):
+        """대기열에 남은 태스크를 처리한 뒤 워커들을 종료. 남은 feeder 수를 돌려줘.
+
+        timeout 초가 지나면 더 기다리지 않고, feeder 들은 지금 처리중인 태스크만 끝내고 멈춰.
+        대기열에 남은 태스크는 lease 가 끝나면 다른 sch 인스턴스가 다시 가져가.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        try:
+            for _ in self._threads:
+                # 대기열이 꽉 찬 채로 feeder 가 멈춰 있어도 deadline 을 넘겨 기다리지 않게
+                self._queue.put(_STOP, timeout=None if deadline is None else max(0.0, deadline - time.monotonic()))
+        except queue.Full:
+            self._abandon_queue()
+        if wait:
+            for thread in self._threads:
+                thread.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+        remaining = sum(thread.is_alive() for thread in self._threads)
+        if remaining:
+            self._abandon.set()
+        self.logger.info(f"RunnerPool shut down ({remaining} feeders still busy, "
+                         f"{self._queue.qsize()} queued entries left): {self.get_stats()}")
+        return remaining
@@ -0,0 +1,72 @@
+# 예약 규칙(시작/종료 날짜, 시각, 빈도, 월/요일/일 필터)을 스케줄 시작 시각으로 펼치는 엔진
+# common/materializer.py(sch.py, main.py)가 쓰고 util/sch_arg_test.py 의 generate_schedule_times 도 이걸 감싸.
+from datetime import datetime, date, time, timedelta
+import calendar
+
+
+def iter_schedule_times(
+    start_date: date,
+    end_date: date,
+    start_time: time,
+    frequency: str,
+    specific_months: list[int] | None = None,
+    specific_weekdays: list[int] | None = None,
+    specific_days_of_month: list[int] | None = None
+):
+    """
+    TASKRESERVE 규칙(util/sch_arg_test.generate_schedule_times 와 같은 규칙)의 스케줄 시작 시간을 시간 순서대로 하나씩 만들어주는 generator.
+
+    하루씩 순회하지 않고 후보 날짜로 바로 건너뛰어요.
+    - 'monthly' / 특정 일이 지정된 'daily': (허용된 월) x (지정된 일) 조합만 계산
+    - 'weekly': 월마다 선택된 요일의 첫 날짜를 구한 뒤 7일씩 이동
+    - 일 지정이 없는 'daily': 허용된 월의 날짜만 생성
+    비용은 O(기간의 개월 수 + 생성되는 건수) 이고, 필요한 만큼만 꺼내 쓸 수 있어요.
+    예) 다음 5건만: list(itertools.islice(iter_schedule_times(...), 5))
+
+    인자 검증(시작 > 종료, weekly 인데 요일 없음)에 걸리면 아무것도 만들지 않아요.
+    """
+    if start_date > end_date:
+        return
+    if frequency == 'weekly' and specific_weekdays is None:
+        return
+    if frequency not in ('daily', 'weekly', 'monthly'):
+        return
+
+    months = set(range(1, 13)) if specific_months is None else set(specific_months)
+    weekdays = None
+    days = None # None 이면 해당 월의 모든 날
+    if frequency == 'weekly':
+        weekdays = sorted(set(w for w in specific_weekdays if 0 <= w <= 6))
+    elif specific_days_of_month is not None:
+        days = sorted(set(specific_days_of_month))
+    elif frequency == 'monthly':
+        days = [1] # '매 월' (특정 일 지정 없음) - 매월 1일
+
+    year, month = start_date.year, start_date.month
+    while (year, month) <= (end_date.year, end_date.month):
+        if month in months:
+            # 이번 달에서 실제로 살펴볼 구간 [first, last]
+            month_last_day = calendar.monthrange(year, month)[1]
+            first = start_date if (year, month) == (start_date.year, start_date.month) else date(year, month, 1)
+            last = end_date if (year, month) == (end_date.year, end_date.month) else date(year, month, month_last_day)
+
+            if weekdays is not None:
+                dates = []
+                for weekday in weekdays:
+                    current_date = first + timedelta(days=(weekday - first.weekday()) % 7)
+                    while current_date <= last:
+                        dates.append(current_date)
+                        current_date += timedelta(days=7)
+                dates.sort()
+            elif days is None:
+                dates = (first + timedelta(days=i) for i in range((last - first).days + 1))
+            else:
+                dates = (date(year, month, day) for day in days if first.day <= day <= last.day)
+
+            for current_date in dates:
+                yield datetime.combine(current_date, start_time)
+
+        month += 1
+        if month > 12:
+            month = 1
+            year += 1
@@ -0,0 +1,86 @@
+import threading
+import time
+from common import queries
+
+class StatusWriter:
+    """태스크 상태 변경('I', 'S', 'E', 'K')을 짧게 모아서 한 번에 반영하는 writer
+
+    put() 으로 들어온 상태 변경을 flush_interval 초 동안 모았다가 커밋 한 번으로 TASK 테이블에 써.
+    같은 taskid 의 변경이 한 번에 여러 개 들어와도('S' 다음 'E') 덮어쓰지 않고 들어온 순서대로 다 써.
+    태스크마다 k 번째 변경끼리 묶어서 executemany 를 돌리니까 보통은 executemany 한 번이고,
+    flush 는 한 번에 하나씩만 돌기 때문에 태스크별 상태 순서가 그대로 유지돼.
+    """
+
+    def __init__(self, dbpool, logger, flush_interval=0.2, max_batch=500, name="status"):
+        self.dbpool = dbpool
+        self.logger = logger
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.name = name
+        self._pending = []                 # (taskid, status) 들어온 순서대로
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"{name}-writer", daemon=True)
+        self._thread.start()
+
+    def put(self, taskid, status):
+        """상태 변경을 대기열에 넣음. 실제 반영은 다음 flush 때 한 번에 돼."""
+        with self._lock:
+            self._pending.append((taskid, status))
+            full = len(self._pending) >= self.max_batch
+        if full:
+            self._wakeup.set()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                self.logger.error(f"[{self.name}] status flush failed: {e}", exc_info=True)
+
+    def flush(self):
+        """모아둔 상태 변경을 지금 바로 반영 (종료 시 동기 flush 용). 반영한 건수를 돌려줘."""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                batch = self._pending
+                self._pending = []
+
+            started = time.perf_counter()
+            try:
+                with self.dbpool.acquire() as conn, conn.cursor() as cursor:
+                    for rows in self._rounds(batch):
+                        queries.executemany(cursor, "task.update_status", rows)
+                    conn.commit()
+            except BaseException:
+                # 실패한 건은 (SIGTERM 으로 끊긴 경우도) 그 사이 들어온 변경보다 앞에 다시 넣어서 순서를 지켜
+                with self._lock:
+                    self._pending[:0] = batch
+                raise
+            self.logger.info(f"[{self.name}] {len(batch)} status updates flushed in "
+                             f"{(time.perf_counter() - started) * 1000:.1f} ms")
+            return len(batch)
+
+    @staticmethod
+    def _rounds(batch):
+        """태스크마다 k 번째 변경을 k 번째 묶음에 넣어. 묶음을 순서대로 쓰면 태스크별 순서가 지켜져."""
+        rounds, seen = [], {}
+        for taskid, status in batch:
+            n = seen.get(taskid, 0)
+            seen[taskid] = n + 1
+            if n == len(rounds):
+                rounds.append([])
+            rounds[n].append({'taskid': taskid, 'status': status})
+        return rounds
+
+    def close(self):
+        """백그라운드 flush 를 멈추고 남은 상태 변경을 모두 반영."""
+        self._stopped.set()
+        self._wakeup.set()
+        self._thread.join(timeout=5)
+        self.flush()
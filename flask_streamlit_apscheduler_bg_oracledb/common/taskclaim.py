@@ -0,0 +1,136 @@
+import os
+import socket
+import threading
+from datetime import datetime
+from common import queries
+
+# 선점한 태스크를 이 시간 안에 갱신하지 않으면 다른 sch 인스턴스가 가져갈 수 있어 (REFRESH_INTERVAL_SEC 보다 넉넉하게)
+CLAIM_LEASE_SEC = 120
+# 한 번에 잠그고 선점할 최대 행 수. 한 인스턴스가 몰린 태스크를 다 가져가지 않고 나눠 갖게 돼.
+CLAIM_BATCH_SIZE = 200
+
+
+def default_owner():
+    """sch 인스턴스 이름: 호스트:pid"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class TaskClaimer:
+    """여러 sch 인스턴스가 같은 TASK 테이블을 나눠서 실행하도록 행을 선점하는 claim 프로토콜
+
+    실행할 차례가 된 'R' 행을 SELECT ... FOR UPDATE SKIP LOCKED 로 잠그고(다른 인스턴스가 잠근 행은 건너뜀)
+    task_status='I', owner, lease_until 을 써서 커밋해. 커밋까지 끝난 행만 이 인스턴스가 띄워.
+    owner 는 살아 있는 동안 renew() 로 아직 실행중인 자기 'I' 행의 lease_until 을 늘리고, 인스턴스가 죽었거나
+    app.py 가 상태를 남기지 못하고 끝나서 lease 가 지난 'I' 행은 claim_expired() 로 다른 인스턴스가 넘겨받아.
+    lease 시각은 전부 DB 시계로 계산해서 인스턴스 사이 시계 차이로 살아 있는 lease 를 뺏지 않아.
+    """
+
+    def __init__(self, dbpool, logger, owner=None, lease_sec=CLAIM_LEASE_SEC, batch_size=CLAIM_BATCH_SIZE):
+        self.dbpool = dbpool
+        self.logger = logger
+        self.owner = owner or default_owner()
+        self.lease_sec = lease_sec
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._stats = {"claimed": 0, "taken_over": 0, "renewed": 0, "claim_calls": 0}
+
+    def _count(self, **deltas):
+        with self._lock:
+            for key, delta in deltas.items():
+                self._stats[key] += delta
+
+    def _claim(self, name, params):
+        # SKIP LOCKED 는 fetch 할 때 행을 잠가서, batch_size 만큼만 가져오면 그만큼만 잠겨
+        with self.dbpool.acquire() as conn, conn.cursor() as cursor:
+            cursor.arraysize = self.batch_size
+            cursor.prefetchrows = self.batch_size
+            queries.execute(cursor, name, params)
+            rows = cursor.fetchmany(self.batch_size)
+            if not rows:
+                conn.rollback()
+                return []
+            queries.executemany(cursor, "task.set_claim", self._claim_rows(rows))
+            conn.commit()
+        return rows
+
+    def _claim_rows(self, rows):
+        return [{'taskid': row[0], 'owner': self.owner, 'lease_sec': self.lease_sec} for row in rows]
+
+    def _renew_rows(self, taskids):
+        return [{'taskid': int(taskid), 'owner': self.owner, 'lease_sec': self.lease_sec} for taskid in taskids]
+
+    def _log_taken_over(self, rows):
+        if rows:
+            self.logger.info(f"[{self.owner}] took over {len(rows)} tasks with expired leases: "
+                             f"{[row[0] for row in rows]}")
+
+    def claim_due(self, window_start, now=None):
+        """시작 시간이 [window_start, now] 인 'R' 행을 선점해. [(taskid, taskname, 시작 시각)] (시작 시간 순)"""
+        rows = self._claim("task.claim_due", {'window_start': window_start, 'now': now or datetime.now()})
+        self._count(claimed=len(rows), claim_calls=1)
+        return rows
+
+    def claim_expired(self):
+        """lease 가 끝난 다른(또는 죽은) 인스턴스의 'I' 행을 넘겨받아. [(taskid, taskname, 시작 시각)]"""
+        rows = self._claim("task.claim_expired", {})
+        self._log_taken_over(rows)
+        self._count(taken_over=len(rows), claim_calls=1)
+        return rows
+
+    def renew(self, taskids):
+        """이 인스턴스가 아직 실행중인 taskids 의 lease 만 늘려. 늘린 행 수를 돌려줘.
+
+        app.py 가 끝났는데 'I' 로 남은 행은 늘리지 않으니 lease 가 지나면 claim_expired() 로 다시 띄워져.
+        """
+        if not taskids:
+            return 0
+        with self.dbpool.acquire() as conn, conn.cursor() as cursor:
+            queries.executemany(cursor, "task.renew_leases", self._renew_rows(taskids))
+            renewed = cursor.rowcount
+            conn.commit()
+        self._count(renewed=renewed)
+        return renewed
+
+    def get_stats(self):
+        with self._lock:
+            return dict(self._stats, owner=self.owner)
+
+
+class AsyncTaskClaimer(TaskClaimer):
+    """TaskClaimer 의 asyncio 버전 (sch_async.py). dbpool 은 DBHandler.get_async_db_pool 로 만든 AsyncDBPool 이야."""
+
+    async def _claim(self, name, params):
+        async with self.dbpool.acquire() as conn:
+            with conn.cursor() as cursor:
+                cursor.arraysize = self.batch_size
+                cursor.prefetchrows = self.batch_size
+                await queries.execute_async(cursor, name, params)
+                rows = await cursor.fetchmany(self.batch_size)
+                if not rows:
+                    await conn.rollback()
+                    return []
+                await queries.executemany_async(cursor, "task.set_claim", self._claim_rows(rows))
+                await conn.commit()
+        return rows
+
+    async def claim_due(self, window_start, now=None):
+        rows = await self._claim("task.claim_due", {'window_start': window_start, 'now': now or datetime.now()})
+        self._count(claimed=len(rows), claim_calls=1)
+        return rows
+
+    async def claim_expired(self):
+        rows = await self._claim("task.claim_expired", {})
+        self._log_taken_over(rows)
+        self._count(taken_over=len(rows), claim_calls=1)
+        return rows
+
+    async def renew(self, taskids):
+        if not taskids:
+            return 0
+        async with self.dbpool.acquire() as conn:
+            with conn.cursor() as cursor:
+                await queries.executemany_async(cursor, "task.renew_leases", self._renew_rows(taskids))
+                renewed = cursor.rowcount
+            await conn.commit()
+        self._count(renewed=renewed)
+        return renewed
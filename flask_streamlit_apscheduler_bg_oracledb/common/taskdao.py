@@ -0,0 +1,49 @@
+import oracledb
+
+from common import queries
+from common.materializer import to_date
+
+
+def reserve_params(data):
+    """POST /tasks 요청 본문 -> reserve.upsert 바인드 값 (:taskreserveid 제외)"""
+    return {
+        'taskname': data['taskname'],
+        'start_date': to_date(data['start_date']),
+        'end_date': to_date(data['end_date']),
+        'start_time': data.get('start_time'),
+        'frequency': data.get('frequency'),
+        'specific_months': data.get('specific_months'),
+        'specific_weekdays': data.get('specific_weekdays'),
+        'specific_days_of_month': data.get('specific_days_of_month'),
+        'register': data.get('register'),
+        'lastchanger': data.get('lastchanger'),
+    }
+
+
+def upsert_reserve(cursor, data):
+    """POST /tasks 요청 본문으로 TASKRESERVE 를 MERGE 한 번에 등록/변경하고 TASKRESERVEID 를 돌려줘. 커밋은 호출한 쪽에서!"""
+    taskreserveid = cursor.var(oracledb.DB_TYPE_NUMBER)
+    queries.execute(cursor, "reserve.upsert", dict(reserve_params(data), taskreserveid=taskreserveid))
+    return int(taskreserveid.getvalue()[0])
+
+
+def upsert_reserves(cursor, items):
+    """요청 본문 여러 개를 reserve.upsert 한 번의 executemany(batcherrors)로 MERGE. 커밋은 호출한 쪽에서!
+
+    items 순서대로 (taskreserveid, None) 또는 실패한 행은 (None, 오류 메시지) 목록을 돌려줘.
+    실패한 행이 있어도 나머지 행의 MERGE 는 트랜잭션 안에 그대로 남아.
+    """
+    if not items:
+        return []
+    taskreserveids = cursor.var(oracledb.DB_TYPE_NUMBER, arraysize=len(items))
+    queries.executemany(cursor, "reserve.upsert", [reserve_params(d) for d in items],
+                        outvars={'taskreserveid': taskreserveids}, batcherrors=True)
+    errors = {e.offset: e.message for e in cursor.getbatcherrors()}
+    results = []
+    for i in range(len(items)):
+        if i in errors:
+            results.append((None, errors[i]))
+        else:
+            results.append((int(taskreserveids.getvalue(i)[0]), None))
+    return results
+
@@ -0,0 +1,89 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+class TaskLauncher:
+    """동시 실행 수와 대기열 길이를 제한한 태스크 기동기
+
+    태스크마다 스레드를 새로 만들지 않고 max_workers 개의 스레드가 대기열에서 꺼내 실행해.
+    실행중 + 대기중인 태스크가 max_workers + max_queue 개에 도달하면 submit() 이 자리가 날 때까지
+    막혀서 호출한 쪽(sch.py 디스패치 루프)에 backpressure 가 걸려.
+    """
+
+    def __init__(self, worker_fn, logger, max_workers=16, max_queue=1000, latency_window=1000):
+        self.worker_fn = worker_fn
+        self.logger = logger
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="task-launcher")
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=latency_window)  # 예정 시각 대비 실제 기동 지연(초)
+        self._metrics = {
+            'submitted': 0,
+            'completed': 0,
+            'failed': 0,
+            'queued': 0,
+            'running': 0,
+            'backpressure_waits': 0,
+        }
+        self._closed = False
+
+    def submit(self, task_data, scheduled_time):
+        """태스크를 대기열에 넣음. 대기열이 꽉 차 있으면 자리가 날 때까지 기다려."""
+        if self._closed:
+            raise RuntimeError("TaskLauncher is shut down")
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._metrics['backpressure_waits'] += 1
+            self.logger.info(f"Launcher queue full ({self.max_workers + self.max_queue}), waiting for a free slot...")
+            self._slots.acquire()
+        with self._lock:
+            self._metrics['submitted'] += 1
+            self._metrics['queued'] += 1
+        try:
+            return self._executor.submit(self._run, task_data, scheduled_time)
+        except Exception:
+            with self._lock:
+                self._metrics['queued'] -= 1
+            self._slots.release()
+            raise
+
+    def _run(self, task_data, scheduled_time):
+        with self._lock:
+            self._metrics['queued'] -= 1
+            self._metrics['running'] += 1
+            self._latencies.append((datetime.now() - scheduled_time).total_seconds())
+        try:
+            self.worker_fn(task_data)
+            with self._lock:
+                self._metrics['completed'] += 1
+        except Exception as e:
+            self.logger.error(f"Task launch failed: {e}", exc_info=True)
+            with self._lock:
+                self._metrics['failed'] += 1
+        finally:
+            with self._lock:
+                self._metrics['running'] -= 1
+            self._slots.release()
+
+    def get_metrics(self):
+        """대기열 깊이, 실행중 개수, 기동 지연(평균/p95/최대) 등"""
+        with self._lock:
+            metrics = dict(self._metrics)
+            latencies = sorted(self._latencies)
+        metrics['queue_depth'] = metrics.pop('queued')
+        if latencies:
+            metrics['launch_latency_avg_ms'] = round(sum(latencies) / len(latencies) * 1000, 1)
+            metrics['launch_latency_p95_ms'] = round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 1)
+            metrics['launch_latency_max_ms'] = round(latencies[-1] * 1000, 1)
+        return metrics
+
+    def shutdown(self, wait=True):
+        """새 태스크는 더 받지 않고, 이미 대기열/실행중인 기동은 끝까지 처리하고 종료."""
+        self._closed = True
+        started = time.monotonic()
+        self._executor.shutdown(wait=wait)
+        self.logger.info(f"TaskLauncher shut down in {time.monotonic() - started:.2f}s: {self.get_metrics()}")
@@ -0,0 +1,92 @@
+import heapq
+import itertools
+import threading
+from datetime import datetime
+
+class TaskTimer:
+    """SUBPROCEE_STARTTIME 기준으로 정렬된 최소 힙 타이머
+
+    sch.py 가 미리 읽어둔 'R' 태스크를 시작 시간 순서로 들고 있다가,
+    가장 빠른 시작 시간까지만 잠들고 정각에 꺼내줘. 폴링 없이 다음 태스크 시각까지 대기해.
+    """
+
+    def __init__(self):
+        self._heap = []        # (start_time, seq, taskid)
+        self._entries = {}     # taskid -> (start_time, payload)
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    def schedule(self, taskid, start_time, payload=None):
+        """태스크를 등록하거나, 이미 있으면 시작 시간을 바꿔서 다시 등록함."""
+        with self._cond:
+            current = self._entries.get(taskid)
+            self._entries[taskid] = (start_time, payload)
+            if current is not None and current[0] == start_time:
+                return
+            heapq.heappush(self._heap, (start_time, next(self._seq), taskid))
+            # 맨 앞 태스크가 바뀌었으면 대기중인 스레드를 깨워서 대기 시간을 다시 계산하게 해.
+            if self._heap[0][2] == taskid:
+                self._cond.notify_all()
+
+    def cancel(self, taskid):
+        """태스크를 타이머에서 뺌 (힙에서는 꺼낼 때 지연 삭제)"""
+        with self._cond:
+            return self._entries.pop(taskid, None) is not None
+
+    def wakeup(self):
+        with self._cond:
+            self._cond.notify_all()
+
+    def __len__(self):
+        with self._cond:
+            return len(self._entries)
+
+    def __contains__(self, taskid):
+        with self._cond:
+            return taskid in self._entries
+
+    def next_start_time(self):
+        with self._cond:
+            self._discard_stale()
+            return self._heap[0][0] if self._heap else None
+
+    def _discard_stale(self):
+        # cancel 됐거나 다시 등록되어 시작 시간이 바뀐 힙 항목 정리
+        while self._heap:
+            start_time, _, taskid = self._heap[0]
+            entry = self._entries.get(taskid)
+            if entry is not None and entry[0] == start_time:
+                return
+            heapq.heappop(self._heap)
+
+    def pop_due(self, timeout=None):
+        """시작 시간이 된 태스크 목록을 꺼냄.
+
+        가장 빠른 태스크의 시작 시간이나 timeout(초) 중 먼저 오는 쪽까지 대기하고,
+        [(taskid, start_time, payload), ...] 를 시작 시간 순서로 돌려줘. 없으면 빈 목록.
+        """
+        deadline = None if timeout is None else datetime.now().timestamp() + timeout
+        with self._cond:
+            while True:
+                self._discard_stale()
+                now = datetime.now()
+                due = []
+                while self._heap and self._heap[0][0] <= now:
+                    start_time, _, taskid = heapq.heappop(self._heap)
+                    entry = self._entries.get(taskid)
+                    if entry is None or entry[0] != start_time:
+                        continue
+                    del self._entries[taskid]
+                    due.append((taskid, start_time, entry[1]))
+                if due:
+                    return due
+
+                wait_sec = None
+                if self._heap:
+                    wait_sec = (self._heap[0][0] - now).total_seconds()
+                if deadline is not None:
+                    remaining = deadline - now.timestamp()
+                    if remaining <= 0:
+                        return []
+                    wait_sec = remaining if wait_sec is None else min(wait_sec, remaining)
+                self._cond.wait(wait_sec)
@@ -5,10 +5,10 @@ import psutil
 import pandas as pd
 import plotly.express as px
 import datetime # <-- datetime 모듈만 임포트!
-import time # time 모듈 (time.sleep 등)
 import sys
 from common.dbhandler import DBHandler
 from common.loghandler import LogHandler
+from common import queries
 
 # --- Streamlit 페이지 설정 ---
 # 브라우저 탭 타이틀과 전체 레이아웃 너비 설정
@@ -20,10 +20,10 @@ logger = log_handler.getloghandler("main")
 db_handler = DBHandler()
 db_config = db_handler.get_db_config()
 
-# 데이터 업데이트 주기 (캐시 TTL - Time To Live)
+# 데이터 업데이트 주기 (캐시 TTL - Time To Live). 화면도 섹션(st.fragment)마다 이 주기로 그 섹션만 다시 그려.
 SCHEDULE_DATA_TTL_SEC = 60 # 스케줄 데이터 1분 주기
 METRICS_DATA_TTL_SEC = 3 # 시스템 메트릭스 데이터 3초 주기
-CLOCK_DATA_TTL_SEC = 0.3 # 시계 데이터 0.3초 (300ms) 주기
+CLOCK_REFRESH_SEC = 1 # 시계는 초 단위까지만 보이니까 1초마다 시계 fragment 만 다시 그려
 
 # 스케줄 상태별 색상 설정 (그래프, 테이블 행 색상에 사용)
 STATUS_COLORS = {
@@ -126,8 +126,6 @@ if 'cpu_top5_data_cached' not in st.session_state:
      st.session_state.cpu_top5_data_cached = pd.DataFrame()
 if 'memory_top5_data_cached' not in st.session_state:
      st.session_state.memory_top5_data_cached = pd.DataFrame()
-if 'current_time_cached' not in st.session_state:
-     st.session_state.current_time_cached = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S") # 시계 표시용 초기값
 
 # --- 데이터베이스 연결 함수 (st.cache_resource 로 연결 객체 캐싱) ---
 # DB 연결은 앱 실행 중 한 번만 하도록 캐시해두는 게 좋아.
@@ -148,14 +146,6 @@ dbconn = init_db_connection()  # DB 연결 객체 가져오기
 # --- 데이터 가져오는 함수들 (st.cache_data 로 데이터 캐싱) ---
 # 이 함수들은 인자가 바뀌거나 캐시 유효 시간(ttl)이 지나고 스크립트가 재실행될 때만 실제로 실행돼.
 
-@st.cache_data(ttl=CLOCK_DATA_TTL_SEC, show_spinner=False) # 0.3초 TTL 설정
-def get_current_time_str():
-    """캐시 TTL에 따라 현재 시간을 문자열로 가져와."""
-    # 이 함수는 스크립트가 재실행되고 0.3초가 지났을 때만 실제로 실행돼.
-    # Streamlit 자체는 주기적으로 자동 재실행되지 않아.
-    return datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-
 @st.cache_data(ttl=METRICS_DATA_TTL_SEC, show_spinner=False) # 3초 TTL 설정
 def get_system_metrics():
     """시스템 CPU, 메모리, 디스크, 네트워크 사용량 정보를 가져와."""
@@ -257,35 +247,13 @@ def fetch_schedule_data(_conn, selected_statuses, start_datetime, end_datetime):
     """스케줄 현황 그래프 및 테이블 데이터를 DB에서 가져와."""
     cursor = _conn.cursor()
 
-    # 스케줄 상태 필터 조건 SQL 구문 및 바인딩 변수 처리 수정
-    status_filter_sql = ""
-    status_bind_vars = {}
-    if selected_statuses:
-        # 선택된 상태 개수만큼 바인딩 변수 이름 (:status_0, :status_1, ...) 생성
-        # list comprehension으로 바인딩 변수 이름 리스트 생성
-        status_placeholders = [f":status_{i}" for i in range(len(selected_statuses))]
-        # IN 절 SQL 구문 생성
-        status_filter_sql = f" AND task_status IN ({', '.join(status_placeholders)}) "
-        # 바인딩 변수 딕셔너리 생성 (예: {'status_0': 'R', 'status_1': 'X'})
-        status_bind_vars = {f"status_{i}": status for i, status in enumerate(selected_statuses)}
+    # 상태 필터는 ',R,S,' 형태의 바인딩 값 하나로 넘겨. 선택 개수가 달라도 SQL 텍스트는 그대로야.
+    bind_vars = {'start_dt': start_datetime, 'end_dt': end_datetime,
+                 'statuses': queries.status_filter(selected_statuses)}
 
     # 쿼리 1: 시간대별 스케줄 카운트 (그래프용)
-    sql_graph = f"""
-    SELECT TO_CHAR(subprocee_starttime,'YYYY-MM-DD HH24') AS hourly,
-           task_status, COUNT(task_status) as cnt_status
-    FROM task
-    WHERE subprocee_starttime BETWEEN :start_dt AND :end_dt
-      {status_filter_sql} -- 동적으로 생성된 필터 SQL 삽입
-    GROUP BY TO_CHAR(subprocee_starttime,'YYYY-MM-DD HH24'), task_status
-    ORDER BY TO_CHAR(subprocee_starttime,'YYYY-MM-DD HH24')
-    """
     try:
-        # 바인딩 변수 딕셔너리 조합
-        # 시간 바인딩 변수와 상태 바인딩 변수를 합쳐줘
-        bind_vars_graph = {'start_dt': start_datetime, 'end_dt': end_datetime}
-        bind_vars_graph.update(status_bind_vars) # 상태 바인딩 변수 추가
-
-        cursor.execute(sql_graph, bind_vars_graph) # 조합된 바인딩 변수 사용
+        queries.execute(cursor, "dash.hourly_status_range", bind_vars)
 
         graph_data = cursor.fetchall()
         graph_df = pd.DataFrame(graph_data, columns=['HOURLY', 'TASK_STATUS', 'CNT_STATUS'])
@@ -307,19 +275,9 @@ def fetch_schedule_data(_conn, selected_statuses, start_datetime, end_datetime):
         graph_df = pd.DataFrame(columns=['HOURLY', 'TASK_STATUS', 'CNT_STATUS']) # 오류 시 빈 DF
 
     # 쿼리 2: 상세 스케줄 목록 (테이블용 및 상태별 카운트 계산용)
-    sql_table = f"""
-    SELECT subprocee_starttime, taskname, task_status
-    FROM task
-    WHERE subprocee_starttime BETWEEN :start_dt AND :end_dt
-      {status_filter_sql} -- 동적으로 생성된 필터 SQL 삽입
-    ORDER BY subprocee_starttime
-    """
     try:
         # 쿼리 1과 동일한 바인딩 변수 사용
-        bind_vars_table = {'start_dt': start_datetime, 'end_dt': end_datetime}
-        bind_vars_table.update(status_bind_vars) # 상태 바인딩 변수 추가
-
-        cursor.execute(sql_table, bind_vars_table) # 조합된 바인딩 변수 사용
+        queries.execute(cursor, "dash.schedule_range", bind_vars)
         table_data = cursor.fetchall()
         table_df = pd.DataFrame(table_data, columns=['SUBPROCEE_STARTTIME', 'TASKNAME', 'TASK_STATUS'])
         # datetime 열 포맷 수정 (object 타입이 아닌 datetime 타입일 때만 적용)
@@ -415,31 +373,93 @@ def display_top_processes(df, title):
          st.info(f"🤔 표시할 {title} 프로세스 데이터가 없습니다.")
 
 
-# --- 실시간 시계 표시 ---
-# 캐시 함수를 호출해서 현재 시간을 가져와.
-# 스크립트가 재실행되고 CLOCK_DATA_TTL_SEC(0.3초)가 지났으면 새 시간을 가져오고,
-# 아니면 캐시된 이전 시간을 사용해.
-# 이 함수 자체는 스크립트가 재실행되어야 동작하므로,
-# Streamlit의 기본 동작 방식 상 완벽히 300ms마다 "자동"으로 업데이트되지는 않아.
-# 사용자의 위젯 조작이나 새로고침 등 스크립트 재실행 시 업데이트되는 방식이야.
-st.session_state.current_time_cached = get_current_time_str()
+# --- 주기적으로 다시 그리는 섹션들 (st.fragment) ---
+# 예전에는 마지막에 0.3초 쉬고 st.rerun() 으로 CSS, 위젯, 그래프까지 스크립트 전체를 1초에 세 번씩 다시 돌렸어.
+# 이제는 섹션마다 fragment 로 나눠서 각자 주기(run_every)에 그 섹션만 다시 그려.
+# 검색 조건 위젯을 바꾸면 예전처럼 스크립트 전체가 다시 돌고, 그때 모든 섹션이 새로 그려져.
+
+def get_query_range():
+    """스케줄 조회 시작/종료 시각 (수동이면 선택한 값, 자동이면 현재 시간 기준 24시간 전후)"""
+    if st.session_state.use_custom_time == "수동":
+        # 선택한 날짜와 시간을 조합하여 datetime 객체 생성
+        try:
+            query_start_datetime = datetime.datetime.combine(st.session_state.start_date, st.session_state.start_time)
+            query_end_datetime = datetime.datetime.combine(st.session_state.end_date, st.session_state.end_time)
+            # 종료 시간이 시작 시간보다 빠르면 경고 (필요시)
+            if query_end_datetime < query_start_datetime:
+                st.warning("⚠️ 종료 시간이 시작 시간보다 빠릅니다.")
+                # 여기서 쿼리 실행을 중지하거나, 범위를 조정하는 로직을 추가할 수 있어.
+                # 일단은 경고만 표시하고 쿼리는 실행하도록 둘게.
+            return query_start_datetime, query_end_datetime
+        except Exception as e:
+            st.error(f"🚫 선택 시간 조합 오류: {e}")
+            # 여기서는 예시로 현재 시간 기준 24시간 전후로 대체하도록 할게.
+            st.warning("선택 시간 오류로 인해 현재 시간 기준 24시간 전후 데이터로 표시합니다.")
+
+    # OFF (24시간 전후). fetch_schedule_data 캐시 키가 매번 바뀌지 않게 분 단위로 잘라.
+    now = datetime.datetime.now().replace(second=0, microsecond=0)
+    return now - datetime.timedelta(hours=24), now + datetime.timedelta(hours=24)
+
+
+def get_schedule_data():
+    """검색 조건으로 스케줄 데이터를 가져와 (같은 조건이면 SCHEDULE_DATA_TTL_SEC 동안 캐시된 결과)"""
+    query_start_datetime, query_end_datetime = get_query_range()
+    st.session_state.schedule_data_graph_cached, st.session_state.schedule_data_table_cached = fetch_schedule_data(
+        dbconn,
+        st.session_state.selected_statuses, # 선택된 상태 리스트
+        query_start_datetime, # 결정된 쿼리 시작 시간 (datetime 객체)
+        query_end_datetime    # 결정된 쿼리 종료 시간 (datetime 객체)
+    )
+    return st.session_state.schedule_data_graph_cached, st.session_state.schedule_data_table_cached
+
+
+@st.fragment(run_every=CLOCK_REFRESH_SEC)
+def clock_section():
+    st.markdown(f"<h1 style='text-align: right;'>{datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</h1>",
+                unsafe_allow_html=True)
+
+
+@st.fragment(run_every=SCHEDULE_DATA_TTL_SEC)
+def schedule_section():
+    graph_df, table_df = get_schedule_data()
+    # 스케줄 현황 그래프 표시
+    display_schedule_graph(graph_df, st.session_state.graph_type)
+    # 스케줄 현황 테이블 표시
+    display_schedule_table(table_df)
+
+
+@st.fragment(run_every=SCHEDULE_DATA_TTL_SEC)
+def status_count_section():
+    # 스케줄 섹션과 같은 조건이라 캐시된 결과를 그대로 써 (DB 조회 없음)
+    _, table_df = get_schedule_data()
+    display_status_count_table(table_df)
+
+
+@st.fragment(run_every=METRICS_DATA_TTL_SEC)
+def system_metrics_section():
+    st.session_state.system_metrics_data_cached = get_system_metrics()
+    display_system_metrics(st.session_state.system_metrics_data_cached)
+
+
+@st.fragment(run_every=METRICS_DATA_TTL_SEC)
+def top_processes_section():
+    # CPU Top 5 데이터 가져오기 및 표시 (3초 TTL 캐시 함수 사용)
+    st.session_state.cpu_top5_data_cached = get_top_processes(by='cpu')
+    display_top_processes(st.session_state.cpu_top5_data_cached, "CPU Top5")
+
+    # 메모리 Top 5 데이터 가져오기 및 표시 (3초 TTL 캐시 함수 사용)
+    st.session_state.memory_top5_data_cached = get_top_processes(by='memory')
+    display_top_processes(st.session_state.memory_top5_data_cached, "Memory Top5")
 
 
 # --- 레이아웃 구성 ---
 
 # 맨 위 제목 및 시계 영역 (가운데 제목, 오른쪽 시계)
-# 시계가 업데이트될 placeholder를 미리 확보해둬.
-# 시계 업데이트 자체를 강제하는 부분은 별도로 구현하기 어렵지만,
-# placeholder를 사용하면 다음 업데이트 시 해당 위치에 자연스럽게 표시돼.
 title_col, clock_col = st.columns([3, 1]) # 3:1 비율로 컬럼 나누기
 with title_col:
      st.markdown("<h1 style='text-align: center;'>스케줄데쉬보드</h1>", unsafe_allow_html=True) # CSS로 색상 적용
 with clock_col:
-     # 확보된 placeholder에 현재 시간을 표시
-     # st.markdown(f"<h1 style='text-align: right;'>{st.session_state.current_time_cached}</h1>", unsafe_allow_html=True)
-     # Streamlit의 clock 예시처럼 placeholder 사용
-     clock_placeholder = st.empty()
-     clock_placeholder.markdown(f"<h1 style='text-align: right;'>{st.session_state.current_time_cached}</h1>", unsafe_allow_html=True)
+     clock_section()
 
 
 # 메인 컨텐츠 영역 (왼쪽 3/4, 오른쪽 1/4)
@@ -520,32 +540,6 @@ with col3:
         )
         st.session_state.end_time = end_time_widget
 
-    # 실제 쿼리에 사용할 자동/수동 결정 (datetime 객체로 조합)
-    if st.session_state.use_custom_time == "수동":
-        # 선택한 날짜와 시간을 조합하여 datetime 객체 생성
-        try:
-            query_start_datetime = datetime.datetime.combine(st.session_state.start_date, st.session_state.start_time)
-            query_end_datetime = datetime.datetime.combine(st.session_state.end_date, st.session_state.end_time)
-            # 종료 시간이 시작 시간보다 빠르면 경고 (필요시)
-            if query_end_datetime < query_start_datetime:
-                st.warning("⚠️ 종료 시간이 시작 시간보다 빠릅니다.")
-                # 여기서 쿼리 실행을 중지하거나, 범위를 조정하는 로직을 추가할 수 있어.
-                # 일단은 경고만 표시하고 쿼리는 실행하도록 둘게.
-        except Exception as e:
-            st.error(f"🚫 선택 시간 조합 오류: {e}")
-            # 오류 발생 시 쿼리를 실행하지 않도록 빈 datetime 값 설정 또는 함수 종료 등 처리 필요
-            # 여기서는 예시로 현재 시간 기준 24시간 전후로 대체하도록 할게.
-            st.warning("선택 시간 오류로 인해 현재 시간 기준 24시간 전후 데이터로 표시합니다.")
-            now = datetime.datetime.now()
-            query_start_datetime = now - datetime.timedelta(hours=24)
-            query_end_datetime = now + datetime.timedelta(hours=24)
-
-    else:  # OFF (24시간 전후)
-        # 현재 시간 기준 24시간 전후
-        now = datetime.datetime.now()
-        query_start_datetime = now - datetime.timedelta(hours=24)
-        query_end_datetime = now + datetime.timedelta(hours=24)
-
     with search_col1:
         # 스케줄 상태 다중 선택 콤보박스
         selected_statuses_widget = st.multiselect(
@@ -556,44 +550,15 @@ with col3:
         )
         st.session_state.selected_statuses = selected_statuses_widget  # 위젯 값으로 세션 상태 업데이트
 
-    # 스케줄 데이터 가져오기 (캐시 함수 사용)
-    # 위젯 값이 변경되거나 1분(SCHEDULE_DATA_TTL_SEC)이 지나고 스크립트가 재실행되면 데이터를 다시 가져와.
-    st.session_state.schedule_data_graph_cached, st.session_state.schedule_data_table_cached = fetch_schedule_data(
-        dbconn,
-        st.session_state.selected_statuses, # 선택된 상태 리스트
-        query_start_datetime, # 결정된 쿼리 시작 시간 (datetime 객체)
-        query_end_datetime    # 결정된 쿼리 종료 시간 (datetime 객체)
-    )
-
-    # 스케줄 현황 그래프 표시
-    display_schedule_graph(st.session_state.schedule_data_graph_cached, st.session_state.graph_type)
-
-    # 스케줄 현황 테이블 표시
-    display_schedule_table(st.session_state.schedule_data_table_cached)
+    # 스케줄 그래프/테이블 (SCHEDULE_DATA_TTL_SEC 마다 이 섹션만 다시 그림)
+    schedule_section()
 
 
 # --- 오른쪽 컬럼 (상태별 카운트, 시스템 메트릭스, Top 프로세스) ---
 with col1:
     # 상태별 스케줄 카운트 테이블 표시 (스케줄 테이블 데이터를 기반으로 계산)
-    display_status_count_table(st.session_state.schedule_data_table_cached)
-
-    # 시스템 메트릭스 데이터 가져오기 및 표시 (3초 TTL 캐시 함수 사용)
-    # 스크립트 재실행 시 3초가 지났으면 데이터를 다시 가져와.
-    st.session_state.system_metrics_data_cached = get_system_metrics()
-    display_system_metrics(st.session_state.system_metrics_data_cached)
-
-    # CPU Top 5 데이터 가져오기 및 표시 (3초 TTL 캐시 함수 사용)
-    st.session_state.cpu_top5_data_cached = get_top_processes(by='cpu')
-    display_top_processes(st.session_state.cpu_top5_data_cached, "CPU Top5")
-
-    # 메모리 Top 5 데이터 가져오기 및 표시 (3초 TTL 캐시 함수 사용)
-    st.session_state.memory_top5_data_cached = get_top_processes(by='memory')
-    display_top_processes(st.session_state.memory_top5_data_cached, "Memory Top5")
-
-# --- 앱 주기적 업데이트를 위한 루프 ---
-# time.sleep() 후 st.rerun()을 호출하여 스크립트를 다시 실행
-# 이렇게 하면 캐시 TTL에 따라 데이터가 주기적으로 업데이트되는 효과를 낼 수 있어.
-# 이 부분은 스크립트가 완전히 로드된 후에 실행되어야 해.
-time.sleep(CLOCK_DATA_TTL_SEC) # 시계 TTL 주기에 맞춰 대기 (다른 데이터도 같이 업데이트됨)
-st.rerun() # 스크립트를 처음부터 다시 실행
+    status_count_section()
 
+    # 시스템 메트릭스, CPU/메모리 Top 5 (METRICS_DATA_TTL_SEC 마다 각 섹션만 다시 그림)
+    system_metrics_section()
+    top_processes_section()
@@ -2,7 +2,11 @@
 # dash_app 서버 기동 :  dash_app run main.py
 # swagger 페이지 : http://localhost:5000/swagger
 # dash_app 페이지 : http://localhost:8501
-# 시간범위 검색 : GET /tasks?starttime=20250510010101&endtime=20250510110101
+# 시간범위 검색 : GET /tasks?startdate=2025-05-10&enddate=2025-05-11
+# 다음 페이지 : GET /tasks?after_taskid=<이전 응답의 next_after_taskid>&page_size=100
+# 스트리밍 : GET /tasks?format=ndjson
+# 여러 건 등록 : POST /tasks/batch (작업 JSON 배열, ?atomic=true 면 전부 아니면 전무)
+# 변경 알림 : GET /events/tasks (SSE, curl -N 으로 확인)
 '''
 POST 요청 예 :
 curl -X POST http://localhost:5000/tasks \
@@ -13,31 +17,71 @@ curl -X POST http://localhost:5000/tasks \
     "task_status": "Pending"
 }'
 
+여러 작업 한 번에 등록 (응답의 results 에 항목별 status/errors/taskreserveid)
+curl -X POST http://localhost:5000/tasks/batch \
+-H "Content-Type: application/json" \
+-d '[{"taskname": "job_a", "start_date": "2025-06-01", "end_date": "2025-12-31", "frequency": "daily"},
+     {"taskname": "job_b", "start_date": "2025-06-01", "end_date": "2025-12-31", "frequency": "weekly", "specific_weekdays": "0,4"}]'
+
 GET 요청 예 :
 모든 작업 가져오기
 curl -X GET "http://localhost:5000/tasks"
 
 날짜 범위로 필터링
-curl -X GET "http://localhost:5000/tasks?starttime=20250510010101&endtime=20250510110101"
+curl -X GET "http://localhost:5000/tasks?startdate=2025-05-10&enddate=2025-05-11"
+
+다음 페이지 (응답 예: {"items": [...], "page_size": 100, "next_after_taskid": 1234})
+curl -X GET "http://localhost:5000/tasks?after_taskid=1234&page_size=100"
+
+전체를 한 줄에 한 행씩 스트리밍 (NDJSON)
+curl -N -X GET "http://localhost:5000/tasks?format=ndjson"
 
 '''
-from flask import Flask, request, jsonify, make_response
+from flask import Flask, request, jsonify, make_response, Response, stream_with_context
 from flask_restx import Api, Resource, fields
-from datetime import datetime, date, time
-import pandas as pd
+from datetime import datetime, date
+import time as timer
+import json
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import subprocess
 import signal
 import sys
 import oracledb
 from common.dbhandler import DBHandler
 from common.loghandler import LogHandler
-from util.sch_arg_test import generate_schedule_times
+from common.materializer import RollingMaterializer, schedule_times_between, validate_reserve
+from common import taskdao
+from common import queries
+from common.leader import get_leader_status
+from common.changefeed import ChangeFeed
 
 log_handler = LogHandler()
 logger = log_handler.getloghandler("main")
 
 db_handler = DBHandler()
-dbconn = db_handler.get_db_connection(logger)
+# gunicorn 워커 스레드들이 커넥션 하나를 같이 쓰지 않도록 워커 프로세스마다 풀을 하나씩 둬.
+dbpool = db_handler.get_db_pool(logger, name="main")
+# 등록 시에는 앞으로 MATERIALIZE_HORIZON_DAYS 일치 TASK 행만 만들고, 나머지는 sch.py 가 조금씩 늘려가.
+materializer = RollingMaterializer(dbpool, logger)
+
+# GET /tasks 한 페이지 기본 행 수와 최대 행 수
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+# format=ndjson 스트리밍 때 fetchmany 한 번에 가져올 행 수
+STREAM_ARRAYSIZE = 1000
+# POST /tasks/batch 한 번에 받을 작업 수와 스케줄을 펼칠 스레드 수
+MAX_BATCH_SIZE = 500
+BATCH_EXPAND_WORKERS = 4
+# /events/tasks (SSE): 변경이 없을 때 연결 유지용 주석을 보내는 주기(초)와 브라우저 재연결 대기(ms)
+SSE_KEEPALIVE_SEC = 15
+SSE_RETRY_MS = 3000
+# 변경 로그 tail 은 워커 프로세스마다 스레드 하나. 구독자가 몇 명이든 DB 는 그 스레드만 읽어.
+# SSE 연결은 아무 워커에나 붙고 워커끼리는 메모리를 나누지 않아서, 재연결(Last-Event-ID)을 이어주려면
+# 워커마다 자기 버퍼가 있어야 해. 첫 구독자가 올 때만 start() 하니까 폴러는 많아야 워커 수(-w 4)만큼이고,
+# 한 번 읽는 건 seq 인덱스로 마지막 seq 이후만 보는 거라 변경이 없으면 빈 결과야. /health 에 워커별로 나와.
+change_feed = ChangeFeed(dbpool, logger) if dbpool is not None else None
 
 app_name = "TaskScheduleApp"
 app_version = "1.0.0"
@@ -61,6 +105,31 @@ task_model = api.model('Task', {
     'lastchanger': fields.String(required=False, description='마지막 수정자')
 })
 
+# POST /tasks 등록 지연(요청 수신 ~ 커밋, ms) 최근 REGISTRATION_LATENCY_WINDOW 건
+REGISTRATION_LATENCY_WINDOW = 1000
+registration_latencies = deque(maxlen=REGISTRATION_LATENCY_WINDOW)
+registration_lock = threading.Lock()
+
+
+def record_registration_latency(elapsed_ms):
+    with registration_lock:
+        registration_latencies.append(elapsed_ms)
+
+
+def get_registration_latency_stats():
+    """등록 지연 p50/p95/최대 (ms)"""
+    with registration_lock:
+        latencies = sorted(registration_latencies)
+    if not latencies:
+        return {"count": 0}
+    return {
+        "count": len(latencies),
+        "p50_ms": latencies[len(latencies) // 2],
+        "p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+        "max_ms": latencies[-1],
+    }
+
+
 # 백그라운드 프로세스 객체를 저장할 변수
 background_process = None
 
@@ -86,11 +155,75 @@ def health_check():
         }
     }
 
+    # 커넥션 풀 통계 (대기, 타임아웃, 사용중 커넥션 수)
+    if dbpool is None:
+        response_payload["details"]["database"] = {"status": "DOWN", "message": "Connection pool not available"}
+    else:
+        response_payload["details"]["database"] = {"status": "UP", "pool": dbpool.get_stats(),
+                                                   "queries": queries.get_query_stats()}
+    response_payload["details"]["registration"] = get_registration_latency_stats()
+
+    # sch.py 리더 (SCH_LEADER lease). lease 가 끝났는데 넘겨받은 인스턴스가 없으면 디스패치가 멈춘 거야.
+    if dbpool is not None:
+        try:
+            with dbpool.acquire() as dbconn, dbconn.cursor() as cursor:
+                scheduler = get_leader_status(cursor)
+            response_payload["details"]["scheduler"] = scheduler or {"status": "DOWN",
+                                                                     "message": "No scheduler has been elected"}
+        except oracledb.Error as e:
+            response_payload["details"]["scheduler"] = {"status": "UNKNOWN", "message": str(e)}
+
+    # 이 요청을 받은 워커의 tail 만 보여줘 (pid 로 구분). 워커마다 하나씩 있어서 여러 번 불러야 다 보여.
+    if change_feed is not None:
+        response_payload["details"]["change_feed"] = change_feed.get_stats()
+
     # Flask에서 JSON 응답을 보낼 때는 jsonify 함수를 사용하는 게 좋아.
     # Reddit에서도 JSON 형태 반환을 추천하더라고 [[5]](https://www.reddit.com/r/flask/comments/1kolnus/why_does_my_flask_health_endpoint_show_nothing_at/).
     return jsonify(response_payload), status_code
 
 
+@app.route('/events/tasks', methods=['GET'])
+def task_events():
+    """TASK 변경(등록/상태 변경/삭제)을 Server-Sent Events 로 밀어줘.
+
+    event: tasks 의 data 는 변경 배열([{seq, taskid, op, old_status, new_status, starttime, changed_at}])이고
+    id 는 마지막 seq 야. 재연결할 때 브라우저가 보내는 Last-Event-ID 다음부터 이어서 보내고,
+    그 사이 변경을 다 줄 수 없으면 event: reset({last_seq})을 보내니까 받은 쪽은 전체를 다시 읽으면 돼.
+    """
+    if change_feed is None:
+        return jsonify({"message": "데이터베이스 커넥션 풀이 없어서 변경 알림을 쓸 수 없어."}), 503
+    try:
+        change_feed.start()
+    except oracledb.Error as e:
+        logger.info(f"데이터베이스 오류: {e}")
+        return jsonify({"message": f"변경 로그를 읽을 수 없어: {e}"}), 503
+
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('after_seq')
+    try:
+        after_seq = int(last_event_id) if last_event_id else change_feed.last_seq
+    except ValueError:
+        return jsonify({"message": "Last-Event-ID(after_seq)는 숫자여야 해."}), 400
+
+    def generate(after_seq):
+        yield f"retry: {SSE_RETRY_MS}\n\n"
+        while True:
+            events, reset = change_feed.wait(after_seq, timeout=SSE_KEEPALIVE_SEC)
+            if reset:
+                # 빠진 변경이 있어서 목록 대신 지금 위치만 알려줘. 받은 쪽은 전체를 다시 읽어.
+                # 버퍼가 비어 있어도 이 워커의 최신 위치로 옮겨야 다음 대기에서 또 reset 이 나오지 않아.
+                after_seq = max([after_seq, change_feed.last_seq] + [event['seq'] for event in events])
+                yield f"id: {after_seq}\nevent: reset\ndata: {json.dumps({'last_seq': after_seq})}\n\n"
+            elif events:
+                after_seq = events[-1]['seq']
+                yield f"id: {after_seq}\nevent: tasks\ndata: {json.dumps(events)}\n\n"
+            else:
+                yield ": keepalive\n\n"
+
+    # X-Accel-Buffering: nginx 가 모아서 보내지 않고 바로 흘려보내게
+    return Response(stream_with_context(generate(after_seq)), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
 # API 리소스 정의 (이 부분도 그대로!)
 @api.route('/tasks')
 class TaskResource(Resource):
@@ -99,7 +232,7 @@ class TaskResource(Resource):
     @api.response(400, '입력 형식이 잘못되었네.')
     def post(self):
         """새 작업을 등록하는 API"""
-        global dbconn
+        started = timer.perf_counter()
         data = request.json
         if not data:
              return make_response(jsonify({"message": "요청 본문이 비어있거나 JSON 형식이 아니야."}), 400)
@@ -109,82 +242,42 @@ class TaskResource(Resource):
              return make_response(jsonify({"message": "필수 정보(taskname, subprocee_starttime, task_status)가 부족해."}), 400)
 
         try:
-            if dbconn is None:
+            if dbpool is None:
                  return make_response(jsonify({"message": "데이터베이스 연결에 실패했어."}), 500)
 
-            with dbconn.cursor() as cursor:
-                params = {}
-                params['taskname'] = data['taskname']
-                query = f'''SELECT TASKRESERVEID, TASKNAME FROM TESTCHO.TASKRESERVE WHERE TASKNAME = :taskname'''
-                tasks = pd.read_sql(query, dbconn, params=params)
-                if tasks.empty:
-                    cursor.execute(
-                        f'''INSERT INTO TESTCHO.TASKRESERVE (taskname, start_date, end_date, start_time, frequency,
-                        specific_months, specific_weekdays, specific_days_of_month, use_yn, register, "
-                        register, created_at, lastchanged_at) VALUES (:taskname, :start_date, :end_date, :start_time, :frequency, 
-                        :specific_months, :specific_weekdays, :specific_days_of_month, :use_yn, :register, 
-                        CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)''',
-                        taskname=data['taskname'], start_date=data['start_date'], end_date=data['end_date'],
-                        start_time = data.get('start_time'), frequency = data.get('frequency'),
-                        specific_months = data.get('specific_months'), specific_weekdays = data.get('specific_weekdays'),
-                        specific_days_of_month=data.get('specific_days_of_month'), use_yn='C',
-                        register=data.get('register')
-                    )
-                    dbconn.commit()
-                else:
-                    cursor.execute(
-                        f'''UPDATE TESTCHO.TASKRESERVE SET start_date=:start_date, end_date=:end_date,
-                        start_time=:start_time, frequency=:frequency, specific_months=:specific_months,
-                        specific_weekdays=:specific_weekdays, specific_days_of_month=:specific_days_of_month,
-                        use_yn='C', lastchanger=:lastchanger, lastchanged_at=CURRENT_TIMESTAMP "
-                        WHERE taskname = :taskname''',
-                        start_date=data['start_date'], end_date=data['end_date'],
-                        start_time = data['start_time'], frequency = data['frequency'],
-                        specific_months = data['specific_months'], specific_weekdays = data['specific_weekdays'],
-                        specific_days_of_month=data['specific_days_of_month'], lastchanger=data['lastchanger'],
-                        taskname=data['taskname'])
-                    dbconn.commit()
-
-                cursor.execute(f'''DELETE FROM TESTCHO.TASK WHERE taskname = :taskname''',taskname=data['taskname'])
-                dbconn.commit()
-
-                query = f'''SELECT TASKRESERVEID, TASKNAME FROM TESTCHO.TASKRESERVE WHERE TASKNAME = :taskname 
-                        GROUP BY TASKRESERVEID, TASKNAME '''
-                tasks = pd.read_sql(query, dbconn, params=params)
-
-                taskreserveid = tasks['TASKRESERVEID']
+            # 예약 MERGE 와 미래 'R' 발생분 재조정(바뀐 시각만 insert/delete)을 한 트랜잭션으로 묶어서 커밋은 한 번만 해.
+            # 중간에 실패하면 커넥션 반납 때 전부 롤백돼.
+            with dbpool.acquire() as dbconn, dbconn.cursor() as cursor:
                 taskname = data['taskname']
-                start_date = data['start_date']
-                end_date = data['end_date'],
-                start_time = None if data.get('start_time') is None else (time(int(data.get('start_time').split(':')[0]),
-                                                                               int(data.get('start_time').split(':')[1]),
-                                                                               int(data.get('start_time').split(':')[2])))
-                frequency = 'daily' if data.get('frequency') is None else data.get('frequency')
-                specific_months = None if data.get('specific_months') is None else list(map(int,' '.join(str(data.get('specific_months'))).split()))
-                specific_weekdays = None if data.get('specific_weekdays') is None else list(map(int,' '.join(str(data.get('specific_weekdays'))).split()))
-                specific_days_of_month = None if data.get('specific_days_of_month') is None else list(map(int,' '.join(str(data.get('specific_days_of_month'))).split()))
-                scheules = generate_schedule_times(
-                    start_date=start_date,
-                    end_date=end_date,
-                    start_time=start_time,
-                    frequency=frequency,
-                    specific_months=specific_months,
-                    specific_weekdays=specific_weekdays,
-                    specific_days_of_month=specific_days_of_month
-                )
-
-                for s in scheules:
-                    cursor.execute(
-                    f'''INSERT INTO TESTCHO.TASK (taskreserveid, taskname, subprocee_starttime, task_status, 
-                    created_at, lastchanged_at) VALUES (:taskreserveid, :taskname, :subprocee_starttime, 
-                    'R', CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)''',
-                    taskreserveid=taskreserveid, taskname=data['taskname'], subprocee_starttime=s)
+                taskreserveid = taskdao.upsert_reserve(cursor, data)
+
+                # 전체 기간을 한 번에 펼치지 않고, 지금부터 horizon 까지만 TASK 행을 만들어 둬.
+                # 이후 구간은 sch.py 의 RollingMaterializer 가 MATERIALIZED_UNTIL 부터 이어서 채워.
+                # 기존 'R' 행과 비교해서 바뀐 시각만 고치니까 수정 비용은 범위가 아니라 변경 건수에 비례해.
+                now = datetime.now()
+                materialized_until = materializer.horizon_end(now)
+                inserted_rows, deleted_rows, kept_rows = materializer.reschedule(
+                    cursor, taskreserveid, data, now, materialized_until)
                 dbconn.commit()
                 '''
-                sch.py 는 task 테이블에 task_status ='R'이고 subprocee_starttime 이 5초이내 기동대기하여, 정각에 시작시면 됨.
+                sch.py 는 task 테이블에 task_status ='R'인 태스크를 미리 타이머에 올려두고, 정각에 시작시키면 됨.
                 '''
 
-                return make_response(jsonify({"message": "작업이 성공적으로 등록되었어!"}), 201)
+            elapsed_ms = round((timer.perf_counter() - started) * 1000, 2)
+            record_registration_latency(elapsed_ms)
+            logger.info(f"{taskname}: taskreserveid={taskreserveid}, TASK {inserted_rows}건 insert, "
+                        f"{deleted_rows}건 delete, {kept_rows}건 유지, {materialized_until} 까지 ({elapsed_ms} ms)")
+            return make_response(jsonify({"message": "작업이 성공적으로 등록되었어!",
+                                          "taskreserveid": taskreserveid,
+                                          "deleted_rows": deleted_rows,
+                                          "inserted_rows": inserted_rows,
+                                          "kept_rows": kept_rows,
+                                          "materialized_until": materialized_until.strftime('%Y-%m-%d %H:%M:%S'),
+                                          "elapsed_ms": elapsed_ms}), 201)
+        except oracledb.IntegrityError as e:
+            # 같은 taskname 을 동시에 처음 등록하면 ux_taskreserve_taskname 에 걸려
+            logger.info(f"데이터베이스 오류: {e}")
+            return make_response(jsonify({"message": f"같은 이름의 작업이 동시에 등록되고 있어. 다시 시도해줘: {e}"}), 409)
         except oracledb.Error as e:
             logger.info(f"데이터베이스 오류: {e}")
             return make_response(jsonify({"message": f"데이터베이스 작업 중 오류가 발생했어: {e}"}), 500)
@@ -197,115 +290,91 @@ class TaskResource(Resource):
     @api.doc(params={ # Swagger UI에 파라미터 설명을 추가할 수 있어!
         'taskid': {'description': 'Task ID로 필터링 (단일)', 'type': 'string'},
         'taskname': {'description': 'Task 이름으로 필터링', 'type': 'string'},
-        'startdate': {'description': '시작 시간 (YYYYMMDD)', 'type': 'string'},
-        'enddate': {'description': '종료 시간 (YYYYMMDD)', 'type': 'string'},
-        'limit': {'description': '결과 개수 제한 (기본값: all)', 'type': 'integer'} # limit은 integer로 받는 게 좋아!
+        'startdate': {'description': '시작 날짜 (YYYY-MM-DD)', 'type': 'string'},
+        'enddate': {'description': '종료 날짜 (YYYY-MM-DD)', 'type': 'string'},
+        'scope': {'description': "'reserved' 면 TASKRESERVE 조회", 'type': 'string'},
+        'after_taskid': {'description': '이 ID 다음부터 조회 (이전 응답의 next_after_taskid)', 'type': 'integer'},
+        'page_size': {'description': f'한 페이지 행 수 (기본 {DEFAULT_PAGE_SIZE}, 최대 {MAX_PAGE_SIZE})', 'type': 'integer'},
+        'limit': {'description': 'page_size 의 예전 이름', 'type': 'integer'},
+        'format': {'description': "'ndjson' 이면 조건에 맞는 전체 행을 한 줄에 하나씩 스트리밍", 'type': 'string'}
     })
     def get(self):
-        global dbconn
-        """조건에 맞는 작업을 가져오는 API"""
+        """조건에 맞는 작업을 가져오는 API
+
+        taskid(예약은 taskreserveid) 순서의 keyset 페이지로 돌려줘. 응답의 next_after_taskid 를
+        after_taskid 로 넘기면 다음 페이지야. format=ndjson 이면 페이지 없이 fetchmany 배치 단위로 흘려보내.
+        """
         taskid = request.args.get('taskid')
         taskname = request.args.get('taskname')
-        start_date = request.args.get('startdate')  # YYYYMMDDHHMISS 형식
-        end_date = request.args.get('enddate')      # YYYYMMDDHHMISS 형식
-        limit_str = request.args.get('limit', default='all') # 문자열로 받아서 처리
+        start_date = request.args.get('startdate')  # YYYY-MM-DD 형식
+        end_date = request.args.get('enddate')      # YYYY-MM-DD 형식
         scope = request.args.get('scope')
+        stream = request.args.get('format') == 'ndjson' or request.accept_mimetypes.best == 'application/x-ndjson'
 
-        if scope == 'reaerved':
-            query = ("SELECT taskreserveid, taskname, start_date, end_date, start_time, frequency, specific_months," +
-                     "specific_weekdays, specific_days_of_month, use_yn, register, lastchanger, created_at, "
-                     "lastchanged_at   FROM TESTCHO.TASKRESERVE WHERE 1=1")
-            params = {}
-
-            if taskid:
-                query += " AND taskid = :taskid"
-                params['taskid'] = taskid
-            if taskname:
-                query += " AND taskname = :taskname"
-                params['taskname'] = taskname
-            if start_date:
-                # 입력 형식 확인 (최소한 길이)
-                if len(start_date) == 10:
-                    # YYYY-MM-DD HH24:MI:SS 형식으로 변환
-                    starttime_formatted = f"{start_date[:4]}-{start_date[5:7]}-{start_date[8:10]} 00:00:00"
-                    query += " AND lastchanged_at >= TO_DATE(:starttime, 'YYYY-MM-DD HH24:MI:SS')"
-                    params['starttime'] = starttime_formatted
-                else:
-                    # 시간 형식 오류 처리
-                    return make_response(jsonify({"message": "startdate 형식이 YYYY-MM-DD 여야 해!"}), 400)
-
-            if end_date:
-                # 입력 형식 확인 (최소한 길이)
-                if len(end_date) == 10:
-                    endtime_formatted = f"{end_date[:4]}-{end_date[4:6]}-{end_date[6:8]} 23:59:59"
-                    query += " AND lastchanged_at < TO_DATE(:endtime, 'YYYY-MM-DD HH24:MI:SS')"
-                    params['endtime'] = endtime_formatted
-                else:
-                    # 시간 형식 오류 처리
-                    return make_response(jsonify({"message": "enddate 형식이 YYYY-MM-DD 여야 해!"}), 400)
-
-            if limit_str != 'all':
-                try:
-                    limit = int(limit_str)
-                    query += " AND ROWNUM <= :limit"
-                    query += " ORDER BY taskid ASC"
-                    params['limit'] = limit
-                except ValueError:
-                    return make_response(jsonify({"message": "limit은 'all' 이거나 숫자로 입력해야 해!"}), 400)
+        # SQL 텍스트는 common/queries.py 에 고정돼 있고, 안 쓰는 조건은 NULL 로 바인딩해서 꺼
+        if scope in ('reserved', 'reaerved'):
+            key_column = "TASKRESERVEID"
+            query_prefix = "reserve"
         else:
-            query = "SELECT TASKID, TASKRESERVEID, TASKNAME, SUBPROCEE_STARTTIME, TASK_STATUS FROM TESTCHO.TASK WHERE 1=1"
-            params = {}
+            key_column = "TASKID"
+            query_prefix = "task"
+        params = {'key_id': None, 'taskname': taskname or None, 'starttime': None, 'endtime': None}
 
+        try:
             if taskid:
-                query += " AND taskid = :taskid"
-                params['taskid'] = taskid
-            if taskname:
-                query += " AND taskname = :taskname"
-                params['taskname'] = taskname
+                params['key_id'] = int(taskid)
             if start_date:
-                # 입력 형식 확인 (최소한 길이)
-                if len(start_date) == 10:
-                    # YYYY-MM-DD HH24:MI:SS 형식으로 변환
-                    starttime_formatted = f"{start_date[:4]}-{start_date[5:7]}-{start_date[8:10]} 00:00:00"
-                    query += " AND subprocee_starttime >= TO_DATE(:starttime, 'YYYY-MM-DD HH24:MI:SS')"
-                    params['starttime'] = starttime_formatted
-                else:
-                    # 시간 형식 오류 처리
-                    return make_response(jsonify({"message": "startdate 형식이 YYYY-MM-DD 여야 해!"}), 400)
-
-            if end_date:
-                # 입력 형식 확인 (최소한 길이)
-                if len(end_date) == 10:
-                    endtime_formatted = f"{end_date[:4]}-{end_date[4:6]}-{end_date[6:8]} 23:59:59"
-                    query += " AND subprocee_starttime < TO_DATE(:endtime, 'YYYY-MM-DD HH24:MI:SS')"
-                    params['endtime'] = endtime_formatted
-                else:
-                    # 시간 형식 오류 처리
-                    return make_response(jsonify({"message": "enddate 형식이 YYYY-MM-DD 여야 해!"}), 400)
-
-            if limit_str != 'all':
-                try:
-                    limit = int(limit_str)
-                    query += " AND ROWNUM <= :limit"
-                    query += " ORDER BY taskid ASC"
-                    params['limit'] = limit
-                except ValueError:
-                    return make_response(jsonify({"message": "limit은 'all' 이거나 숫자로 입력해야 해!"}), 400)
+                params['starttime'] = datetime.strptime(start_date, '%Y-%m-%d')
+        except ValueError:
+            return make_response(jsonify({"message": "taskid 는 숫자, startdate 형식은 YYYY-MM-DD 여야 해!"}), 400)
+        if end_date:
+            try:
+                params['endtime'] = datetime.strptime(end_date, '%Y-%m-%d').replace(hour=23, minute=59, second=59)
+            except ValueError:
+                # 시간 형식 오류 처리
+                return make_response(jsonify({"message": "enddate 형식이 YYYY-MM-DD 여야 해!"}), 400)
+
         try:
-            if dbconn is None:
-                 return make_response(jsonify({"message": "데이터베이스 연결에 실패했어."}), 500)
+            after_str = request.args.get('after_taskid')
+            after_id = int(after_str) if after_str else None
+            page_size = int(request.args.get('page_size') or request.args.get('limit') or DEFAULT_PAGE_SIZE)
+        except ValueError:
+            return make_response(jsonify({"message": "after_taskid, page_size 는 숫자로 입력해야 해!"}), 400)
+        if page_size < 1:
+            return make_response(jsonify({"message": "page_size 는 1 이상이어야 해!"}), 400)
+        page_size = min(page_size, MAX_PAGE_SIZE)
+
+        # keyset 조건: OFFSET 없이 인덱스(PK)를 타고 바로 다음 행부터 읽어
+        params['after_id'] = after_id
+
+        if dbpool is None:
+             return make_response(jsonify({"message": "데이터베이스 연결에 실패했어."}), 500)
 
-            # pandas.read_sql은 oracledb 커넥션 객체를 직접 받을 수 있어.
-            tasks = pd.read_sql(query, dbconn, params=params)
+        if stream:
+            return Response(stream_with_context(stream_ndjson(f"{query_prefix}.list_stream", params)),
+                            mimetype='application/x-ndjson')
 
-            if tasks.empty:
+        try:
+            # 다음 페이지가 있는지 알기 위해 한 행 더 읽어
+            params['page_size'] = page_size + 1
+            with dbpool.acquire() as dbconn, dbconn.cursor() as cursor:
+                cursor.arraysize = page_size + 1
+                cursor.prefetchrows = page_size + 2
+                queries.execute(cursor, f"{query_prefix}.list_page", params)
+                columns = [d[0] for d in cursor.description]
+                rows = cursor.fetchall()
+
+            if not rows and after_id is None:
                 # 200 OK with empty list vs 404 Not Found 중 어떤 것이 좋을지는 API 설계에 따라 달라.
                 # 예시 코드에선 404를 반환했으니 그대로 404로 갈게!
                 return make_response(jsonify({"message": "조건에 맞는 작업을 찾지 못했어."}), 404)
 
-            tasks['SUBPROCEE_STARTTIME'] = tasks['SUBPROCEE_STARTTIME'].dt.strftime('%Y-%m-%d %H:%M:%S')
-
-            return make_response(jsonify(tasks.to_dict(orient='records')), 200)
+            has_more = len(rows) > page_size
+            items = [row_to_dict(columns, row) for row in rows[:page_size]]
+            next_after_id = items[-1][key_column] if has_more else None
+            return make_response(jsonify({"items": items,
+                                          "page_size": page_size,
+                                          "next_after_taskid": next_after_id}), 200)
         except oracledb.Error as e:
             logger.info(f"데이터베이스 오류: {e}")
             return make_response(jsonify({"message": f"데이터베이스 작업 중 오류가 발생했어: {e}"}), 500)
@@ -313,6 +382,128 @@ class TaskResource(Resource):
              logger.info(f"예상치 못한 오류 발생: {e}")
              return make_response(jsonify({"message": f"작업 조회 중 예상치 못한 오류가 발생했어: {e}"}), 500)
 
+
+@api.route('/tasks/batch')
+class TaskBatchResource(Resource):
+    @api.expect([task_model])
+    @api.response(201, '모든 작업이 등록되었어!')
+    @api.response(207, '일부만 등록되었어. results 에서 항목별 결과를 확인해.')
+    @api.response(400, '등록된 작업이 없어. results 에서 항목별 오류를 확인해.')
+    @api.response(409, 'atomic=true 인데 실패한 항목이 있어서 아무것도 등록하지 않았어.')
+    @api.response(413, '한 번에 등록할 수 있는 작업 수를 넘었어.')
+    @api.doc(params={
+        'atomic': {'description': "'true' 면 하나라도 실패할 때 전체를 등록하지 않음 (기본: 성공한 항목만 등록)", 'type': 'string'},
+    })
+    def post(self):
+        """작업 여러 개를 한 번에 등록하는 API (검사 -> 스케줄 펼치기 -> array DML 한 트랜잭션)"""
+        started = timer.perf_counter()
+        items = request.get_json(silent=True)
+        if not isinstance(items, list) or not items:
+            return make_response(jsonify({"message": "요청 본문은 작업(task_model) JSON 배열이어야 해."}), 400)
+        if len(items) > MAX_BATCH_SIZE:
+            return make_response(jsonify({"message": f"한 번에 {MAX_BATCH_SIZE}건까지만 등록할 수 있어."}), 413)
+        atomic = request.args.get('atomic', 'false').lower() == 'true'
+
+        # 1. DB 에 가기 전에 전부 검사해. batch 안에서 taskname 이 겹치면 뒤에 나온 항목이 실패야.
+        results = [{"index": i, "taskname": item.get('taskname') if isinstance(item, dict) else None}
+                   for i, item in enumerate(items)]
+        seen = set()
+        for result, item in zip(results, items):
+            errors = validate_reserve(item) if isinstance(item, dict) else ["작업은 JSON 객체여야 해."]
+            if not errors and item['taskname'] in seen:
+                errors = ["같은 taskname 이 batch 안에 이미 있어."]
+            if errors:
+                result.update(status="error", errors=errors)
+            else:
+                seen.add(item['taskname'])
+        valid = [r["index"] for r in results if "errors" not in r]
+        if not valid or (atomic and len(valid) < len(items)):
+            return batch_response("검사를 통과하지 못한 작업이 있어서 아무것도 등록하지 않았어.", results, 400)
+        if dbpool is None:
+            return make_response(jsonify({"message": "데이터베이스 연결에 실패했어."}), 500)
+
+        # 2. horizon 까지 스케줄 펼치기는 DB 와 상관없으니 트랜잭션을 열기 전에 스레드로 나눠서 해.
+        now = datetime.now()
+        materialized_until = materializer.horizon_end(now)
+        with ThreadPoolExecutor(max_workers=BATCH_EXPAND_WORKERS) as executor:
+            expanded = executor.map(lambda i: schedule_times_between(items[i], now, materialized_until), valid)
+            schedules = dict(zip(valid, expanded))
+
+        # 3. MERGE, 미래 'R' 행 재조정을 문장마다 executemany 한 번씩, 커밋은 한 번만 해.
+        #    MERGE 에서 실패한 항목(batcherrors)만 빠지고 나머지는 그대로 등록돼. DB 오류가 나면 전부 롤백.
+        try:
+            with dbpool.acquire() as dbconn, dbconn.cursor() as cursor:
+                written = []
+                upserted = taskdao.upsert_reserves(cursor, [items[i] for i in valid])
+                for i, (taskreserveid, error) in zip(valid, upserted):
+                    if error:
+                        results[i].update(status="error", errors=[error])
+                    else:
+                        results[i]["taskreserveid"] = taskreserveid
+                        written.append(i)
+                if atomic and len(written) < len(valid):
+                    dbconn.rollback()
+                    for i in written:
+                        del results[i]["taskreserveid"]
+                    return batch_response("실패한 작업이 있어서 아무것도 등록하지 않았어.", results, 409)
+
+                counts = materializer.reschedule_many(
+                    cursor, [(results[i]["taskreserveid"], items[i]['taskname'], schedules[i]) for i in written],
+                    now, materialized_until)
+                for i, (inserted_rows, deleted_rows, kept_rows) in zip(written, counts):
+                    results[i].update(status="ok", inserted_rows=inserted_rows, deleted_rows=deleted_rows,
+                                      kept_rows=kept_rows)
+                dbconn.commit()
+        except oracledb.Error as e:
+            logger.info(f"데이터베이스 오류: {e}")
+            return make_response(jsonify({"message": f"데이터베이스 작업 중 오류가 발생해서 아무것도 등록하지 않았어: {e}"}), 500)
+        except Exception as e:
+             logger.info(f"예상치 못한 오류 발생: {e}")
+             return make_response(jsonify({"message": f"작업 등록 중 예상치 못한 오류가 발생했어: {e}"}), 500)
+
+        elapsed_ms = round((timer.perf_counter() - started) * 1000, 2)
+        logger.info(f"batch 등록: {len(written)}/{len(items)}건 성공, "
+                    f"TASK {sum(c[0] for c in counts)}건 insert, {materialized_until} 까지 ({elapsed_ms} ms)")
+        if not written:
+            return batch_response("등록된 작업이 없어.", results, 400, elapsed_ms=elapsed_ms)
+        status_code = 201 if len(written) == len(items) else 207
+        return batch_response("작업이 등록되었어!" if status_code == 201 else "일부 작업만 등록되었어.", results,
+                              status_code, materialized_until=materialized_until.strftime('%Y-%m-%d %H:%M:%S'),
+                              elapsed_ms=elapsed_ms)
+
+
+def batch_response(message, results, status_code, **extra):
+    """POST /tasks/batch 응답. 전체/성공/실패 건수와 항목별 결과(results)를 같이 돌려줘."""
+    succeeded = sum(1 for r in results if r.get("status") == "ok")
+    return make_response(jsonify({"message": message, "total": len(results), "succeeded": succeeded,
+                                  "failed": len(results) - succeeded, **extra, "results": results}), status_code)
+
+
+def row_to_dict(columns, row):
+    """조회 결과 한 행을 JSON 으로 보낼 dict 로. 날짜/시각은 'YYYY-MM-DD HH:MI:SS' 문자열로 바꿔."""
+    return {column: value.strftime('%Y-%m-%d %H:%M:%S') if isinstance(value, (datetime, date)) else value
+            for column, value in zip(columns, row)}
+
+
+def stream_ndjson(query_name, params):
+    """쿼리 결과를 fetchmany 배치 단위로 꺼내서 한 줄에 한 행씩 JSON 으로 흘려보내.
+    DataFrame 이나 전체 리스트를 만들지 않아서 테이블이 커져도 메모리와 첫 응답 시간이 일정해."""
+    try:
+        with dbpool.acquire() as dbconn, dbconn.cursor() as cursor:
+            cursor.arraysize = STREAM_ARRAYSIZE
+            cursor.prefetchrows = STREAM_ARRAYSIZE + 1
+            queries.execute(cursor, query_name, params)
+            columns = [d[0] for d in cursor.description]
+            while True:
+                rows = cursor.fetchmany()
+                if not rows:
+                    break
+                yield "".join(json.dumps(row_to_dict(columns, row), ensure_ascii=False) + "\n" for row in rows)
+    except oracledb.Error as e:
+        # 헤더는 이미 나갔으니 마지막 줄로 오류를 알려줘
+        logger.info(f"데이터베이스 오류: {e}")
+        yield json.dumps({"error": f"데이터베이스 작업 중 오류가 발생했어: {e}"}, ensure_ascii=False) + "\n"
+
 # sch.py를 백그라운드로 실행하는 함수
 def run_sch_background():
     """sch.py 파이썬 스크립트를 백그라운드로 실행합니다."""
@@ -365,6 +556,10 @@ def signal_handler(sig, frame):
     logger.info(f"시그널 {sig} 수신, 종료 시작.")
     global background_process
     kill_processes(background_process)
+    if change_feed is not None:
+        change_feed.stop()
+    if dbpool is not None:
+        dbpool.close()
     logger.info("애플리케이션 종료.")
     sys.exit(0)
 
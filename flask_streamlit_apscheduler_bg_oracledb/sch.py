@@ -1,64 +1,190 @@
-import schedule
 import time
 import sys
 import pandas as pd
-import subprocess
+import signal
 import threading
-from datetime import datetime
+from datetime import datetime, timedelta
 from common.loghandler import LogHandler
 from common.dbhandler import DBHandler
+from common.tasktimer import TaskTimer
+from common.tasklauncher import TaskLauncher
+from common.statuswriter import StatusWriter
+from common.materializer import RollingMaterializer
+from common.runnerpool import RunnerPool
+from common.procsupervisor import ProcessSupervisor
+from common.taskclaim import TaskClaimer
+from common.leader import LeaderElector, LEADER_HEARTBEAT_SEC
+from common import queries
 
 log_handler = LogHandler()
 logger = log_handler.getloghandler("sch")
 
 db_handler = DBHandler()
-dbconn = db_handler.get_db_connection(logger)
-
-# Set to track active task threads by task_id
-active_task_threads = set()
-# Lock for thread-safe access to active_task_threads
+# Worker threads check out their own connection instead of sharing a single one
+dbpool = db_handler.get_db_pool(logger, name="sch")
+
+# Set to track tasks queued on or running in the launcher by task_id
+active_tasks = set()
+# taskids this instance claimed whose app.py has not finished yet; only these leases are renewed
+running_tasks = set()
+# Lock for thread-safe access to active_tasks
 thread_lock = threading.Lock()
 
-
-def fetch_tasks():
-    global dbconn
-    # Select tasks ready to run (status 'R') and whose start time is now or in the past
-    query = ("SELECT taskid, taskname, subprocee_starttime, task_status FROM TESTCHO.TASK " +
-             "WHERE task_status = 'R' AND subprocee_starttime BETWEEN SYSDATE AND (SYSDATE + INTERVAL '5' SECOND")
-    try:
-        tasks_df = pd.read_sql(query, dbconn)
-        return tasks_df
-    except Exception as e:
-        logger.error(f"fetch_tasks query failed: {e}", exc_info=True)
-        return pd.DataFrame()
+# Max number of tasks launched concurrently by the launcher thread pool
+LAUNCH_MAX_WORKERS = 16
+# Max number of due tasks waiting for a launcher thread before the dispatcher blocks (backpressure)
+LAUNCH_QUEUE_SIZE = 1000
+# Bounded launcher, created in main()
+task_launcher = None
+
+# Status transitions are batched for this long and written in order with executemany + one commit
+STATUS_FLUSH_INTERVAL_SEC = 0.2
+# Batched status writer, created in main()
+status_writer = None
+
+# 'subprocess': one `python app.py <taskid>` per task, 'pool': hand tasks to warm `app.py --worker` processes
+RUNNER_MODE = 'pool'
+# Number of warm app.py worker processes kept running in pool mode
+RUNNER_POOL_SIZE = 8
+# A worker is replaced after this many tasks so leaked memory/handles do not accumulate
+RUNNER_MAX_TASKS_PER_WORKER = 200
+# A pooled task still running after this long is failed ('F') and its worker killed and replaced
+RUNNER_TASK_TIMEOUT_SEC = 3600
+# Warm worker pool, created in main() when RUNNER_MODE == 'pool'
+runner_pool = None
+# Drains output into logs/tasks/task_<taskid>.log and reaps app.py children, created in main() when
+# RUNNER_MODE == 'subprocess'
+process_supervisor = None
+# How long shutdown waits for running app.py children so their exit is still recorded
+SUPERVISOR_SHUTDOWN_TIMEOUT_SEC = 30
+
+# Claims due rows (SELECT ... FOR UPDATE SKIP LOCKED + owner/lease) so several sch instances can run side by side,
+# created in main()
+task_claimer = None
+
+# 'all': every instance claims due tasks (claims keep them from double-launching),
+# 'leader': only the elected leader dispatches and the others stay hot standby (timer and runner pool kept warm)
+DISPATCH_MODE = 'all'
+# Leader election over the SCH_LEADER lease row, created in main(). Materialization always runs on the leader only.
+leader_elector = None
+
+# How often TASK rows are materialized forward from TASKRESERVE (see common/materializer.py)
+MATERIALIZE_INTERVAL_SEC = 600
+materializer = RollingMaterializer(dbpool, logger)
+
+# How far ahead 'R' tasks are preloaded into the in-memory timer
+LOOKAHEAD_SEC = 3600
+# How often the look-ahead window is extended and changed rows are merged in
+REFRESH_INTERVAL_SEC = 30
+# Overlap applied to the lastchanged_at high-water mark so no change is missed between refreshes
+REFRESH_OVERLAP_SEC = 5
+# Tasks whose start time passed less than this many seconds ago are still fired (late registrations)
+MISFIRE_GRACE_SEC = 300
+
+# Min-heap of pending tasks keyed on SUBPROCEE_STARTTIME
+task_timer = TaskTimer()
+# taskid -> start time of tasks already handed to a worker, so a refresh cannot re-queue them
+dispatched_tasks = {}
+# Upper bound of the window already loaded into task_timer
+loaded_until = None
+# lastchanged_at high-water mark for incremental refresh
+last_refresh_at = None
+
+
+def fetch_tasks(window_start, window_end):
+    """Select 'R' tasks whose start time falls in [window_start, window_end). DB errors propagate."""
+    with dbpool.acquire() as conn, conn.cursor() as cursor:
+        queries.execute(cursor, "task.fetch_due", window_start=window_start, window_end=window_end)
+        columns = [d[0] for d in cursor.description]
+        return pd.DataFrame(cursor.fetchall(), columns=columns)
+
+
+def fetch_changed_tasks(since, window_start, window_end):
+    """Select tasks in the loaded window (any status) that changed since the last refresh. DB errors propagate."""
+    with dbpool.acquire() as conn, conn.cursor() as cursor:
+        queries.execute(cursor, "task.fetch_changed", since=since, window_start=window_start,
+                        window_end=window_end)
+        columns = [d[0] for d in cursor.description]
+        return pd.DataFrame(cursor.fetchall(), columns=columns)
+
+
+def load_into_timer(tasks):
+    """Schedule 'R' rows on the timer and drop rows that are no longer 'R'."""
+    scheduled = 0
+    for _, row in tasks.iterrows():
+        task_id = row['TASKID']
+        start_time = pd.Timestamp(row['SUBPROCEE_STARTTIME']).to_pydatetime()
+        if row['TASK_STATUS'] != 'R':
+            if task_timer.cancel(task_id):
+                logger.info(f"taskid={task_id} left status 'R' ({row['TASK_STATUS']}), removed from timer.")
+            continue
+        if dispatched_tasks.get(task_id) == start_time:
+            continue
+        task_timer.schedule(task_id, start_time, row.to_dict())
+        scheduled += 1
+    return scheduled
+
+
+def preload_tasks():
+    """Load the next LOOKAHEAD_SEC of 'R' tasks (plus recent misfires) into the timer."""
+    global loaded_until, last_refresh_at
+    now = datetime.now()
+    window_start = now - timedelta(seconds=MISFIRE_GRACE_SEC)
+    window_end = now + timedelta(seconds=LOOKAHEAD_SEC)
+    scheduled = load_into_timer(fetch_tasks(window_start, window_end))
+    loaded_until = window_end
+    last_refresh_at = now
+    logger.info(f"Preloaded {scheduled} tasks up to {window_end} (timer size={len(task_timer)})")
+
+
+def refresh_tasks():
+    """Extend the look-ahead window and merge rows changed since the last refresh.
+
+    The high-water marks only move after both reads succeed, so a failed refresh is retried over the same
+    window next time instead of skipping it.
+    """
+    global loaded_until, last_refresh_at
+    if loaded_until is None:
+        # The startup preload failed; nothing is loaded yet
+        preload_tasks()
+        return
+    now = datetime.now()
+    window_start = now - timedelta(seconds=MISFIRE_GRACE_SEC)
+    window_end = now + timedelta(seconds=LOOKAHEAD_SEC)
+    since = last_refresh_at - timedelta(seconds=REFRESH_OVERLAP_SEC)
+
+    # Newly entered slice of the window, then anything inserted/updated inside the loaded window
+    scheduled = load_into_timer(fetch_tasks(loaded_until, window_end))
+    scheduled += load_into_timer(fetch_changed_tasks(since, window_start, window_end))
+    loaded_until = window_end
+    last_refresh_at = now
+
+    # Dispatched entries older than the window can no longer come back from a query
+    for task_id, start_time in list(dispatched_tasks.items()):
+        if start_time < window_start:
+            del dispatched_tasks[task_id]
+
+    if scheduled:
+        logger.info(f"Refresh scheduled {scheduled} tasks (timer size={len(task_timer)})")
 
 
 def update_task_status(taskid, status):
-    global dbconn
+    """Queue a status transition; status_writer flushes it with the rest of the current batch."""
     try:
-        with dbconn.cursor() as cursor:
-            cursor.execute("""
-                UPDATE TESTCHO.TASK
-                SET task_status = :status,
-                    changed_at = CURRENT_TIMESTAMP
-                WHERE taskid = :taskid
-            """, status=status, taskid=taskid)
-            dbconn.commit()
-            logger.info(f"taskid={taskid} status updated to '{status}'")
+        status_writer.put(taskid, status)
+        logger.info(f"taskid={taskid} status update to '{status}' queued")
     except Exception as e:
-        logger.error(f"Failed to update status for taskid={taskid}: {e}", exc_info=True)
+        logger.error(f"Failed to queue status update for taskid={taskid}: {e}", exc_info=True)
 
 
 def run_app_py(taskid):
-    """Run the app.py script with taskid as argument."""
+    """Run the app.py script with taskid as argument under the process supervisor."""
     try:
         taskid_str = str(taskid)
         logger.info(f"Attempting to run app.py for taskid={taskid_str}")
 
-        process = subprocess.Popen(["python", "app.py", taskid_str],
-                                   start_new_session=True,  # Run in new session to detach
-                                   stdout=subprocess.PIPE,
-                                   stderr=subprocess.PIPE)
+        # Output is drained into a per-task log file and the child is reaped when it exits
+        process = process_supervisor.spawn(taskid, [sys.executable, "app.py", taskid_str])
 
         logger.info(f"app.py process started with PID: {process.pid} (taskid={taskid})")
         return process
@@ -71,26 +197,24 @@ def run_app_py(taskid):
 
 
 def task_worker(task_data):
-    """Thread worker function to process a single task."""
+    """Launcher worker function to process a single task."""
 
     task_id = task_data['TASKID']
     start_time = task_data['SUBPROCEE_STARTTIME']
 
-    logger.info(f"Thread for taskid={task_id} started. Scheduled time: {start_time}")
+    logger.info(f"Launch of taskid={task_id} started. Scheduled time: {start_time}")
 
     try:
-        now = datetime.now()
-        if now < start_time:
-            wait_seconds = (start_time - now).total_seconds()
-            if wait_seconds > 0:
-                logger.info(f"taskid={task_id} waiting for {wait_seconds:.2f} seconds...")
-                time.sleep(wait_seconds)
-                logger.info(f"taskid={task_id} wait complete.")
-
-        logger.info(f"taskid={task_id} execution time reached or passed. Preparing to run.")
+        # task_timer only hands over tasks whose start time has been reached
+        delay = (datetime.now() - start_time).total_seconds()
+        logger.info(f"taskid={task_id} execution time reached ({delay:.3f}s after schedule). Preparing to run.")
 
-        # Update status to 'In progress'
-        update_task_status(task_id, 'I')
+        # Status is already 'I' (written together with owner/lease_until when the row was claimed)
+        if runner_pool:
+            # Blocks while the runner pool queue is full
+            runner_pool.submit(task_id)
+            logger.info(f"taskid={task_id} handed to runner pool.")
+            return
 
         # Run the subprocess
         process = run_app_py(task_id)
@@ -99,71 +223,269 @@ def task_worker(task_data):
             logger.info(f"app.py execution started for taskid={task_id}. PID: {process.pid}")
         else:
             logger.error(f"app.py execution failed to start for taskid={task_id}.")
+            release_task(task_id)
 
     except Exception as e:
         logger.error(f"Error processing taskid={task_id}: {e}", exc_info=True)
+        release_task(task_id)
     finally:
-        # Remove task_id from active set upon thread completion
+        # Remove task_id from active set upon launch completion
         with thread_lock:
-            if task_id in active_task_threads:
-                active_task_threads.remove(task_id)
+            if task_id in active_tasks:
+                active_tasks.remove(task_id)
                 logger.info(f"taskid={task_id} removed from active set.")
 
-        logger.info(f"Thread for taskid={task_id} finished.")
+        logger.info(f"Launch of taskid={task_id} finished.")
+
+
+def launch_task(task_id, taskname, start_time):
+    """Hand a task this instance has claimed to the launcher."""
+    # The row may have been claimed before this instance's own timer fired for it
+    task_timer.cancel(task_id)
+    dispatched_tasks[task_id] = start_time
+
+    with thread_lock:
+        if task_id in active_tasks:
+            return
+        active_tasks.add(task_id)
+        running_tasks.add(task_id)
+    task_data = {'TASKID': task_id, 'TASKNAME': taskname, 'SUBPROCEE_STARTTIME': start_time, 'TASK_STATUS': 'I'}
+    # Blocks while the launcher queue is full, so a busy instance stops claiming and leaves rows to the others
+    task_launcher.submit(task_data, start_time)
+    logger.info(f"Queued taskid={task_id} on launcher.")
+
+
+def claim_and_launch():
+    """Claim due 'R' rows batch by batch and launch the ones this instance got.
 
+    Rows locked by another scheduler instance are skipped, so concurrent instances split the due tasks
+    between them and each row is launched exactly once.
+    """
+    window_start = datetime.now() - timedelta(seconds=MISFIRE_GRACE_SEC)
+    while True:
+        rows = task_claimer.claim_due(window_start)
+        for task_id, taskname, start_time in rows:
+            launch_task(task_id, taskname, start_time)
+        if len(rows) < task_claimer.batch_size:
+            return
 
-def check_and_run_tasks():
-    """Fetches ready tasks and starts a thread for each."""
+
+def sweep_claims():
+    """Renew this instance's leases, take over expired ones and pick up due rows nobody has claimed yet."""
     try:
-        tasks = fetch_tasks()
+        with thread_lock:
+            running = list(running_tasks)
+        task_claimer.renew(running)
+        for task_id, taskname, start_time in task_claimer.claim_expired():
+            launch_task(task_id, taskname, start_time)
+        claim_and_launch()
+    except Exception as e:
+        logger.error(f"Error in sweep_claims: {e}", exc_info=True)
 
-        if not tasks.empty:
-            for index, row in tasks.iterrows():
-                task_id = row['TASKID']
 
-                with thread_lock:
-                    if task_id not in active_task_threads:
-                        thread = threading.Thread(target=task_worker, args=(row,))
-                        thread.daemon = True  # Allow main thread to exit even if this thread is running
-                        thread.start()
-                        active_task_threads.add(task_id)
-                        logger.info(f"Started new thread for taskid={task_id}.")
+def is_dispatching():
+    """Whether this instance claims and launches tasks right now."""
+    return DISPATCH_MODE == 'all' or leader_elector.is_leader()
 
-        # Log the number of tasks currently being handled by threads
+
+def dispatch_due_tasks(timeout):
+    """Waits up to timeout seconds for due tasks on the timer, then claims and launches them."""
+    try:
+        # The timer is only the wake-up; which rows this instance runs is decided by the claim
+        due = task_timer.pop_due(timeout)
+        for task_id, start_time, _ in due:
+            dispatched_tasks[task_id] = start_time
+        if due and is_dispatching():
+            claim_and_launch()
+
+        # Log the number of tasks currently queued or running in the launcher
         with thread_lock:
-            if len(active_task_threads) > 0:
-                logger.info(f"===== Number of active task threads: {len(active_task_threads)} =====")
+            if len(active_tasks) > 0:
+                logger.info(f"===== Number of active tasks: {len(active_tasks)} =====")
 
     except Exception as e:
-        logger.error(f"Error in check_and_run_tasks: {e}", exc_info=True)
+        logger.error(f"Error in dispatch_due_tasks: {e}", exc_info=True)
 
 
-def main():
-    logger.info("sch scheduler (using schedule library) starting...")
+def materialize_reservations():
+    """Extend each reservation's TASK rows up to the rolling horizon."""
+    try:
+        inserted = materializer.run()
+        if inserted:
+            logger.info(f"Materialized {inserted} new tasks up to {materializer.horizon_end()}")
+    except Exception as e:
+        logger.error(f"Error in materialize_reservations: {e}", exc_info=True)
 
-    # Schedule check_and_run_tasks to run every 5 seconds
-    schedule.every(5).seconds.do(check_and_run_tasks)
+
+def record_task_exit(taskid, usage, fail_unfinished=False):
+    """Write exit code, wall/CPU time and max RSS of a finished app.py run into TASK.
+
+    With fail_unfinished, a row app.py left in 'I' is failed ('F') in the same transaction.
+    """
+    try:
+        with dbpool.acquire() as conn, conn.cursor() as cursor:
+            if fail_unfinished:
+                queries.execute(cursor, "task.fail_unfinished", taskid=int(taskid))
+                if cursor.rowcount:
+                    logger.error(f"taskid={taskid}: app.py exited with {usage['exit_code']} without a final "
+                                 f"status, marked 'F'")
+            queries.execute(cursor, "task.record_exit", dict(usage, taskid=int(taskid)))
+            conn.commit()
+    except Exception as e:
+        logger.error(f"Failed to record exit of taskid={taskid} ({usage}): {e}", exc_info=True)
+
+
+def release_task(taskid):
+    """taskid no longer runs here, so its lease is not renewed any more."""
+    with thread_lock:
+        running_tasks.discard(int(taskid))
+
+
+def on_task_done(taskid, usage):
+    """A pooled worker finished (or crashed on) taskid."""
+    release_task(taskid)
+    record_task_exit(taskid, usage)
+
+
+def on_app_exit(taskid, usage):
+    """A supervised app.py child was reaped."""
+    release_task(taskid)
+    # Killed by a signal, or exited nonzero (no pool, no connection, crash) before app.py recorded its own
+    # status: fail the row here instead of letting its lease expire and another claim relaunch it
+    record_task_exit(taskid, usage, fail_unfinished=usage['exit_code'] != 0)
+
+
+def on_runner_crash(taskid):
+    """A pooled worker died or timed out while running taskid; only that task is failed."""
+    update_task_status(int(taskid), 'F')
+
+
+def handle_sigterm(sig, frame):
+    # Turn SIGTERM (supervisord, main.kill_processes) into a graceful shutdown
+    sys.exit(0)
+
+
+def main():
+    global task_launcher, status_writer, runner_pool, task_claimer, leader_elector, process_supervisor
+    logger.info("sch scheduler (event-driven task timer) starting...")
+    if dbpool is None:
+        logger.error("sch: DB 커넥션 풀을 만들지 못해서 종료해")
+        sys.exit(1)
+    signal.signal(signal.SIGTERM, handle_sigterm)
+
+    status_writer = StatusWriter(dbpool, logger, flush_interval=STATUS_FLUSH_INTERVAL_SEC, name="sch")
+    if RUNNER_MODE == 'pool':
+        runner_pool = RunnerPool([sys.executable, "app.py", "--worker"], logger, size=RUNNER_POOL_SIZE,
+                                 max_tasks_per_worker=RUNNER_MAX_TASKS_PER_WORKER,
+                                 queue_size=LAUNCH_QUEUE_SIZE, on_task_crash=on_runner_crash,
+                                 on_task_done=on_task_done, task_timeout=RUNNER_TASK_TIMEOUT_SEC)
+    else:
+        process_supervisor = ProcessSupervisor(logger, on_exit=on_app_exit)
+    task_launcher = TaskLauncher(task_worker, logger, max_workers=LAUNCH_MAX_WORKERS,
+                                 max_queue=LAUNCH_QUEUE_SIZE)
+    task_claimer = TaskClaimer(dbpool, logger)
+    leader_elector = LeaderElector(dbpool, logger)
+    leader_elector.start()
+    was_leader = leader_elector.is_leader()
+    logger.info(f"Scheduler instance owner={task_claimer.owner}, dispatch mode={DISPATCH_MODE}, "
+                f"{'leader' if was_leader else 'standby'}")
+    if was_leader:
+        materialize_reservations()
+    try:
+        preload_tasks()
+    except Exception as e:
+        # refresh_tasks() retries the preload on the next refresh
+        logger.error(f"Error in preload_tasks: {e}", exc_info=True)
+    if is_dispatching():
+        # Pick up rows left 'I' by a dead instance and due rows nobody claimed while no scheduler was running
+        sweep_claims()
+    next_refresh = time.monotonic() + REFRESH_INTERVAL_SEC
+    next_materialize = time.monotonic() + MATERIALIZE_INTERVAL_SEC
 
     logger.info('Scheduler started!')
     logger.info('Press Ctrl+C to exit.')
 
-    # Keep the main thread alive to run the scheduler
+    # Sleep on the timer until the next task is due, the look-ahead window needs refreshing,
+    # or it is time to look at the leader lease again
     try:
         while True:
-            schedule.run_pending()
-            time.sleep(1)  # Check schedule every 1 second
+            dispatch_due_tasks(max(0.0, min(next_refresh - time.monotonic(), LEADER_HEARTBEAT_SEC)))
+            leader = leader_elector.is_leader()
+            if leader and not was_leader:
+                # Failover: catch up on whatever the previous leader left behind right away
+                logger.info("Promoted to leader, taking over dispatch and materialization.")
+                sweep_claims()
+                next_materialize = time.monotonic()
+            was_leader = leader
+            if leader and time.monotonic() >= next_materialize:
+                materialize_reservations()
+                next_materialize = time.monotonic() + MATERIALIZE_INTERVAL_SEC
+            if time.monotonic() >= next_refresh:
+                try:
+                    refresh_tasks()
+                except Exception as e:
+                    logger.error(f"Error in refresh_tasks: {e}", exc_info=True)
+                if is_dispatching():
+                    sweep_claims()
+                logger.info(f"Launcher metrics: {task_launcher.get_metrics()}")
+                if runner_pool:
+                    logger.info(f"Runner pool stats: {runner_pool.get_stats()}")
+                if process_supervisor:
+                    logger.info(f"Process supervisor stats: {process_supervisor.get_stats()}")
+                logger.info(f"Claim stats: {task_claimer.get_stats()}")
+                logger.info(f"Leader stats: {leader_elector.get_stats()}")
+                logger.info(f"Query parse stats: {queries.get_query_stats()}")
+                next_refresh = time.monotonic() + REFRESH_INTERVAL_SEC
 
     except (KeyboardInterrupt, SystemExit):
         logger.info("Scheduler shutting down...")
         logger.info('Scheduler stopped.')
     finally:
-        if dbconn:
+        # Give up the lease first so a standby takes over without waiting for it to expire
+        if leader_elector:
+            leader_elector.stop()
+        # Let queued and in-flight launches finish before the pool goes away
+        if task_launcher:
+            task_launcher.shutdown(wait=True)
+        # Pooled workers drain the remaining queue (bounded like subprocess mode), then exit on stdin EOF
+        if runner_pool:
+            runner_pool.shutdown(wait=True, timeout=SUPERVISOR_SHUTDOWN_TIMEOUT_SEC)
+        # Give running app.py children a chance to exit so their usage is recorded
+        if process_supervisor:
+            process_supervisor.shutdown(timeout=SUPERVISOR_SHUTDOWN_TIMEOUT_SEC)
+        # Synchronously write out any status transitions still pending
+        if status_writer:
             try:
-                dbconn.close()
-                logger.info("Database connection closed.")
+                status_writer.close()
             except Exception as e:
-                logger.error(f"Error closing DB connection: {e}", exc_info=True)
+                logger.error(f"Error flushing pending status updates: {e}", exc_info=True)
+        if dbpool:
+            logger.info(f"Connection pool stats: {dbpool.get_stats()}")
+            dbpool.close()
+            logger.info("Database connection pool closed.")
+
+
+def main_async():
+    """`python sch.py --async`: same protocol on an asyncio core (sch_async.py) instead of timer/launcher threads."""
+    import sch_async
+    logger.info("sch scheduler (asyncio core) starting...")
+    if dbpool is None:
+        logger.error("sch: DB 커넥션 풀을 만들지 못해서 종료해")
+        sys.exit(1)
+    try:
+        sch_async.run(dbpool, logger, lookahead_sec=LOOKAHEAD_SEC, refresh_interval_sec=REFRESH_INTERVAL_SEC,
+                      refresh_overlap_sec=REFRESH_OVERLAP_SEC, misfire_grace_sec=MISFIRE_GRACE_SEC,
+                      materialize_interval_sec=MATERIALIZE_INTERVAL_SEC,
+                      status_flush_interval_sec=STATUS_FLUSH_INTERVAL_SEC, dispatch_mode=DISPATCH_MODE,
+                      shutdown_timeout_sec=SUPERVISOR_SHUTDOWN_TIMEOUT_SEC)
+    finally:
+        if dbpool:
+            dbpool.close()
+            logger.info("Database connection pool closed.")
 
 
 if __name__ == "__main__":
-    main()
+    if "--async" in sys.argv[1:]:
+        main_async()
+    else:
+        main()
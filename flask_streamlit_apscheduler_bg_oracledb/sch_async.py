@@ -0,0 +1,373 @@
+# asyncio scheduler core, started with: python sch.py --async
+# Same claim/lease/leader protocol as the threaded sch.py, but every pending task is an event loop timer
+# handle and every running app.py is a coroutine awaiting its process, so tens of thousands of waits
+# cost no threads.
+import asyncio
+import signal
+import subprocess
+import sys
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from common.dbhandler import DBHandler
+from common.taskclaim import AsyncTaskClaimer
+from common.leader import LeaderElector, LEADER_HEARTBEAT_SEC
+from common.materializer import RollingMaterializer
+from common.procsupervisor import open_task_log, write_task_log
+from common import queries
+
+# Max number of app.py processes running at once; a full instance stops claiming and leaves rows to the others
+ASYNC_MAX_RUNNING = 64
+# Async connection pool size (claims, refresh queries and status flushes each hold a connection briefly)
+ASYNC_POOL_MAX = 8
+# How long shutdown waits for running app.py processes so their exit is still recorded
+ASYNC_SHUTDOWN_TIMEOUT_SEC = 30
+
+
+class AsyncScheduler:
+    """Event-loop scheduler: loop.call_at timers per task, claims via AsyncTaskClaimer, app.py via
+    asyncio.create_subprocess_exec.
+
+    Leader election and materialization are not on the hot path and reuse the threaded LeaderElector and
+    RollingMaterializer on the synchronous pool (materialize runs in a worker thread).
+    """
+
+    def __init__(self, dbpool, async_pool, logger, lookahead_sec, refresh_interval_sec, refresh_overlap_sec,
+                 misfire_grace_sec, materialize_interval_sec, status_flush_interval_sec, dispatch_mode='all',
+                 max_running=ASYNC_MAX_RUNNING, app_argv=None, shutdown_timeout_sec=ASYNC_SHUTDOWN_TIMEOUT_SEC):
+        self.async_pool = async_pool
+        self.logger = logger
+        self.lookahead_sec = lookahead_sec
+        self.refresh_interval_sec = refresh_interval_sec
+        self.refresh_overlap_sec = refresh_overlap_sec
+        self.misfire_grace_sec = misfire_grace_sec
+        self.materialize_interval_sec = materialize_interval_sec
+        self.status_flush_interval_sec = status_flush_interval_sec
+        self.dispatch_mode = dispatch_mode
+        self.app_argv = app_argv or [sys.executable, "app.py"]
+        self.claimer = AsyncTaskClaimer(async_pool, logger)
+        self.leader = LeaderElector(dbpool, logger)
+        self.materializer = RollingMaterializer(dbpool, logger)
+
+        self.timers = {}           # taskid -> (start_time, asyncio.TimerHandle)
+        self.dispatched = {}       # taskid -> start time already fired, so a refresh cannot re-arm it
+        self.running = {}          # taskid -> asyncio.Task awaiting its app.py process
+        self.claimed = set()       # taskids claimed here whose app.py has not finished; only these leases are renewed
+        self.pending_status = {}   # taskid -> status, flushed with one executemany
+        self.loaded_until = None
+        self.last_refresh_at = None
+        self.max_running = max_running
+        self.shutdown_timeout_sec = shutdown_timeout_sec
+        self.slots = None          # asyncio.Semaphore(max_running), created on the running loop
+        self.due = None            # asyncio.Event set by timers, created on the running loop
+        self.stopping = None
+        self.latencies = deque(maxlen=1000)
+        self.metrics = {'launched': 0, 'crashed': 0, 'spawn_errors': 0}
+
+    # --- timers ---
+
+    def is_dispatching(self):
+        return self.dispatch_mode == 'all' or self.leader.is_leader()
+
+    def arm(self, taskid, start_time):
+        current = self.timers.get(taskid)
+        if current is not None:
+            if current[0] == start_time:
+                return False
+            current[1].cancel()
+        loop = asyncio.get_running_loop()
+        delay = max(0.0, (start_time - datetime.now()).total_seconds())
+        self.timers[taskid] = (start_time, loop.call_at(loop.time() + delay, self.fire, taskid))
+        return True
+
+    def disarm(self, taskid):
+        entry = self.timers.pop(taskid, None)
+        if entry is not None:
+            entry[1].cancel()
+        return entry is not None
+
+    def fire(self, taskid):
+        # The timer is only the wake-up; the dispatcher claims whatever is due in one round trip
+        start_time, _ = self.timers.pop(taskid)
+        self.dispatched[taskid] = start_time
+        self.due.set()
+
+    def load(self, rows):
+        """Arm timers for 'R' rows and disarm rows that are no longer 'R'."""
+        armed = 0
+        for taskid, taskname, start_time, status in rows:
+            if status != 'R':
+                if self.disarm(taskid):
+                    self.logger.info(f"taskid={taskid} left status 'R' ({status}), removed from timer.")
+                continue
+            if self.dispatched.get(taskid) == start_time:
+                continue
+            armed += self.arm(taskid, start_time)
+        return armed
+
+    async def fetch(self, name, **params):
+        # Errors propagate so preload/refresh leave their high-water marks where they were
+        async with self.async_pool.acquire() as conn:
+            with conn.cursor() as cursor:
+                await queries.execute_async(cursor, name, params)
+                return await cursor.fetchall()
+
+    async def preload(self):
+        now = datetime.now()
+        window_start = now - timedelta(seconds=self.misfire_grace_sec)
+        window_end = now + timedelta(seconds=self.lookahead_sec)
+        armed = self.load(await self.fetch("task.fetch_due", window_start=window_start, window_end=window_end))
+        self.loaded_until = window_end
+        self.last_refresh_at = now
+        self.logger.info(f"Preloaded {armed} tasks up to {window_end} (timers={len(self.timers)})")
+
+    async def refresh(self):
+        """Extend the look-ahead window and merge rows changed since the last refresh.
+
+        The high-water marks only move after both reads succeed, so a failed refresh is retried over the same
+        window next time instead of skipping it.
+        """
+        if self.loaded_until is None:
+            # The startup preload failed; nothing is loaded yet
+            await self.preload()
+            return
+        now = datetime.now()
+        window_start = now - timedelta(seconds=self.misfire_grace_sec)
+        window_end = now + timedelta(seconds=self.lookahead_sec)
+        since = self.last_refresh_at - timedelta(seconds=self.refresh_overlap_sec)
+        armed = self.load(await self.fetch("task.fetch_due", window_start=self.loaded_until,
+                                           window_end=window_end))
+        armed += self.load(await self.fetch("task.fetch_changed", since=since, window_start=window_start,
+                                            window_end=window_end))
+        self.loaded_until = window_end
+        self.last_refresh_at = now
+        for taskid, start_time in list(self.dispatched.items()):
+            if start_time < window_start:
+                del self.dispatched[taskid]
+        if armed:
+            self.logger.info(f"Refresh armed {armed} tasks (timers={len(self.timers)})")
+
+    # --- claim and launch ---
+
+    async def launch(self, taskid, start_time):
+        """Wait for a free slot, then start app.py for a claimed task and await it in the background."""
+        self.disarm(taskid)
+        self.dispatched[taskid] = start_time
+        if taskid in self.running:
+            return
+        self.claimed.add(taskid)
+        await self.slots.acquire()
+        self.running[taskid] = asyncio.create_task(self.run_app(taskid, start_time))
+
+    async def run_app(self, taskid, start_time):
+        try:
+            started = time.monotonic()
+            process = await asyncio.create_subprocess_exec(*self.app_argv, str(taskid), start_new_session=True,
+                                                           stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                                                           stderr=subprocess.STDOUT)
+            delay = (datetime.now() - start_time).total_seconds()
+            self.latencies.append(delay)
+            self.metrics['launched'] += 1
+            self.logger.info(f"app.py started for taskid={taskid}, PID: {process.pid} ({delay:.3f}s after schedule)")
+            await self.drain_output(taskid, process)
+            returncode = await process.wait()
+            # asyncio reaps the child itself, so there is no wait4 rusage here; CPU time and RSS stay NULL
+            usage = {'exit_code': returncode, 'wall_sec': round(time.monotonic() - started, 3),
+                     'cpu_sec': None, 'max_rss_kb': None}
+            if returncode < 0:
+                self.metrics['crashed'] += 1
+                self.logger.error(f"app.py for taskid={taskid} killed by signal {-returncode}")
+            self.logger.info(f"taskid={taskid}: app.py pid={process.pid} exited {usage}")
+            # A nonzero exit without a final status is failed here, not left for lease expiry and a relaunch
+            await self.record_exit(taskid, usage, fail_unfinished=returncode != 0)
+        except Exception as e:
+            self.metrics['spawn_errors'] += 1
+            self.pending_status[taskid] = 'F'
+            self.logger.error(f"Failed to run app.py for taskid={taskid}: {e}", exc_info=True)
+        finally:
+            self.running.pop(taskid, None)
+            self.claimed.discard(taskid)
+            self.slots.release()
+
+    async def drain_output(self, taskid, process):
+        """Copy app.py's stdout/stderr into logs/tasks/task_<taskid>.log, like ProcessSupervisor does."""
+        handler = open_task_log(taskid)
+        try:
+            async for raw in process.stdout:
+                write_task_log(handler, raw)
+        except Exception as e:
+            self.logger.error(f"taskid={taskid}: output drain failed: {e}", exc_info=True)
+        finally:
+            handler.close()
+
+    async def record_exit(self, taskid, usage, fail_unfinished=False):
+        """Write exit code and wall time of a finished app.py run into TASK (failing a row left 'I' if asked)."""
+        try:
+            async with self.async_pool.acquire() as conn:
+                with conn.cursor() as cursor:
+                    if fail_unfinished:
+                        await queries.execute_async(cursor, "task.fail_unfinished", taskid=int(taskid))
+                        if cursor.rowcount:
+                            self.logger.error(f"taskid={taskid}: app.py exited with {usage['exit_code']} without "
+                                              f"a final status, marked 'F'")
+                    await queries.execute_async(cursor, "task.record_exit", dict(usage, taskid=int(taskid)))
+                await conn.commit()
+        except Exception as e:
+            self.logger.error(f"Failed to record exit of taskid={taskid} ({usage}): {e}", exc_info=True)
+
+    async def claim_and_launch(self):
+        window_start = datetime.now() - timedelta(seconds=self.misfire_grace_sec)
+        while True:
+            rows = await self.claimer.claim_due(window_start)
+            for taskid, taskname, start_time in rows:
+                await self.launch(taskid, start_time)
+            if len(rows) < self.claimer.batch_size:
+                return
+
+    async def sweep_claims(self):
+        try:
+            await self.claimer.renew(list(self.claimed))
+            for taskid, taskname, start_time in await self.claimer.claim_expired():
+                await self.launch(taskid, start_time)
+            await self.claim_and_launch()
+        except Exception as e:
+            self.logger.error(f"Error in sweep_claims: {e}", exc_info=True)
+
+    # --- loops ---
+
+    async def dispatcher(self):
+        while True:
+            await self.due.wait()
+            self.due.clear()
+            if self.is_dispatching():
+                try:
+                    await self.claim_and_launch()
+                except Exception as e:
+                    self.logger.error(f"Error in claim_and_launch: {e}", exc_info=True)
+
+    async def status_flusher(self):
+        while True:
+            await asyncio.sleep(self.status_flush_interval_sec)
+            await self.flush_status()
+
+    async def flush_status(self):
+        if not self.pending_status:
+            return
+        batch, self.pending_status = self.pending_status, {}
+        rows = [{'taskid': taskid, 'status': status} for taskid, status in batch.items()]
+        try:
+            async with self.async_pool.acquire() as conn:
+                with conn.cursor() as cursor:
+                    await queries.executemany_async(cursor, "task.update_status", rows)
+                await conn.commit()
+        except Exception as e:
+            # Put the batch back unless a newer status arrived meanwhile
+            for taskid, status in batch.items():
+                self.pending_status.setdefault(taskid, status)
+            self.logger.error(f"Status flush of {len(rows)} rows failed: {e}", exc_info=True)
+
+    async def housekeeping(self):
+        loop = asyncio.get_running_loop()
+        was_leader = self.leader.is_leader()
+        next_refresh = loop.time() + self.refresh_interval_sec
+        next_materialize = loop.time() + self.materialize_interval_sec
+        while True:
+            await asyncio.sleep(max(0.0, min(next_refresh - loop.time(), LEADER_HEARTBEAT_SEC)))
+            leader = self.leader.is_leader()
+            if leader and not was_leader:
+                self.logger.info("Promoted to leader, taking over dispatch and materialization.")
+                await self.sweep_claims()
+                next_materialize = loop.time()
+            was_leader = leader
+            if leader and loop.time() >= next_materialize:
+                await self.materialize()
+                next_materialize = loop.time() + self.materialize_interval_sec
+            if loop.time() >= next_refresh:
+                try:
+                    await self.refresh()
+                except Exception as e:
+                    self.logger.error(f"Error in refresh: {e}", exc_info=True)
+                if self.is_dispatching():
+                    await self.sweep_claims()
+                self.logger.info(f"Async scheduler metrics: {self.get_metrics()}")
+                self.logger.info(f"Claim stats: {self.claimer.get_stats()}")
+                self.logger.info(f"Leader stats: {self.leader.get_stats()}")
+                self.logger.info(f"Query parse stats: {queries.get_query_stats()}")
+                next_refresh = loop.time() + self.refresh_interval_sec
+
+    async def materialize(self):
+        try:
+            inserted = await asyncio.to_thread(self.materializer.run)
+            if inserted:
+                self.logger.info(f"Materialized {inserted} new tasks up to {self.materializer.horizon_end()}")
+        except Exception as e:
+            self.logger.error(f"Error in materialize: {e}", exc_info=True)
+
+    def get_metrics(self):
+        latencies = sorted(self.latencies)
+        metrics = dict(self.metrics, timers=len(self.timers), running=len(self.running))
+        if latencies:
+            metrics['launch_delay_p50_sec'] = round(latencies[len(latencies) // 2], 3)
+            metrics['launch_delay_p95_sec'] = round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 3)
+            metrics['launch_delay_max_sec'] = round(latencies[-1], 3)
+        return metrics
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        self.slots = asyncio.Semaphore(self.max_running)
+        self.due = asyncio.Event()
+        self.stopping = asyncio.Event()
+        loop.add_signal_handler(signal.SIGTERM, self.stopping.set)
+        loop.add_signal_handler(signal.SIGINT, self.stopping.set)
+
+        self.leader.start()
+        self.logger.info(f"Async scheduler owner={self.claimer.owner}, dispatch mode={self.dispatch_mode}, "
+                         f"{'leader' if self.leader.is_leader() else 'standby'}")
+        if self.leader.is_leader():
+            await self.materialize()
+        try:
+            await self.preload()
+        except Exception as e:
+            # refresh() retries the preload on the next refresh
+            self.logger.error(f"Error in preload: {e}", exc_info=True)
+        if self.is_dispatching():
+            await self.sweep_claims()
+
+        loops = [asyncio.create_task(coro) for coro in (self.dispatcher(), self.status_flusher(),
+                                                        self.housekeeping())]
+        self.logger.info('Async scheduler started!')
+        try:
+            await self.stopping.wait()
+        finally:
+            self.logger.info("Async scheduler shutting down...")
+            self.leader.stop()
+            for task in loops:
+                task.cancel()
+            for taskid in list(self.timers):
+                self.disarm(taskid)
+            # Give app.py processes that are already running a chance to finish and record their exit
+            if self.running:
+                try:
+                    await asyncio.wait_for(asyncio.gather(*self.running.values(), return_exceptions=True),
+                                           self.shutdown_timeout_sec)
+                except asyncio.TimeoutError:
+                    self.logger.warning(f"{len(self.running)} app.py processes still running after "
+                                        f"{self.shutdown_timeout_sec}s, not waiting for them.")
+            await self.flush_status()
+            self.logger.info('Async scheduler stopped.')
+
+
+async def _main(dbpool, logger, options):
+    async_pool = DBHandler().get_async_db_pool(logger, name="sch-async", max=ASYNC_POOL_MAX)
+    if async_pool is None:
+        logger.error("Async connection pool could not be created, exiting.")
+        return
+    try:
+        await AsyncScheduler(dbpool, async_pool, logger, **options).run()
+    finally:
+        await async_pool.close()
+
+
+def run(dbpool, logger, **options):
+    """Entry point used by `python sch.py --async`; options are sch.py's timing constants."""
+    asyncio.run(_main(dbpool, logger, options))
@@ -0,0 +1,126 @@
+# streamlit 대시보드(dash_app1.py) 세션당 서버 CPU 프로파일
+# 브라우저 대신 웹소켓 세션 N개를 열어서 duration 초 동안 streamlit 서버 프로세스의 CPU 시간과
+# 세션마다 받은 delta(화면 조각) 수, 스크립트/fragment 실행 수를 재. run_every fragment 는 브라우저가
+# auto_rerun 주기마다 다시 실행을 요청하는 방식이라 여기서도 똑같이 요청해줘.
+# 실행 : streamlit run dash_app1.py --server.port 8501 --server.headless true
+#        python util/dash_session_profile.py --port 8501 --sessions 1 5 10
+# 전후 비교 : git show <이전 커밋>:flask_streamlit_apscheduler_bg_oracledb/dash_app1.py > /tmp/dash_app1_old.py
+#             로 이전 버전을 다른 포트에 띄우고 --port 만 바꿔서 한 번 더 돌리면 돼.
+import argparse
+import threading
+import time
+from collections import Counter
+
+import psutil
+from websockets.sync.client import connect
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ClientState_pb2 import ClientState
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+
+def find_server(port):
+    """port 를 LISTEN 하고 있는 프로세스 (streamlit 서버)"""
+    for conn in psutil.net_connections(kind="tcp"):
+        if conn.laddr and conn.laddr.port == port and conn.status == psutil.CONN_LISTEN and conn.pid:
+            return psutil.Process(conn.pid)
+    raise SystemExit(f"{port} 포트를 LISTEN 하는 프로세스를 못 찾았어. --pid 로 지정해줘.")
+
+
+def cpu_sec(proc):
+    times = proc.cpu_times()
+    return times.user + times.system
+
+
+class Session(threading.Thread):
+    """웹소켓 세션 하나. 처음에 스크립트를 한 번 실행하고, auto_rerun 을 받은 fragment 는 그 주기로 다시 요청해."""
+
+    def __init__(self, url, stop):
+        super().__init__(daemon=True)
+        self.url = url
+        self.stop = stop
+        self.counts = Counter()
+        self.bytes = 0
+        self.page_script_hash = ""
+        self._fragments = {}          # fragment_id -> [interval, 다음 요청 monotonic]
+
+    def _send(self, ws, fragment_id=""):
+        state = ClientState(query_string="", page_script_hash=self.page_script_hash,
+                            fragment_id=fragment_id, is_auto_rerun=bool(fragment_id))
+        ws.send(BackMsg(rerun_script=state).SerializeToString())
+
+    def run(self):
+        with connect(self.url, subprotocols=["streamlit"], max_size=None) as ws:
+            self._send(ws)
+            while not self.stop.is_set():
+                now = time.monotonic()
+                for fragment_id, due in self._fragments.items():
+                    if now >= due[1]:
+                        due[1] = now + due[0]
+                        self._send(ws, fragment_id)
+                next_due = min((due[1] for due in self._fragments.values()), default=now + 0.5)
+                try:
+                    raw = ws.recv(timeout=max(0.01, min(0.5, next_due - now)))
+                except TimeoutError:
+                    continue
+                self.bytes += len(raw)
+                msg = ForwardMsg()
+                msg.ParseFromString(raw)
+                kind = msg.WhichOneof("type")
+                self.counts[kind] += 1
+                if kind == "new_session":
+                    self.page_script_hash = msg.new_session.page_script_hash
+                elif kind == "auto_rerun" and msg.auto_rerun.fragment_id not in self._fragments:
+                    self._fragments[msg.auto_rerun.fragment_id] = [msg.auto_rerun.interval,
+                                                                   time.monotonic() + msg.auto_rerun.interval]
+
+
+def measure(server, url, sessions, warmup, duration):
+    stop = threading.Event()
+    clients = [Session(url, stop) for _ in range(sessions)]
+    for client in clients:
+        client.start()
+    time.sleep(warmup)
+
+    before = [Counter(client.counts) for client in clients]
+    before_bytes = sum(client.bytes for client in clients)
+    cpu_before, started = cpu_sec(server), time.monotonic()
+    time.sleep(duration)
+    cpu_used, elapsed = cpu_sec(server) - cpu_before, time.monotonic() - started
+    totals = sum((client.counts - prev for client, prev in zip(clients, before)), Counter())
+    sent_bytes = sum(client.bytes for client in clients) - before_bytes
+
+    stop.set()
+    for client in clients:
+        client.join(5)
+    return cpu_used / elapsed * 100, totals, sent_bytes / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8501)
+    parser.add_argument("--pid", type=int, help="streamlit 서버 pid (안 주면 --port 로 찾아)")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 5, 10])
+    parser.add_argument("--warmup", type=float, default=5.0, help="첫 실행이 끝나길 기다리는 시간(초)")
+    parser.add_argument("--duration", type=float, default=20.0)
+    args = parser.parse_args()
+
+    server = psutil.Process(args.pid) if args.pid else find_server(args.port)
+    url = f"ws://{args.host}:{args.port}/_stcore/stream"
+
+    # 세션이 없을 때 서버가 쓰는 CPU (캐시 만료, 파일 감시 등)
+    cpu_before = cpu_sec(server)
+    time.sleep(args.warmup)
+    idle = (cpu_sec(server) - cpu_before) / args.warmup * 100
+    print(f"server pid={server.pid} idle cpu={idle:.1f}%")
+
+    print(f"{'sessions':>8}{'cpu %':>9}{'cpu %/sess':>12}{'runs/s/sess':>13}{'deltas/s/sess':>15}{'KB/s':>9}")
+    for sessions in args.sessions:
+        cpu, totals, bytes_per_sec = measure(server, url, sessions, args.warmup, args.duration)
+        per_session = lambda value: value / args.duration / sessions
+        print(f"{sessions:>8}{cpu:>9.1f}{(cpu - idle) / sessions:>12.2f}{per_session(totals['script_finished']):>13.2f}"
+              f"{per_session(totals['delta']):>15.1f}{bytes_per_sec / 1024:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+# sch.py 디스패처 비교: 스레드 (TaskTimer + TaskLauncher) vs asyncio (loop.call_at + create_subprocess_exec)
+# DB 없이 대기중인 태스크 N개를 spread 초 동안 골고루 깨우면서 기동 지연, 스레드 수, RSS 를 재
+# 실행 : python util/dispatch_bench.py --tasks 20000 --spread-sec 10
+#        python util/dispatch_bench.py --tasks 300 --launch process    (실제로 프로세스를 띄워서 비교)
+import argparse
+import asyncio
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+import psutil
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.tasktimer import TaskTimer
+from common.tasklauncher import TaskLauncher
+
+# 프로세스 모드에서 띄울 명령 (app.py 대신 바로 끝나는 파이썬)
+CHILD_ARGV = [sys.executable, "-c", "pass"]
+
+
+def rss_mb():
+    return round(psutil.Process().memory_info().rss / 1024 / 1024, 1)
+
+
+def schedule_times(tasks, spread_sec):
+    base = datetime.now() + timedelta(seconds=1)
+    return [base + timedelta(seconds=spread_sec * i / tasks) for i in range(tasks)]
+
+
+def summarize(mode, lateness, armed_rss, started_rss, max_threads, elapsed):
+    lateness.sort()
+    pick = lambda p: lateness[min(len(lateness) - 1, int(len(lateness) * p))] * 1000
+    return (f"{mode:<10}{len(lateness):>8}{pick(0.50):>10.2f}{pick(0.99):>10.2f}{lateness[-1] * 1000:>10.2f}"
+            f"{max_threads:>9}{armed_rss - started_rss:>12.1f}{elapsed:>9.2f}")
+
+
+def run_threaded(args):
+    logger = logging.getLogger("bench")
+    lateness = []
+    lock = threading.Lock()
+    started_rss = rss_mb()
+    max_threads = [threading.active_count()]
+
+    def worker(task_data):
+        delay = (datetime.now() - task_data['SUBPROCEE_STARTTIME']).total_seconds()
+        if args.launch == "process":
+            subprocess.run(CHILD_ARGV)
+        with lock:
+            lateness.append(delay)
+            max_threads[0] = max(max_threads[0], threading.active_count())
+
+    timer = TaskTimer()
+    launcher = TaskLauncher(worker, logger, max_workers=args.max_running, max_queue=args.tasks)
+    for taskid, start_time in enumerate(schedule_times(args.tasks, args.spread_sec)):
+        timer.schedule(taskid, start_time, {'TASKID': taskid, 'SUBPROCEE_STARTTIME': start_time})
+    armed_rss = rss_mb()
+
+    started = time.perf_counter()
+    remaining = args.tasks
+    while remaining:
+        for taskid, start_time, task_data in timer.pop_due(1.0):
+            launcher.submit(task_data, start_time)
+            remaining -= 1
+    launcher.shutdown(wait=True)
+    return summarize("threaded", lateness, armed_rss, started_rss, max_threads[0], time.perf_counter() - started)
+
+
+async def run_async(args):
+    loop = asyncio.get_running_loop()
+    lateness = []
+    started_rss = rss_mb()
+    slots = asyncio.Semaphore(args.max_running)
+    done = asyncio.Event()
+    running = set()
+    remaining = [args.tasks]
+
+    async def launch(start_time):
+        async with slots:
+            delay = (datetime.now() - start_time).total_seconds()
+            if args.launch == "process":
+                process = await asyncio.create_subprocess_exec(*CHILD_ARGV)
+                await process.wait()
+            lateness.append(delay)
+        remaining[0] -= 1
+        if not remaining[0]:
+            done.set()
+
+    def fire(start_time):
+        task = asyncio.create_task(launch(start_time))
+        running.add(task)
+        task.add_done_callback(running.discard)
+
+    now, base = datetime.now(), loop.time()
+    for start_time in schedule_times(args.tasks, args.spread_sec):
+        loop.call_at(base + max(0.0, (start_time - now).total_seconds()), fire, start_time)
+    armed_rss = rss_mb()
+
+    started = time.perf_counter()
+    await done.wait()
+    return summarize("async", lateness, armed_rss, started_rss, threading.active_count(),
+                     time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, default=20000)
+    parser.add_argument("--spread-sec", type=float, default=10.0)
+    parser.add_argument("--launch", choices=["noop", "process"], default="noop")
+    parser.add_argument("--max-running", type=int, default=16, help="동시에 기동할 수 (스레드 수 / 세마포어)")
+    parser.add_argument("--mode", choices=["both", "threaded", "async"], default="both")
+    args = parser.parse_args()
+
+    if args.mode == "both":
+        # RSS 가 섞이지 않게 방식마다 새 프로세스에서 돌려
+        print(f"{'mode':<10}{'tasks':>8}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}{'threads':>9}"
+              f"{'armed MB':>12}{'wall s':>9}")
+        for mode in ("threaded", "async"):
+            argv = [sys.executable, os.path.abspath(__file__), "--mode", mode, "--tasks", str(args.tasks),
+                    "--spread-sec", str(args.spread_sec), "--launch", args.launch,
+                    "--max-running", str(args.max_running)]
+            subprocess.run(argv, check=True)
+        return
+    print(run_threaded(args) if args.mode == "threaded" else asyncio.run(run_async(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# app.py 결과 형식(csv / csv+gzip / parquet / arrow) 별 쓰기 시간, 파일 크기, 다시 읽는 시간 비교
+# 실행 : python util/output_format_bench.py --rows 1000000
+#        python util/output_format_bench.py --db --query "SELECT * FROM TESTCHO.TASK"   (실제 DB 결과로 비교)
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.outputformat import write_output
+
+
+class SyntheticCursor:
+    """TASK 테이블 모양의 행을 만들어서 fetchmany 로 내주는 cursor (DB 없이 writer 만 비교할 때)"""
+
+    description = [("TASKID",), ("TASKRESERVEID",), ("TASKNAME",), ("SUBPROCEE_STARTTIME",),
+                   ("TASK_STATUS",), ("CREATED_AT",), ("LASTCHANGED_AT",)]
+
+    def __init__(self, rows):
+        self.remaining = rows
+        self.next_id = 1
+        self.arraysize = 100
+        self.prefetchrows = 2
+        self.base = datetime(2025, 1, 1, 8, 0, 0)
+
+    def execute(self, query, params=None):
+        pass
+
+    def fetchmany(self, size):
+        size = min(size, self.remaining)
+        rows = []
+        for i in range(self.next_id, self.next_id + size):
+            started = self.base + timedelta(minutes=i)
+            rows.append((i, i % 500, f"task_{i % 500}", started, "RISEK"[i % 5], started, started))
+        self.next_id += size
+        self.remaining -= size
+        return rows
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class SyntheticConnection:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def cursor(self):
+        return SyntheticCursor(self.rows)
+
+
+def read_back(path):
+    """다운스트림 분석에서 다시 읽는 시간"""
+    import pyarrow.csv as pacsv
+    import pyarrow.ipc as ipc
+    import pyarrow.parquet as pq
+    if path.endswith(".parquet"):
+        return pq.read_table(path).num_rows
+    if path.endswith(".arrow"):
+        with ipc.open_file(path) as reader:
+            return reader.read_all().num_rows
+    return pacsv.read_csv(path).num_rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--db", action="store_true", help="합성 데이터 대신 실제 DB 쿼리 결과로 비교")
+    parser.add_argument("--query", default="SELECT * FROM TESTCHO.TASK")
+    args = parser.parse_args()
+
+    cases = [("csv", None), ("csv", "gzip"), ("csv", "zstd"), ("parquet", None), ("arrow", None)]
+    pool = None
+    if args.db:
+        from common.dbhandler import DBHandler
+        from common.loghandler import LogHandler
+        pool = DBHandler().get_db_pool(LogHandler().getloghandler("bench"), name="bench")
+
+    outdir = tempfile.mkdtemp(prefix="output_format_bench_")
+    print(f"{'format':<14}{'rows':>10}{'write s':>10}{'rows/s':>12}{'MB':>10}{'read s':>10}")
+    for output_format, compression in cases:
+        name = output_format + (f"+{compression}" if compression else "")
+        try:
+            if pool:
+                with pool.acquire() as conn:
+                    stats = write_output(output_format, conn, args.query, {}, os.path.join(outdir, name),
+                                         args.batch_size, compression=compression)
+            else:
+                conn = SyntheticConnection(args.rows)
+                stats = write_output(output_format, conn, None, None, os.path.join(outdir, name),
+                                     args.batch_size, compression=compression)
+        except (ValueError, ImportError) as e:
+            print(f"{name:<14}skipped: {e}")
+            continue
+        started = time.perf_counter()
+        try:
+            read_back(stats["path"])
+            read_sec = f"{time.perf_counter() - started:.3f}"
+        except Exception:
+            read_sec = "-"
+        print(f"{name:<14}{stats['rows']:>10}{stats['elapsed_sec']:>10.3f}{stats['rows_per_sec']:>12.0f}"
+              f"{stats['bytes'] / 1024 / 1024:>10.2f}{read_sec:>10}")
+    print(f"files: {outdir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# main.py REST API 지연(p50/p99)과 워커 프로세스 RSS 측정
+# 변경 전/후 커밋에서 같은 조건으로 돌려서 비교해
+# 실행 : python util/rest_latency_bench.py --requests 2000 --concurrency 8
+#        python util/rest_latency_bench.py --path "/tasks?page_size=100" --match gunicorn
+import argparse
+import json
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import psutil
+
+
+def worker_rss_mb(match):
+    """cmdline 에 match 가 들어간 프로세스들의 RSS 합계 (MB)"""
+    total = 0
+    for proc in psutil.process_iter(['cmdline', 'memory_info']):
+        try:
+            cmdline = " ".join(proc.info['cmdline'] or [])
+            if match in cmdline and 'rest_latency_bench' not in cmdline:
+                total += proc.info['memory_info'].rss
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            continue
+    return round(total / 1024 / 1024, 1)
+
+
+def percentile(sorted_values, p):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p))]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-url", default="http://localhost:5000")
+    parser.add_argument("--path", default="/tasks?page_size=100")
+    parser.add_argument("--post", help="POST /tasks 로 보낼 JSON 본문 (지정하면 GET 대신 POST)")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--match", default="main.py", help="RSS 를 잴 워커 프로세스 cmdline 문자열")
+    args = parser.parse_args()
+
+    url = args.base_url + (args.path if not args.post else "/tasks")
+    body = json.dumps(json.loads(args.post)).encode() if args.post else None
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+
+    def call(_):
+        nonlocal errors
+        request = urllib.request.Request(url, data=body, method="POST" if body else "GET",
+                                         headers={"Content-Type": "application/json"})
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                response.read()
+        except Exception:
+            with lock:
+                errors += 1
+            return
+        with lock:
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    rss_before = worker_rss_mb(args.match)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        list(executor.map(call, range(args.requests)))
+    elapsed = time.perf_counter() - started
+    rss_after = worker_rss_mb(args.match)
+
+    latencies.sort()
+    print(f"url            : {url}")
+    print(f"requests       : {args.requests} (errors {errors}), concurrency {args.concurrency}")
+    if latencies:
+        print(f"throughput     : {len(latencies) / elapsed:.1f} req/s")
+        print(f"latency p50    : {percentile(latencies, 0.50):.2f} ms")
+        print(f"latency p99    : {percentile(latencies, 0.99):.2f} ms")
+        print(f"latency max    : {latencies[-1]:.2f} ms")
+    print(f"worker RSS     : {rss_before} MB -> {rss_after} MB ('{args.match}' processes)")
+
+
+if __name__ == "__main__":
+    main()
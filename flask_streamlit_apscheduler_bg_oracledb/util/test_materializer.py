@@ -0,0 +1,244 @@
+# RollingMaterializer.run 이 MATERIALIZED_UNTIL 이 NULL 인 예전 예약의 발생분을 다시 넣지 않는지,
+# 예약 변경 때 diff_future_rows / reschedule_many 가 바뀐 발생분만 고치는지 확인하는 테스트
+# DB 없이 TASK / TASKRESERVE 를 메모리에 흉내낸 커서로 돌려
+# 실행 : python -m pytest util/test_materializer.py
+import logging
+import os
+import sys
+from contextlib import contextmanager
+from datetime import datetime, date, time, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common import queries
+from common.materializer import RollingMaterializer, schedule_times_between, diff_future_rows
+
+NOW = datetime(2025, 1, 10, 12, 0)
+
+
+class FakeDB:
+    """materializer.run / reschedule_many 가 쓰는 문장만 흉내내는 TASKRESERVE / TASK"""
+
+    def __init__(self):
+        self.reserves = {}     # taskreserveid -> row dict
+        self.tasks = []        # [taskreserveid, taskname, subprocee_starttime, task_status, taskid]
+        self.next_taskid = 1
+        self.executions = []   # reschedule_many 가 조회를 몇 번 했는지
+
+    def add_reserve(self, taskreserveid, materialized_until=None, **rule):
+        self.reserves[taskreserveid] = dict(taskreserveid=taskreserveid, taskname=f"job{taskreserveid}",
+                                            start_time='08:00:00', frequency='daily', specific_months=None,
+                                            specific_weekdays=None, specific_days_of_month=None,
+                                            materialized_until=materialized_until, **rule)
+
+    def add_tasks(self, taskreserveid, schedules, status='R'):
+        for s in schedules:
+            self.tasks.append([taskreserveid, f"job{taskreserveid}", s, status, self.next_taskid])
+            self.next_taskid += 1
+
+    def taskids(self, taskreserveid):
+        return sorted(t[4] for t in self.tasks if t[0] == taskreserveid)
+
+    def starttimes(self, taskreserveid):
+        return sorted(t[2] for t in self.tasks if t[0] == taskreserveid)
+
+    @contextmanager
+    def acquire(self):
+        yield FakeConnection(self)
+
+
+class FakeConnection:
+    stmtcachesize = queries.STMT_CACHE_SIZE
+
+    def __init__(self, db):
+        self.db = db
+
+    @contextmanager
+    def cursor(self):
+        yield FakeCursor(self)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def gettype(self, name):
+        assert name == "SYS.ODCINUMBERLIST"
+        return FakeNumberListType()
+
+
+class FakeNumberListType:
+    @staticmethod
+    def newobject(values):
+        return list(values)
+
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self.db = connection.db
+        self.description = None
+        self.rows = []
+
+    def setinputsizes(self, **kwargs):
+        pass
+
+    def execute(self, sql, params=None, **kwargs):
+        params = params or kwargs
+        db = self.db
+        if sql == queries.sql("reserve.materialize_candidates"):
+            self.rows = [(rid,) for rid, r in db.reserves.items()
+                         if r['materialized_until'] is None or r['materialized_until'] < params['horizon_end']]
+        elif sql == queries.sql("reserve.lock_for_materialize"):
+            reserve = db.reserves[params['taskreserveid']]
+            self.description = [(k.upper(),) for k in reserve]
+            self.rows = [tuple(reserve.values())]
+        elif sql == queries.sql("task.max_reserved_starttime"):
+            self.rows = [(max(db.starttimes(params['taskreserveid']), default=None),)]
+        elif sql == queries.sql("reserve.set_materialized_until"):
+            db.reserves[params['taskreserveid']]['materialized_until'] = params['materialized_until']
+        elif sql == queries.sql("task.future_reserved_many"):
+            db.executions.append("task.future_reserved_many")
+            self.rows = [(t[0], t[4], t[2]) for t in db.tasks
+                         if t[0] in params['taskreserveids'] and t[3] == 'R' and t[2] > params['after']]
+        else:
+            raise AssertionError(f"unexpected statement: {sql}")
+
+    def executemany(self, sql, rows):
+        db = self.db
+        if sql == queries.sql("task.insert_occurrence"):
+            for row in rows:
+                db.add_tasks(row['taskreserveid'], [row['subprocee_starttime']])
+        elif sql == queries.sql("task.delete_reserved"):
+            taskids = {row['taskid'] for row in rows}
+            db.tasks = [t for t in db.tasks if not (t[4] in taskids and t[3] == 'R')]
+        elif sql == queries.sql("reserve.set_materialized_until"):
+            for row in rows:
+                db.reserves[row['taskreserveid']]['materialized_until'] = row['materialized_until']
+        else:
+            raise AssertionError(f"unexpected statement: {sql}")
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    def fetchall(self):
+        return self.rows
+
+
+def run(db):
+    return RollingMaterializer(db, logging.getLogger("test"), horizon_days=7).run(now=NOW)
+
+
+def daily(start, end):
+    return [datetime.combine(start + timedelta(days=i), time(8, 0)) for i in range((end - start).days + 1)]
+
+
+def test_preexisting_reservation_is_not_materialized_twice():
+    # MATERIALIZED_UNTIL 컬럼 추가 전 POST 가 전체 기간(3월 말까지)을 이미 넣어 둔 예약
+    db = FakeDB()
+    db.add_reserve(1, start_date=date(2025, 1, 1), end_date=date(2025, 3, 31))
+    db.add_tasks(1, daily(date(2025, 1, 1), date(2025, 3, 31)))
+    before = db.starttimes(1)
+
+    assert run(db) == 0
+    assert db.starttimes(1) == before
+    assert db.reserves[1]['materialized_until'] == datetime(2025, 3, 31, 8, 0)
+    # 다음 실행에서도 그대로
+    assert run(db) == 0
+    assert db.starttimes(1) == before
+
+
+def test_preexisting_reservation_continues_after_last_row():
+    # 예전 등록분이 horizon 안에서 끝나는 예약은 마지막 행 다음부터만 이어서 넣어
+    db = FakeDB()
+    db.add_reserve(2, start_date=date(2025, 1, 1), end_date=date(2025, 1, 31))
+    db.add_tasks(2, daily(date(2025, 1, 1), date(2025, 1, 12)))
+
+    inserted = run(db)
+    starttimes = db.starttimes(2)
+    assert len(starttimes) == len(set(starttimes))
+    assert starttimes == daily(date(2025, 1, 1), date(2025, 1, 17))
+    assert inserted == 5
+    assert db.reserves[2]['materialized_until'] == NOW + timedelta(days=7)
+
+
+def test_reservation_without_rows_and_tracked_reservation():
+    db = FakeDB()
+    # TASK 행이 하나도 없는 예약은 지금부터 horizon 까지
+    db.add_reserve(3, start_date=date(2025, 1, 1), end_date=date(2025, 12, 31))
+    # MATERIALIZED_UNTIL 이 있는 예약은 그 다음부터
+    db.add_reserve(4, start_date=date(2025, 1, 1), end_date=date(2025, 12, 31),
+                   materialized_until=datetime(2025, 1, 14, 8, 0))
+    db.add_tasks(4, daily(date(2025, 1, 1), date(2025, 1, 14)))
+
+    run(db)
+    until = NOW + timedelta(days=7)
+    assert db.starttimes(3) == schedule_times_between(db.reserves[3], NOW, until)
+    assert db.starttimes(4) == daily(date(2025, 1, 1), date(2025, 1, 17))
+
+
+def at(day, hour=8):
+    return datetime(2025, 1, day, hour, 0)
+
+
+def test_diff_future_rows_keeps_unchanged_and_reports_changes():
+    existing = [(11, at(11)), (12, at(12)), (13, at(13))]
+    added, removed, kept = diff_future_rows(existing, [at(15), at(12), at(14), at(11)])
+    assert added == [at(14), at(15)]
+    assert removed == [13]
+    assert kept == 2
+
+
+def test_diff_future_rows_collapses_duplicate_times():
+    # 같은 시각의 'R' 행이 여러 개면 첫 행만 남기고 나머지는 지울 대상이야
+    existing = [(21, at(11)), (22, at(11)), (23, at(11)), (24, at(12))]
+    added, removed, kept = diff_future_rows(existing, [at(11), at(12)])
+    assert added == []
+    assert removed == [22, 23]
+    assert kept == 2
+
+
+def test_diff_future_rows_without_existing_or_schedules():
+    assert diff_future_rows([], [at(13), at(11)]) == ([at(11), at(13)], [], 0)
+    assert diff_future_rows([(31, at(11)), (32, at(12))], []) == ([], [31, 32], 0)
+
+
+def test_reschedule_many_groups_rows_per_reservation():
+    db = FakeDB()
+    for taskreserveid in (5, 6, 7):
+        db.add_reserve(taskreserveid, start_date=date(2025, 1, 1), end_date=date(2025, 12, 31))
+    db.add_tasks(5, [at(11), at(12), at(13)])
+    db.add_tasks(6, [at(11), at(11)])
+    # 실행이 끝난 행은 시각이 같아도 건드리지 않아
+    db.add_tasks(6, [at(12)], status='S')
+    db.add_tasks(7, [at(9)])   # after 이전 행은 대상이 아니야
+    done = db.taskids(6)[-1]
+    old7 = db.taskids(7)
+
+    materializer = RollingMaterializer(db, logging.getLogger("test"), horizon_days=7)
+    until = NOW + timedelta(days=7)
+    with db.acquire() as conn, conn.cursor() as cursor:
+        counts = materializer.reschedule_many(cursor, [
+            (7, "job7", [at(14)]),
+            (5, "job5", [at(12), at(13), at(14)]),
+            (6, "job6", [at(11), at(12)]),
+        ], after=NOW, until=until)
+
+    # 건수는 items 순서대로 (insert, delete, 유지)
+    assert counts == [(1, 0, 0), (1, 1, 2), (1, 1, 1)]
+    # 기존 행 조회는 예약마다가 아니라 한 번
+    assert db.executions == ["task.future_reserved_many"]
+    assert db.starttimes(5) == [at(12), at(13), at(14)]
+    assert db.starttimes(6) == [at(11), at(12), at(12)]
+    assert done in db.taskids(6)
+    assert db.starttimes(7) == [at(9), at(14)]
+    assert set(old7) <= set(db.taskids(7))
+    assert all(db.reserves[rid]['materialized_until'] == until for rid in (5, 6, 7))
+
+
+def test_reschedule_many_without_items():
+    db = FakeDB()
+    with db.acquire() as conn, conn.cursor() as cursor:
+        assert RollingMaterializer(db, logging.getLogger("test")).reschedule_many(cursor, [], NOW, NOW) == []
+    assert db.executions == []
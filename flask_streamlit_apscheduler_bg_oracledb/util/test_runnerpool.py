@@ -0,0 +1,62 @@
+# RunnerPool 이 워커를 띄우지 못할 때 대기열 태스크를 실패 처리하는지, 대기열이 꽉 차 있어도
+# shutdown(timeout) 이 timeout 안에 돌아오는지 확인하는 테스트
+# app.py 대신 python -c 로 흉내낸 워커를 띄워 (DB 필요 없음)
+# 실행 : python -m pytest util/test_runnerpool.py
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common import runnerpool
+from common.runnerpool import RunnerPool
+
+# READY 를 보내고 taskid 마다 SLOW_TASK_SEC 초 걸리는 워커
+SLOW_TASK_SEC = 3
+SLOW_WORKER = f"""
+import sys, time
+print("@@RUNNER READY", flush=True)
+for line in sys.stdin:
+    time.sleep({SLOW_TASK_SEC})
+    print("@@RUNNER DONE", line.strip(), "ok", flush=True)
+"""
+
+
+def test_queued_tasks_fail_when_worker_cannot_start(tmp_path, monkeypatch):
+    monkeypatch.setattr(runnerpool, "SPAWN_RETRY_SEC", 0.05)
+    crashed, done = [], []
+    pool = RunnerPool([sys.executable, "-c", "import sys; sys.exit(1)"], logging.getLogger("test"), size=1,
+                      on_task_crash=crashed.append, on_task_done=lambda taskid, usage: done.append(taskid),
+                      spawn_timeout=5, max_spawn_failures=2, log_dir=str(tmp_path))
+    for taskid in range(3):
+        pool.submit(taskid)
+    deadline = time.monotonic() + 10
+    while len(done) < 3 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert sorted(crashed) == ['0', '1', '2']
+    assert sorted(done) == ['0', '1', '2']
+    assert pool.get_stats()['spawn_failed_tasks'] == 3
+    pool.shutdown(timeout=2)
+
+
+def test_shutdown_with_full_queue_returns_within_timeout(tmp_path):
+    pool = RunnerPool([sys.executable, "-c", SLOW_WORKER], logging.getLogger("test"), size=1, queue_size=2,
+                      log_dir=str(tmp_path))
+    # 첫 태스크는 워커가 처리중, 나머지 둘이 대기열을 채워
+    pool.submit(1)
+    deadline = time.monotonic() + 10
+    while pool.get_stats()['queue_depth'] > 0 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    pool.submit(2)
+    pool.submit(3)
+    assert pool.get_stats()['queue_depth'] == 2
+
+    started = time.monotonic()
+    remaining = pool.shutdown(timeout=0.5)
+    assert time.monotonic() - started < SLOW_TASK_SEC
+    assert remaining == 1
+    # 버린 태스크는 처리하지 않고, 지금 태스크만 끝내고 멈춰
+    pool._threads[0].join(SLOW_TASK_SEC + 5)
+    assert not pool._threads[0].is_alive()
+    assert pool.get_stats()['completed'] == 1
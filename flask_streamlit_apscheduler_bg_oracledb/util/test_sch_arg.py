@@ -0,0 +1,129 @@
+# iter_schedule_times / generate_schedule_times 가 기존 하루씩 순회하던 구현과 같은 결과를 내는지 확인하는 테스트
+# 실행 : python -m pytest util/test_sch_arg.py
+import itertools
+import os
+import random
+import sys
+from datetime import datetime, date, time, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.schedule import iter_schedule_times
+from util.sch_arg_test import generate_schedule_times
+
+
+def daywalk_schedule_times(start_date, end_date, start_time, frequency,
+                           specific_months=None, specific_weekdays=None, specific_days_of_month=None):
+    """비교 기준: 예전 generate_schedule_times 의 하루씩 순회하는 구현 그대로"""
+    if start_date > end_date:
+        return []
+    if frequency == 'weekly' and specific_weekdays is None:
+        return []
+
+    schedule_times = []
+    current_date = start_date
+    while current_date <= end_date:
+        if specific_months is not None and current_date.month not in specific_months:
+            current_date += timedelta(days=1)
+            continue
+
+        is_scheduled_day = False
+        if frequency == 'daily':
+            if specific_days_of_month is None:
+                is_scheduled_day = True
+            elif current_date.day in specific_days_of_month:
+                is_scheduled_day = True
+        elif frequency == 'weekly':
+            if current_date.weekday() in specific_weekdays:
+                is_scheduled_day = True
+        elif frequency == 'monthly':
+            if specific_days_of_month is None:
+                if current_date.day == 1:
+                    is_scheduled_day = True
+            elif current_date.day in specific_days_of_month:
+                is_scheduled_day = True
+
+        if is_scheduled_day:
+            schedule_times.append(datetime.combine(current_date, start_time))
+        current_date += timedelta(days=1)
+
+    return schedule_times
+
+
+def assert_same(**kwargs):
+    expected = daywalk_schedule_times(**kwargs)
+    assert generate_schedule_times(**kwargs) == expected, kwargs
+    assert list(iter_schedule_times(**kwargs)) == expected, kwargs
+
+
+def test_examples():
+    assert_same(start_date=date(2024, 6, 1), end_date=date(2024, 6, 10), start_time=time(9, 0),
+                frequency='daily')
+    assert_same(start_date=date(2024, 6, 1), end_date=date(2024, 6, 30), start_time=time(15, 0),
+                frequency='weekly', specific_weekdays=[0, 4])
+    assert_same(start_date=date(2024, 6, 1), end_date=date(2024, 8, 31), start_time=time(19, 0),
+                frequency='monthly', specific_days_of_month=[1, 15])
+    assert_same(start_date=date(2024, 1, 1), end_date=date(2025, 12, 31), start_time=time(10, 0),
+                frequency='weekly', specific_months=[1, 4, 7, 10], specific_weekdays=[1, 3])
+    assert_same(start_date=date(2024, 7, 1), end_date=date(2024, 7, 10), start_time=time(14, 0),
+                frequency='daily', specific_months=[7])
+    assert_same(start_date=date(2024, 6, 1), end_date=date(2024, 8, 31), start_time=time(11, 0),
+                frequency='monthly', specific_months=[6, 8], specific_days_of_month=[15])
+
+
+def test_month_end_and_leap_days():
+    for year in (2023, 2024, 2100):
+        assert_same(start_date=date(year, 1, 1), end_date=date(year, 12, 31), start_time=time(8, 0),
+                    frequency='monthly', specific_days_of_month=[29, 30, 31])
+        assert_same(start_date=date(year, 2, 1), end_date=date(year, 3, 5), start_time=time(8, 0),
+                    frequency='daily', specific_days_of_month=[28, 29, 1])
+
+
+def test_partial_months_and_single_day_ranges():
+    assert_same(start_date=date(2024, 3, 17), end_date=date(2024, 5, 3), start_time=time(8, 0),
+                frequency='weekly', specific_weekdays=[6, 2, 2])
+    assert_same(start_date=date(2024, 3, 17), end_date=date(2024, 3, 17), start_time=time(8, 0),
+                frequency='daily')
+    assert_same(start_date=date(2024, 3, 17), end_date=date(2024, 3, 17), start_time=time(8, 0),
+                frequency='monthly', specific_days_of_month=[16, 17])
+    assert_same(start_date=date(2024, 12, 20), end_date=date(2025, 1, 10), start_time=time(23, 59, 59),
+                frequency='monthly')
+
+
+def test_invalid_and_empty_filters():
+    assert_same(start_date=date(2024, 6, 2), end_date=date(2024, 6, 1), start_time=time(8, 0),
+                frequency='daily')
+    assert_same(start_date=date(2024, 6, 1), end_date=date(2024, 7, 1), start_time=time(8, 0),
+                frequency='weekly')
+    assert_same(start_date=date(2024, 6, 1), end_date=date(2024, 7, 1), start_time=time(8, 0),
+                frequency='hourly')
+    assert_same(start_date=date(2024, 6, 1), end_date=date(2024, 7, 1), start_time=time(8, 0),
+                frequency='daily', specific_months=[])
+    assert_same(start_date=date(2024, 6, 1), end_date=date(2024, 7, 1), start_time=time(8, 0),
+                frequency='weekly', specific_weekdays=[])
+    assert_same(start_date=date(2024, 6, 1), end_date=date(2024, 7, 1), start_time=time(8, 0),
+                frequency='monthly', specific_days_of_month=[0, 32, 40])
+    assert_same(start_date=date(2024, 6, 1), end_date=date(2024, 7, 1), start_time=time(8, 0),
+                frequency='weekly', specific_weekdays=[7, -1, 3])
+
+
+def test_randomized_equivalence():
+    rng = random.Random(20250510)
+    for _ in range(400):
+        start_date = date(2023, 1, 1) + timedelta(days=rng.randrange(0, 800))
+        end_date = start_date + timedelta(days=rng.randrange(-5, 500))
+        frequency = rng.choice(['daily', 'weekly', 'monthly'])
+        specific_months = rng.choice([None, rng.sample(range(1, 13), rng.randrange(1, 6))])
+        specific_weekdays = rng.choice([None, rng.sample(range(0, 7), rng.randrange(1, 4))])
+        specific_days_of_month = rng.choice([None, rng.sample(range(1, 32), rng.randrange(1, 5))])
+        assert_same(start_date=start_date, end_date=end_date, start_time=time(rng.randrange(24), 30),
+                    frequency=frequency, specific_months=specific_months,
+                    specific_weekdays=specific_weekdays, specific_days_of_month=specific_days_of_month)
+
+
+def test_lazy_take_first_n():
+    # 100년 범위라도 앞의 N 건만 꺼내면 나머지는 계산하지 않음
+    schedules = iter_schedule_times(start_date=date(2025, 1, 1), end_date=date(2124, 12, 31),
+                                    start_time=time(8, 0), frequency='weekly', specific_weekdays=[0])
+    first = list(itertools.islice(schedules, 3))
+    assert first == [datetime(2025, 1, 6, 8, 0), datetime(2025, 1, 13, 8, 0), datetime(2025, 1, 20, 8, 0)]